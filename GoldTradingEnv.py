@@ -1,10 +1,9 @@
-import sqlite3
-
 import gymnasium as gym
 import numpy as np
-import pandas as pd
 from gymnasium import spaces
 
+from utils.history_store import HistoryStore
+
 
 class GoldTradingEnv(gym.Env):
     """Protocol 7.2: Database-Driven Autonomous XAUUSD Environment"""
@@ -14,10 +13,8 @@ class GoldTradingEnv(gym.Env):
         self.db_path = db_path
         self.symbol = f"{symbol}_history"
         self.initial_balance = initial_balance
-        # Load data once from SQL to memory for training speed
-        conn = sqlite3.connect(self.db_path)
-        self.df = pd.read_sql(f"SELECT * FROM {self.symbol} ORDER BY time ASC", conn)
-        conn.close()
+        # Load data once from SQL to memory for training speed (ordered via the time index)
+        self.df = HistoryStore(db_path, symbol).read_range()
         # Define Action & Observation Spaces (Matching Seed 101 Config)
         self.action_space = spaces.Discrete(3)  # Hold, Buy, Sell
         self.observation_space = spaces.Box(
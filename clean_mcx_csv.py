@@ -9,36 +9,24 @@ import os
 
 import pandas as pd
 
+from utils.cleaning_pipeline import (
+    CleaningPipeline,
+    CoerceTypes,
+    Deduplicate,
+    HealPrices,
+    OHLCSanity,
+    RenameColumns,
+)
+
 RAW_PATH = "raw/MCX_gold_raw.csv"  # from Investing.com / Kaggle
 OUT_PATH = "data/MCX_gold_daily.csv"
 SYMBOL = "MCX:GOLD"
 
 
-def convert_volume(vol_str):
-    """Converts volume strings like '21.65K' or '1.2M' to float."""
-    if isinstance(vol_str, (int, float)):
-        return float(vol_str)
-    vol_str = str(vol_str).strip().upper()
-    if not vol_str or vol_str == "-":
-        return 0.0
-
-    if vol_str.endswith("K"):
-        return float(vol_str[:-1]) * 1_000
-    if vol_str.endswith("M"):
-        return float(vol_str[:-1]) * 1_000_000
-    if vol_str.endswith("B"):
-        return float(vol_str[:-1]) * 1_000_000_000
-    return float(vol_str)
-
-
-def main():
-    os.makedirs("data", exist_ok=True)
-
-    df = pd.read_csv(RAW_PATH)
-
+def build_pipeline():
+    """Investing.com export -> [timestamp, open, high, low, close, volume], streamed."""
     # Adjust these column names to match your raw file exactly.
     # Common Investing.com headers: Date, Price, Open, High, Low, Vol., Change %
-    # Example mapping:
     col_map = {
         "Date": "timestamp",
         "Open": "open",
@@ -47,36 +35,31 @@ def main():
         "Price": "close",  # sometimes 'Close' or 'Last'
         "Vol.": "volume",
     }
-    df = df.rename(columns=col_map)
-
-    # Keep required columns only
-    df = df[["timestamp", "open", "high", "low", "close", "volume"]].copy()
-
-    # --- Data Cleaning ---
+    return CleaningPipeline(
+        [
+            RenameColumns(col_map, keep=["timestamp", "open", "high", "low", "close", "volume"]),
+            CoerceTypes(
+                volume="volume",
+                timestamp="timestamp",
+                timestamp_format="%d-%m-%Y",  # <-- IMPORTANT: day-month-year
+            ),
+            HealPrices(),
+            Deduplicate(subset=["timestamp"]),
+            OHLCSanity(),
+        ]
+    )
 
-    # 1. Clean and convert numeric columns
-    for col in ["open", "high", "low", "close"]:
-        if df[col].dtype == "object":
-            df[col] = df[col].str.replace(",", "", regex=False)
-        df[col] = pd.to_numeric(df[col], errors="coerce")
 
-    # 2. Clean and convert volume
-    if "volume" in df.columns and df["volume"].dtype == "object":
-        df["volume"] = df["volume"].apply(convert_volume)
+def main():
+    os.makedirs("data", exist_ok=True)
 
-    # 3. Parse date and sort
-    df["timestamp"] = pd.to_datetime(
-        df["timestamp"],
-        format="%d-%m-%Y",  # <-- IMPORTANT: day-month-year
-        errors="coerce",
-    )
+    # --- Data Cleaning (chunked, bounded memory) ---
+    report = build_pipeline().run_file(RAW_PATH, OUT_PATH)
+    print(report)
 
     # --- Final Processing ---
-
-    # Drop rows where essential data couldn't be parsed
-    df = df.dropna(subset=["timestamp", "open", "high", "low", "close"])
-
-    # Sort by date
+    # The daily output is small; Investing.com exports newest-first, so sort once here.
+    df = pd.read_csv(OUT_PATH, parse_dates=["timestamp"])
     df = df.sort_values("timestamp").reset_index(drop=True)
 
     # Add symbol column
@@ -6,38 +6,36 @@ Run this once to fix the CSV permanently
 
 import pandas as pd
 
-DATA_PATH = "data/GLD_daily.csv"
-
-# Read the messy CSV
-df = pd.read_csv(DATA_PATH)
-
-print("Original columns:", df.columns.tolist())
-print("Original shape:", df.shape)
-
-# Extract the date from 'Unnamed: 0' column
-if "Unnamed: 0" in df.columns:
-    df["timestamp"] = pd.to_datetime(df["Unnamed: 0"])
-else:
-    print("ERROR: 'Unnamed: 0' column not found")
-    exit(1)
-
-# Drop all messy columns, keep only the clean ones
-df_clean = df[["timestamp", "symbol", "open", "high", "low", "close", "volume"]].copy()
+from utils.cleaning_pipeline import (
+    CleaningPipeline,
+    CoerceTypes,
+    Deduplicate,
+    HealPrices,
+    OHLCSanity,
+    RenameColumns,
+)
 
-# Ensure numeric types
-df_clean["open"] = pd.to_numeric(df_clean["open"], errors="coerce")
-df_clean["high"] = pd.to_numeric(df_clean["high"], errors="coerce")
-df_clean["low"] = pd.to_numeric(df_clean["low"], errors="coerce")
-df_clean["close"] = pd.to_numeric(df_clean["close"], errors="coerce")
-df_clean["volume"] = pd.to_numeric(df_clean["volume"], errors="coerce")
-
-# Drop NaN rows
-df_clean = df_clean.dropna(subset=["open", "high", "low", "close"])
-
-# Sort by timestamp
+DATA_PATH = "data/GLD_daily.csv"
+COLUMNS = ["timestamp", "symbol", "open", "high", "low", "close", "volume"]
+
+# The date lives in the unnamed index column of the yfinance/Alpaca export
+pipeline = CleaningPipeline(
+    [
+        RenameColumns({"Unnamed: 0": "timestamp"}, keep=COLUMNS),
+        CoerceTypes(numeric=["open", "high", "low", "close", "volume"], timestamp="timestamp"),
+        HealPrices(),
+        Deduplicate(subset=["timestamp"]),
+        OHLCSanity(),
+    ]
+)
+
+# Streamed in chunks and swapped in atomically over the original file
+report = pipeline.run_file(DATA_PATH, DATA_PATH)
+print(report)
+
+# Sort by timestamp (daily file: small enough to sort in memory)
+df_clean = pd.read_csv(DATA_PATH, parse_dates=["timestamp"])
 df_clean = df_clean.sort_values("timestamp").reset_index(drop=True)
-
-# Overwrite the original file
 df_clean.to_csv(DATA_PATH, index=False)
 
 print("\n✓ CSV cleaned successfully!")
@@ -13,6 +13,7 @@ class Config:
     IS_PAPER_TRADING = os.getenv("TRADING_MODE", "0") != "1"
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     AUDIT_FILE = os.path.join(BASE_DIR, "audit_log.csv")
+    AUDIT_BACKPRESSURE = os.getenv("AUDIT_BACKPRESSURE", "spill")  # block | drop | spill
 
     @classmethod
     def print_config(cls):
@@ -47,6 +47,10 @@ TELEGRAM_CONFIG = {
     "enabled": bool(os.getenv("TELEGRAM_BOT_TOKEN")),
     "bot_token": os.getenv("TELEGRAM_BOT_TOKEN"),
     "chat_id": os.getenv("TELEGRAM_CHAT_ID"),
+    "api_url": os.getenv("TELEGRAM_API_URL", "https://api.telegram.org"),
+    "min_interval_s": 1.0,  # Telegram allows ~1 message/s per chat
+    "coalesce_window_s": 2.0,  # Alerts within this window go out as one digest
+    "max_queue": 500,  # Oldest routine alert dropped beyond this
 }
 
 # --- NEWS CONFIG ---
@@ -63,6 +67,66 @@ STRATEGY_CONFIG = {
     "cooldown_minutes": 240,
 }
 
-JOURNAL_CONFIG = {"enabled": True, "type": "CSV"}
+JOURNAL_CONFIG = {
+    "enabled": True,
+    "type": "CSV",
+    "backpressure": "spill",  # block | drop | spill (write-behind queue full)
+    "queue_size": 10_000,
+}
+
+EXECUTION_CONFIG = {
+    "max_slippage_pct": 0.05,
+    "max_notional_value": 500_000,
+    # PaperBroker: order-to-fill latency range (s, on utils/time_utils' clock) and RNG
+    # seed for latency/slippage/tickets. None draws a fresh seed (logged) per run.
+    "paper_latency_s": (0.1, 0.5),
+    "paper_seed": None,
+    # execution/order_router: worker tasks per broker, retries after the first attempt,
+    # full-jitter backoff (base, cap) and per-attempt deadline, in seconds
+    "order_workers": 2,
+    "order_retries": 3,
+    "order_backoff_s": (0.2, 2.0),
+    "order_timeout_s": 10.0,
+    # execution/reconciler: pass interval and per-broker snapshot deadline (s), qty and
+    # relative entry-price tolerances, and whether to rewrite the ledger to match the broker
+    "reconcile_interval_s": 5.0,
+    "reconcile_timeout_s": 3.0,
+    "reconcile_qty_tol": 1e-6,
+    "reconcile_price_tol_pct": 0.001,
+    "reconcile_auto_heal": False,
+    # execution/slippage_model: calibrated tables (absent -> the default prior below),
+    # bin edges for ATR/price and lots, and the fills a cell needs before it is trusted
+    "slippage_model_path": "data/slippage_model.npz",
+    "slippage_vol_edges": (0.0003, 0.0006, 0.0012),
+    "slippage_size_edges": (1.0, 5.0, 20.0),
+    "slippage_min_samples": 5,
+    "default_spread_pct": 1e-4,  # $0.20 on a $2000 quote
+    # src/broker_manager: position snapshot lifetime and per-broker deadline (s), and the
+    # USD/INR quote for MCX exposure (cached market data; the fallback until it loads)
+    "positions_ttl_s": 2.0,
+    "positions_timeout_s": 3.0,
+    "usd_inr_ticker": "USDINR=X",
+    "usd_inr_fallback": 83.50,
+    # execution/algo_executor: default TWAP/VWAP horizon (s) and child count, and the
+    # pause (s) between an iceberg clip filling and the next one showing
+    "algo_duration_s": 600.0,
+    "algo_slices": 10,
+    "iceberg_interval_s": 2.0,
+}
 
-EXECUTION_CONFIG = {"max_slippage_pct": 0.05, "max_notional_value": 500_000}
+# --- LATENCY CONFIG (utils/latency: per-stage timing histograms) ---
+LATENCY_CONFIG = {
+    "enabled": True,
+    "export_path": "logs/latency.json",
+    "export_interval_s": 60.0,
+}
+
+# --- SQLITE CONFIG (utils/migrations.apply_pragmas; every store connection) ---
+SQLITE_CONFIG = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,  # ms
+    "cache_size": -65536,  # KiB (negative = size, not pages): 64 MB page cache
+    "mmap_size": 268_435_456,  # 256 MB memory-mapped reads
+    "temp_store": "MEMORY",
+}
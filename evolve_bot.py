@@ -1,9 +1,7 @@
-import sqlite3
-
-import pandas as pd
 from stable_baselines3 import PPO
 
 from GoldTradingEnv import GoldTradingEnv
+from utils.history_store import HistoryStore
 
 
 def evolve_brain():
@@ -11,13 +9,13 @@ def evolve_brain():
 
     # 1. Connect to your local XAUUSD database
     db_path = "data/trading_history.db"
-    conn = sqlite3.connect(db_path)
+    store = HistoryStore(db_path, "XAUUSD")
 
-    # 2. Extract the full history (including today's new live data)
-    df = pd.read_sql("SELECT * FROM XAUUSD_history ORDER BY time ASC", conn)
-    conn.close()
+    # 2. Enrich today's new bars only, then size the history (including today's live data)
+    store.enrich_new_rows()
+    n_bars = store.count()
 
-    if len(df) < 100:
+    if n_bars < 100:
         print("⚠️ Not enough data in database to evolve. Collect more live ticks first.")
         return
 
@@ -30,7 +28,7 @@ def evolve_brain():
 
     # 5. Execute Fine-Tuning (The Evolution)
     # 5,000 steps is enough for a daily "refresh" without over-fitting
-    print(f"🏋️  Retraining on {len(df)} bars of market history...")
+    print(f"🏋️  Retraining on {n_bars} bars of market history...")
     model.learn(total_timesteps=5000, reset_num_timesteps=False)
 
     # 6. Save the new "Evolved" model
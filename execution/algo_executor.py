@@ -0,0 +1,260 @@
+import asyncio
+import logging
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from config.settings import ASSET_CONFIG, EXECUTION_CONFIG
+from execution.order_router import ACCEPTED, REJECTED, new_key
+from execution.paper_broker import FILLED, PENDING
+from utils.time_utils import get_utc_now, run_in_thread, sleep_until
+
+logger = logging.getLogger(__name__)
+
+# Algorithms
+TWAP = "TWAP"
+VWAP = "VWAP"
+ICEBERG = "ICEBERG"
+
+# Parent states
+WORKING = "WORKING"
+DONE = "DONE"  # every child accepted
+PARTIAL = "PARTIAL"  # ran to the end with some child rejected or failed
+CANCELLED = "CANCELLED"
+
+# Child states before the router takes over (then its QUEUED ... ACCEPTED / REJECTED / FAILED)
+SCHEDULED = "SCHEDULED"
+SKIPPED = "SKIPPED"  # rounded to zero lots
+
+
+def split_qty(qty, weights, step=0.01):
+    """
+    `qty` split in proportion to `weights` in whole multiples of `step`,
+    summing exactly to `qty` (the largest remainders take the odd lots).
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.sum() <= 0:
+        weights = np.ones(len(weights))
+    units = int(round(qty / step))
+    exact = units * weights / weights.sum()
+    lots = np.floor(exact).astype(np.int64)
+    lots[np.argsort(lots - exact, kind="stable")[: units - lots.sum()]] += 1
+    return [round(int(n) * step, 8) for n in lots]
+
+
+def volume_profile(df, slices, duration_s, start=None):
+    """
+    Expected volume in each of `slices` equal windows of the next
+    `duration_s` seconds from `start` (default now), by time of day: the
+    bars' Volume summed per window over every day in `df`.
+    """
+    cols = {str(c).lower(): c for c in df.columns}
+    time_col = next((cols[c] for c in ("datetime", "timestamp", "date", "time") if c in cols), None)
+    times = pd.to_datetime(df[time_col] if time_col is not None else df.index, utc=True)
+    times = pd.DatetimeIndex(times)
+    seconds = (times.hour * 3600 + times.minute * 60 + times.second).to_numpy()
+
+    start = start or get_utc_now()
+    origin = start.hour * 3600 + start.minute * 60 + start.second
+    offset = (seconds - origin) % 86400
+    within = offset < duration_s
+    window = (offset[within] // (duration_s / slices)).astype(np.int64)
+    volume = df[cols["volume"]].to_numpy(dtype=np.float64)[within]
+    return np.bincount(window, volume, minlength=slices)[:slices]
+
+
+class AlgoExecutor:
+    """
+    Protocol 7.8: Child-Order Execution Algorithms.
+    Works a large parent order as smaller child orders through an
+    OrderRouter (so each child gets its idempotency key, deadline and
+    retries): TWAP spreads it evenly over a horizon, VWAP in proportion to
+    the historical volume profile, and an iceberg shows one fixed clip at a
+    time, releasing the next once the last is done. Each parent runs as its
+    own task and sleeps on the installed clock (utils/time_utils), so many
+    parents and strategies share one loop, and a SimulatedClock replays a
+    ten-minute schedule instantly. A market child counts as filled once its
+    broker accepts it, or, at a broker with `fill_status` (PaperBroker, whose
+    accept only schedules the fill), once that reports the actual fill; one
+    rejected at fill time (margin) ends REJECTED. `parents[id]` tracks
+    filled / remaining quantity and every child's state.
+    """
+
+    def __init__(self, router):
+        self.router = router
+        self.parents = {}
+        self._tasks = {}
+
+    # --- ALGORITHMS ---
+
+    async def twap(
+        self, broker, action, symbol, price, qty, duration_s=None, slices=None, **kwargs
+    ):
+        """Equal children every duration_s / slices seconds, the first at once."""
+        slices = slices or EXECUTION_CONFIG["algo_slices"]
+        weights = np.ones(slices)
+        return self._launch(TWAP, broker, action, symbol, price, qty, weights, duration_s, kwargs)
+
+    async def vwap(self, broker, action, symbol, price, qty, profile, duration_s=None, **kwargs):
+        """
+        Children on the TWAP timetable, sized by `profile`: one expected
+        volume per slice, or a bar DataFrame to take it from (see volume_profile).
+        """
+        duration_s = duration_s or EXECUTION_CONFIG["algo_duration_s"]
+        if isinstance(profile, pd.DataFrame):
+            profile = volume_profile(profile, EXECUTION_CONFIG["algo_slices"], duration_s)
+        weights = np.asarray(profile, dtype=np.float64)
+        return self._launch(VWAP, broker, action, symbol, price, qty, weights, duration_s, kwargs)
+
+    async def iceberg(
+        self, broker, action, symbol, price, qty, display_qty, interval_s=None, **kwargs
+    ):
+        """Clips of `display_qty`, each sent once the previous one is done (+ interval_s)."""
+        clips = max(1, int(np.ceil(qty / display_qty - 1e-9)))
+        weights = [display_qty] * (clips - 1) + [qty - display_qty * (clips - 1)]
+        interval_s = EXECUTION_CONFIG["iceberg_interval_s"] if interval_s is None else interval_s
+        return self._launch(
+            ICEBERG, broker, action, symbol, price, qty, weights, interval_s, kwargs
+        )
+
+    # --- TRACKING ---
+
+    def _launch(self, algo, broker, action, symbol, price, qty, weights, horizon, kwargs):
+        if broker not in self.router.brokers:
+            raise KeyError(f"No broker '{broker}' in the router")
+        step = ASSET_CONFIG.get(symbol, {}).get("vol_step", 0.01)
+        parent_id = f"{algo.lower()}-{new_key()[:12]}"
+        start = get_utc_now()
+        spacing = 0.0
+        if algo != ICEBERG:
+            horizon = horizon or EXECUTION_CONFIG["algo_duration_s"]
+            spacing = horizon / len(weights)
+        parent = {
+            "id": parent_id,
+            "algo": algo,
+            "broker": broker,
+            "action": action,
+            "symbol": symbol,
+            "price": price,
+            "qty": qty,
+            "filled_qty": 0.0,
+            "remaining_qty": qty,
+            "state": WORKING,
+            "interval_s": horizon if algo == ICEBERG else None,
+            "kwargs": kwargs,
+            "children": [
+                {
+                    "key": f"{parent_id}:{i}",
+                    # Iceberg clips are timed off the previous clip at run time
+                    "due": None if algo == ICEBERG else start + timedelta(seconds=i * spacing),
+                    "qty": child_qty,
+                    "state": SCHEDULED if child_qty > 0 else SKIPPED,
+                    "result": None,
+                }
+                for i, child_qty in enumerate(split_qty(qty, weights, step))
+            ],
+            "started_at": start,
+            "finished_at": None,
+        }
+        self.parents[parent_id] = parent
+        self._tasks[parent_id] = asyncio.create_task(self._run(parent), name=f"algo:{parent_id}")
+        logger.info(
+            f"Algo {parent_id}: {symbol} {qty} lots in {len(parent['children'])} children via {broker}"
+        )
+        return parent
+
+    def get(self, parent_id):
+        return self.parents.get(parent_id)
+
+    async def wait(self, parent_id, timeout=None):
+        """The parent once every child is done (or it was cancelled)."""
+        await asyncio.wait_for(asyncio.shield(self._tasks[parent_id]), timeout)
+        return self.parents[parent_id]
+
+    async def cancel(self, parent_id):
+        """Stops sending children; those already sent are still tracked to their result."""
+        self._tasks[parent_id].cancel()
+        return await self.wait(parent_id)
+
+    # --- SCHEDULING ---
+
+    async def _quote(self, parent):
+        """The broker's current price for the next child, or the parent's if it has none."""
+        broker = self.router.brokers[parent["broker"]]
+        try:
+            tick = await run_in_thread(broker.get_tick, parent["symbol"])
+        except Exception as e:
+            logger.warning(f"Algo {parent['id']}: quote failed ({e!r}); using the parent price")
+            tick = None
+        return tick or parent["price"]
+
+    async def _send(self, parent, child, first):
+        kwargs = dict(parent["kwargs"])
+        if parent["action"] == 1 and not first:
+            kwargs["pyramid"] = True  # later children add to the position the first opened
+        price = await self._quote(parent)
+        order = await self.router.submit(
+            parent["broker"],
+            parent["action"],
+            parent["symbol"],
+            price,
+            child["qty"],
+            key=child["key"],
+            **kwargs,
+        )
+        child["state"] = order["state"]
+
+    async def _filled(self, parent, child):
+        """Waits out a scheduled fill at brokers that report one; False if it was rejected."""
+        fill_status = getattr(self.router.brokers[parent["broker"]], "fill_status", None)
+        if fill_status is None:
+            return True
+        while True:
+            status = await run_in_thread(fill_status, child["key"])
+            if status is None or status[0] != PENDING:
+                return status is None or status[0] == FILLED
+            await sleep_until(status[1])
+
+    async def _settle(self, parent, child):
+        order = await self.router.wait(child["key"])
+        state = order["state"]
+        if state == ACCEPTED and not await self._filled(parent, child):
+            state = REJECTED
+        child["state"], child["result"] = state, order["result"]
+        if state == ACCEPTED:
+            parent["filled_qty"] = round(parent["filled_qty"] + child["qty"], 8)
+            parent["remaining_qty"] = round(parent["qty"] - parent["filled_qty"], 8)
+
+    async def _run(self, parent):
+        settling, sent = [], 0
+        try:
+            for child in parent["children"]:
+                if child["state"] == SKIPPED:
+                    continue
+                if parent["algo"] == ICEBERG:
+                    if sent:
+                        await sleep_until(get_utc_now() + timedelta(seconds=parent["interval_s"]))
+                else:
+                    await sleep_until(child["due"])
+                await self._send(parent, child, first=sent == 0)
+                sent += 1
+                settle = asyncio.create_task(self._settle(parent, child))
+                settling.append(settle)
+                if parent["algo"] == ICEBERG:
+                    await asyncio.shield(settle)  # next clip only once this one is done
+            await asyncio.gather(*settling)
+            parent["state"] = DONE if parent["remaining_qty"] <= 1e-9 else PARTIAL
+        except asyncio.CancelledError:
+            parent["state"] = CANCELLED
+            for child in parent["children"]:
+                if child["state"] == SCHEDULED:
+                    child["state"] = CANCELLED
+            await asyncio.gather(*settling, return_exceptions=True)
+        finally:
+            parent["finished_at"] = get_utc_now()
+        logger.info(
+            f"Algo {parent['id']}: {parent['state']} "
+            f"({parent['filled_qty']}/{parent['qty']} lots in {sent} children)"
+        )
+        return parent
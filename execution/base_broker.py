@@ -8,6 +8,10 @@ class BrokerInterface(ABC):
     This allows the Strategy to switch execution engines instantly.
     """
 
+    # True only if place_order returns the original result for a repeated
+    # `client_order_id` instead of trading again (lets the router retry timeouts)
+    supports_client_order_id = False
+
     @abstractmethod
     def connect(self):
         """Establishes connection to the exchange/database."""
@@ -19,8 +23,8 @@ class BrokerInterface(ABC):
         pass
 
     @abstractmethod
-    def get_positions(self):
-        """Returns account equity, open positions, and pending orders."""
+    def get_positions(self, symbol=None):
+        """Returns account equity, open positions, and pending orders (one symbol or all)."""
         pass
 
     @abstractmethod
@@ -32,11 +36,14 @@ class BrokerInterface(ABC):
             symbol (str): Asset name.
             price (float): Limit or Market price.
             qty (float): Lot size.
-            kwargs: 'sl', 'tp', 'type' (MARKET/LIMIT), 'tif', 'atr'.
+            kwargs: 'sl', 'tp', 'type' (MARKET/LIMIT/STOP), 'tif', 'atr',
+                'strategy' (position tag), 'pyramid' (add to a held symbol),
+                'position_id' (close that position; qty below its size = partial),
+                'trail' / 'atr_mult' (trailing stop distance in price / ATRs).
         """
         pass
 
     @abstractmethod
-    def check_limits(self, current_price, symbol):
-        """Checks if Price hit SL, TP, or Limit Orders."""
+    def check_limits(self, current_price, symbol, atr=None):
+        """Checks if Price hit SL, TP (trailing by `atr` where set), or Limit Orders."""
         pass
@@ -1,10 +1,10 @@
 import asyncio
 import os
 
-import numpy as np
 import pandas as pd
 
 from config.settings import ASSET_CONFIG
+from utils.cleaning_pipeline import live_pipeline
 
 
 class AsyncDataHandler:
@@ -21,6 +21,7 @@ class AsyncDataHandler:
         self.last_mtime = 0
         self.running = False
         self.lock = asyncio.Lock()
+        self.pipeline = live_pipeline()
 
     async def start(self):
         """Starts the background ingestion task."""
@@ -39,23 +40,9 @@ class AsyncDataHandler:
         if df.empty:
             return df
 
-        # 1. Enforce Numeric Types (Fixes 'string' math errors)
-        cols_to_check = ["Open", "High", "Low", "Close"]
-        for col in cols_to_check:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-
-        # 2. Protocol 4.1.3: Replace 0.0 with NaN in Price Columns
-        # (Volume can be 0, but Price cannot)
-        df[cols_to_check] = df[cols_to_check].replace(0.0, np.nan)
-
-        # 3. Forward Fill (Heal small gaps)
-        df = df.ffill()
-
-        # 4. Drop remaining NaNs (Unsalvageable rows)
-        df = df.dropna(subset=cols_to_check)
-
-        return df
+        # Coerce -> 0.0 to NaN -> forward fill -> drop unsalvageable rows
+        clean_df, _ = self.pipeline.run(df)
+        return clean_df
 
     async def _poll_data(self):
         """
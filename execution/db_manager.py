@@ -1,26 +1,192 @@
 import os
 import sqlite3
-from datetime import datetime
+import threading
+from contextlib import contextmanager, suppress
+
+from utils.migrations import Migration, apply_pragmas, migrate, query_plans
+from utils.time_utils import get_local_now
+
+# Statements are module constants so every call passes the identical string
+# and sqlite3's per-connection statement cache skips re-preparing them.
+SQL_GET_ACCOUNT = "SELECT equity, balance FROM account WHERE id=1"
+SQL_UPDATE_EQUITY = "UPDATE account SET equity=?, updated_at=? WHERE id=1"
+SQL_UPDATE_EQUITY_BALANCE = "UPDATE account SET equity=?, balance=?, updated_at=? WHERE id=1"
+SQL_OPEN_POSITION = (
+    "SELECT * FROM trades WHERE symbol=? AND status='OPEN' ORDER BY trade_id LIMIT 1"
+)
+SQL_ADD_TRADE = """
+    INSERT INTO trades (broker_ticket, symbol, direction, size, entry_price, sl_price, tp_price, status, magic_number, entry_time, strategy, trail, atr_mult)
+    VALUES (?, ?, ?, ?, ?, ?, ?, 'OPEN', ?, ?, ?, ?, ?)
+"""
+SQL_CLOSE_TRADE = """
+    UPDATE trades
+    SET status='CLOSED', exit_price=?, pnl=?, exit_time=?
+    WHERE symbol=? AND status='OPEN'
+"""
+SQL_CLOSE_POSITION = """
+    UPDATE trades
+    SET status='CLOSED', exit_price=?, pnl=?, exit_time=?
+    WHERE trade_id=? AND status='OPEN'
+"""
+SQL_REDUCE_POSITION = "UPDATE trades SET size=size-? WHERE trade_id=? AND status='OPEN'"
+# Partial close: the closed slice becomes its own CLOSED row pointing at the position
+SQL_SPLIT_POSITION = """
+    INSERT INTO trades (broker_ticket, symbol, direction, size, entry_price, sl_price, tp_price, status, magic_number, entry_time, strategy, trail, atr_mult, parent_id, exit_price, pnl, exit_time)
+    SELECT broker_ticket, symbol, direction, ?, entry_price, sl_price, tp_price, 'CLOSED', magic_number, entry_time, strategy, trail, atr_mult, trade_id, ?, ?, ?
+    FROM trades WHERE trade_id=? AND status='OPEN'
+"""
+SQL_LAST_EXIT = """
+    SELECT exit_time FROM trades WHERE symbol=? AND status='CLOSED'
+    ORDER BY exit_time DESC LIMIT 1
+"""
+SQL_ADD_ORDER = """
+    INSERT INTO orders (symbol, action, limit_price, qty, sl, tp, type, date, strategy)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_GET_ORDERS = "SELECT * FROM orders WHERE symbol=?"
+SQL_ALL_OPEN_TRADES = "SELECT * FROM trades WHERE status='OPEN'"
+SQL_ALL_ORDERS = "SELECT * FROM orders ORDER BY order_id"
+SQL_LAST_EXITS = """
+    SELECT symbol, MAX(exit_time) FROM trades WHERE status='CLOSED' GROUP BY symbol
+"""
+SQL_REMOVE_ORDER = "DELETE FROM orders WHERE order_id=?"
+SQL_REPLACE_ORDER = "UPDATE orders SET limit_price=?, qty=? WHERE order_id=?"
+
+# Versioned schema changes for the "bot_state" store (see utils/migrations.py)
+MIGRATIONS = [
+    Migration(
+        1,
+        "trade and order lookups",
+        [
+            # (symbol, status) serves the open-position probe; exit_time makes it
+            # covering for the cooldown / last-exit queries
+            "CREATE INDEX IF NOT EXISTS idx_trades_symbol_status_exit "
+            "ON trades(symbol, status, exit_time)",
+            # Only open rows: the warm-load scan stays small as history grows
+            "CREATE INDEX IF NOT EXISTS idx_trades_open_symbol ON trades(symbol) "
+            "WHERE status='OPEN'",
+            "CREATE INDEX IF NOT EXISTS idx_orders_symbol ON orders(symbol)",
+        ],
+        [
+            "DROP INDEX IF EXISTS idx_trades_symbol_status_exit",
+            "DROP INDEX IF EXISTS idx_trades_open_symbol",
+            "DROP INDEX IF EXISTS idx_orders_symbol",
+        ],
+    ),
+    Migration(
+        2,
+        "multi-position trades",
+        [
+            # Several positions per symbol: tagged by strategy, partial closes
+            # recorded as CLOSED child rows of the position they came from
+            "ALTER TABLE trades ADD COLUMN strategy TEXT",
+            "ALTER TABLE trades ADD COLUMN parent_id INTEGER",
+            "ALTER TABLE orders ADD COLUMN strategy TEXT",
+        ],
+        [
+            "ALTER TABLE trades DROP COLUMN strategy",
+            "ALTER TABLE trades DROP COLUMN parent_id",
+            "ALTER TABLE orders DROP COLUMN strategy",
+        ],
+    ),
+    Migration(
+        3,
+        "trailing stops",
+        [
+            # Trailing distance in price units, or in ATRs (StopLossManager)
+            "ALTER TABLE trades ADD COLUMN trail REAL DEFAULT 0",
+            "ALTER TABLE trades ADD COLUMN atr_mult REAL DEFAULT 0",
+        ],
+        [
+            "ALTER TABLE trades DROP COLUMN trail",
+            "ALTER TABLE trades DROP COLUMN atr_mult",
+        ],
+    ),
+]
+# Per-tick / per-cycle reads, with representative parameters
+HOT_QUERIES = {
+    "open_position": (SQL_OPEN_POSITION, ("XAUUSD",)),
+    "last_exit": (SQL_LAST_EXIT, ("XAUUSD",)),
+    "last_exits": (SQL_LAST_EXITS, ()),
+    "all_open_trades": (SQL_ALL_OPEN_TRADES, ()),
+    "orders_for_symbol": (SQL_GET_ORDERS, ("XAUUSD",)),
+}
 
 
 class DBManager:
     """
     Protocol 9.2: SQLite State Management.
     Implements the schema defined in Table 9.2 for robust data persistence.
+    Each thread keeps one long-lived WAL connection, so a state read is a
+    cached-statement lookup rather than a connect/parse/close round trip.
     """
 
     def __init__(self, db_path="data/bot_state.db"):
         self.db_path = db_path
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._local = threading.local()
+        self._conns = []
+        self._conns_lock = threading.Lock()
         self._init_tables()
 
     def _get_conn(self):
-        return sqlite3.connect(self.db_path)
+        """This thread's persistent connection (autocommit; see `transaction`)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            apply_pragmas(conn)
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._conns_lock:
+                self._conns.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self, write=True):
+        """
+        Groups several writes (e.g. close trade + equity update) into one
+        atomic commit. Nested blocks join the outermost transaction.
+        `write=False` opens a deferred (read snapshot) transaction instead of
+        taking the write lock up front.
+        """
+        conn = self._get_conn()
+        if self._local.depth == 0:
+            conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+        self._local.depth += 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                conn.execute("ROLLBACK")
+            raise
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            conn.execute("COMMIT")
+
+    def close(self):
+        """Closes every connection opened through this manager."""
+        with self._conns_lock:
+            for conn in self._conns:
+                with suppress(sqlite3.ProgrammingError):
+                    conn.close()
+            self._conns.clear()
+        self._local = threading.local()
 
     def _init_tables(self):
         """Creates the Tables defined in Table 9.2"""
-        conn = self._get_conn()
-        cursor = conn.cursor()
+        with self.transaction() as conn:
+            self._create_tables(conn.cursor())
+        migrate(self._get_conn(), "bot_state", MIGRATIONS)
+
+    def query_plans(self):
+        """EXPLAIN QUERY PLAN of every hot query against this file."""
+        return query_plans(self._get_conn(), HOT_QUERIES)
+
+    @staticmethod
+    def _create_tables(cursor):
 
         # 1. ACCOUNT STATE (Equity/Balance)
         cursor.execute("""
@@ -72,20 +238,13 @@ class DBManager:
         if cursor.fetchone()[0] == 0:
             cursor.execute(
                 "INSERT INTO account (id, equity, balance, updated_at) VALUES (1, 500000.0, 500000.0, ?)",
-                (datetime.now().isoformat(),),
+                (get_local_now().isoformat(),),
             )
 
-        conn.commit()
-        conn.close()
-
     # --- PUBLIC METHODS ---
 
     def get_account(self):
-        conn = self._get_conn()
-        cursor = conn.cursor()
-        cursor.execute("SELECT equity, balance FROM account WHERE id=1")
-        row = cursor.fetchone()
-        conn.close()
+        row = self._get_conn().execute(SQL_GET_ACCOUNT).fetchone()
         if row:
             return {"equity": row[0], "balance": row[1]}
         return {"equity": 500000.0, "balance": 500000.0}
@@ -93,72 +252,112 @@ class DBManager:
     def update_equity(self, equity, balance=None):
         conn = self._get_conn()
         if balance:
-            conn.execute(
-                "UPDATE account SET equity=?, balance=?, updated_at=? WHERE id=1",
-                (equity, balance, datetime.now().isoformat()),
-            )
+            conn.execute(SQL_UPDATE_EQUITY_BALANCE, (equity, balance, get_local_now().isoformat()))
         else:
-            conn.execute(
-                "UPDATE account SET equity=?, updated_at=? WHERE id=1",
-                (equity, datetime.now().isoformat()),
-            )
-        conn.commit()
-        conn.close()
+            conn.execute(SQL_UPDATE_EQUITY, (equity, get_local_now().isoformat()))
 
     def get_open_position(self, symbol):
-        conn = self._get_conn()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM trades WHERE symbol=? AND status='OPEN'", (symbol,))
-        row = cursor.fetchone()
-        conn.close()
+        """Oldest open position for `symbol` (single-position callers), or "FLAT"."""
+        row = self._get_conn().execute(SQL_OPEN_POSITION, (symbol,)).fetchone()
 
         if row:
-            # Convert SQLite Row to Dict
-            return {
-                "id": row["trade_id"],
-                "type": row["direction"],
-                "symbol": row["symbol"],
-                "entry_price": row["entry_price"],
-                "qty": row["size"],
-                "sl": row["sl_price"],
-                "tp": row["tp_price"],
-            }
+            return self._position_from_row(row)
         return "FLAT"
 
-    def add_trade(self, ticket, symbol, direction, size, price, sl, tp, magic=123456):
-        conn = self._get_conn()
-        conn.execute(
-            """
-            INSERT INTO trades (broker_ticket, symbol, direction, size, entry_price, sl_price, tp_price, status, magic_number, entry_time)
-            VALUES (?, ?, ?, ?, ?, ?, ?, 'OPEN', ?, ?)
-        """,
-            (ticket, symbol, direction, size, price, sl, tp, magic, datetime.now().isoformat()),
+    @staticmethod
+    def _position_from_row(row):
+        # Convert SQLite Row to Dict
+        return {
+            "id": row["trade_id"],
+            "type": row["direction"],
+            "symbol": row["symbol"],
+            "entry_price": row["entry_price"],
+            "qty": row["size"],
+            "sl": row["sl_price"],
+            "tp": row["tp_price"],
+            "strategy": row["strategy"],
+            "trail": row["trail"],
+            "atr_mult": row["atr_mult"],
+        }
+
+    def get_open_positions(self):
+        """All OPEN trades as {trade_id: position} (state cache warm-load)."""
+        rows = self._get_conn().execute(SQL_ALL_OPEN_TRADES).fetchall()
+        return {row["trade_id"]: self._position_from_row(row) for row in rows}
+
+    def get_all_orders(self):
+        rows = self._get_conn().execute(SQL_ALL_ORDERS).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_last_exit_times(self):
+        """{symbol: ISO exit time of the latest closed trade}."""
+        return dict(self._get_conn().execute(SQL_LAST_EXITS).fetchall())
+
+    def add_trade(
+        self,
+        ticket,
+        symbol,
+        direction,
+        size,
+        price,
+        sl,
+        tp,
+        magic=123456,
+        strategy=None,
+        trail=0.0,
+        atr_mult=0.0,
+    ):
+        """Returns the new trade_id (the position id)."""
+        cursor = self._get_conn().execute(
+            SQL_ADD_TRADE,
+            (
+                ticket,
+                symbol,
+                direction,
+                size,
+                price,
+                sl,
+                tp,
+                magic,
+                get_local_now().isoformat(),
+                strategy,
+                trail,
+                atr_mult,
+            ),
         )
-        conn.commit()
-        conn.close()
+        return cursor.lastrowid
+
+    def close_trade(self, symbol, exit_price, pnl, exit_time=None):
+        """Closes every open position in `symbol`. Returns the exit timestamp written."""
+        exit_time = exit_time or get_local_now().isoformat()
+        self._get_conn().execute(SQL_CLOSE_TRADE, (exit_price, pnl, exit_time, symbol))
+        return exit_time
 
-    def close_trade(self, symbol, exit_price, pnl):
+    def close_position(self, trade_id, exit_price, pnl, qty=None, exit_time=None):
+        """
+        Closes one position, or only `qty` of it: the open row keeps the rest and
+        the closed slice is stored as a CLOSED row with parent_id=trade_id.
+        Call inside `transaction()` for a partial close. Returns the exit timestamp.
+        """
+        exit_time = exit_time or get_local_now().isoformat()
         conn = self._get_conn()
-        conn.execute(
-            """
-            UPDATE trades
-            SET status='CLOSED', exit_price=?, pnl=?, exit_time=?
-            WHERE symbol=? AND status='OPEN'
-        """,
-            (exit_price, pnl, datetime.now().isoformat(), symbol),
-        )
-        conn.commit()
-        conn.close()
+        if qty is None:
+            conn.execute(SQL_CLOSE_POSITION, (exit_price, pnl, exit_time, trade_id))
+        else:
+            conn.execute(SQL_SPLIT_POSITION, (qty, exit_price, pnl, exit_time, trade_id))
+            conn.execute(SQL_REDUCE_POSITION, (qty, trade_id))
+        return exit_time
+
+    def get_last_exit_time(self, symbol):
+        """ISO timestamp of the most recent closed trade (cooldown check), or None."""
+        row = self._get_conn().execute(SQL_LAST_EXIT, (symbol,)).fetchone()
+        return row[0] if row else None
 
     # --- PENDING ORDERS SUPPORT ---
     def add_order(self, order_dict):
-        conn = self._get_conn()
-        conn.execute(
-            """
-            INSERT INTO orders (symbol, action, limit_price, qty, sl, tp, type, date)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """,
+        """Returns the new order_id."""
+        cursor = self._get_conn().execute(
+            SQL_ADD_ORDER,
             (
                 order_dict["symbol"],
                 order_dict["action"],
@@ -168,22 +367,17 @@ class DBManager:
                 order_dict["tp"],
                 order_dict["type"],
                 order_dict["date"],
+                order_dict.get("strategy"),
             ),
         )
-        conn.commit()
-        conn.close()
+        return cursor.lastrowid
 
     def get_orders(self, symbol):
-        conn = self._get_conn()
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM orders WHERE symbol=?", (symbol,))
-        rows = cursor.fetchall()
-        conn.close()
+        rows = self._get_conn().execute(SQL_GET_ORDERS, (symbol,)).fetchall()
         return [dict(row) for row in rows]  # Return list of dicts
 
     def remove_order(self, order_id):
-        conn = self._get_conn()
-        conn.execute("DELETE FROM orders WHERE order_id=?", (order_id,))
-        conn.commit()
-        conn.close()
+        self._get_conn().execute(SQL_REMOVE_ORDER, (order_id,))
+
+    def replace_order(self, order_id, limit_price, qty):
+        self._get_conn().execute(SQL_REPLACE_ORDER, (limit_price, qty, order_id))
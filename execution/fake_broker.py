@@ -0,0 +1,85 @@
+import itertools
+import random
+import threading
+import time
+
+from execution.base_broker import BrokerInterface
+from utils.exceptions import BrokerConnectionError
+
+
+class FakeBroker(BrokerInterface):
+    """
+    Local stand-in for a live broker (offline throughput / latency tests).
+    Every call sleeps `latency` seconds (a (low, high) range is drawn from a
+    seeded RNG) and fails with BrokerConnectionError at `failure_rate`, or
+    for the next `fail_next` calls. Orders carrying a `client_order_id`
+    already seen return the original fill instead of trading again, the way
+    a real venue dedupes a retried submission.
+    """
+
+    supports_client_order_id = True
+
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=0, equity=100000.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.fail_next = 0
+        self.rng = random.Random(seed)
+        self.equity = equity
+        self.fills = []  # every distinct fill, in order
+        self.orders = []  # resting orders reported by get_positions (set by tests)
+        self.calls = 0
+        self._by_client_id = {}
+        self._tickets = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _latency(self):
+        if isinstance(self.latency, tuple):
+            with self._lock:
+                return self.rng.uniform(*self.latency)
+        return self.latency
+
+    def connect(self):
+        return True
+
+    def get_tick(self, symbol):
+        return 0.0
+
+    def get_positions(self, symbol=None):
+        time.sleep(self._latency())
+        with self._lock:
+            fills = [f for f in self.fills if symbol is None or f["symbol"] == symbol]
+            orders = [o for o in self.orders if symbol is None or o["symbol"] == symbol]
+        return {
+            "equity": self.equity,
+            "position": fills[0] if fills else "FLAT",
+            "positions": fills,
+            "orders": orders,
+        }
+
+    def place_order(self, action, symbol, price, qty, **kwargs):
+        time.sleep(self._latency())
+        client_id = kwargs.get("client_order_id")
+        with self._lock:
+            self.calls += 1
+            if self.fail_next > 0 or self.rng.random() < self.failure_rate:
+                self.fail_next = max(0, self.fail_next - 1)
+                raise BrokerConnectionError(f"FakeBroker: {symbol} order dropped")
+            if client_id is not None and client_id in self._by_client_id:
+                return self._by_client_id[client_id]
+            if qty <= 0:
+                return False
+            fill = {
+                "ticket": next(self._tickets),
+                "client_order_id": client_id,
+                "action": action,
+                "symbol": symbol,
+                "price": price,
+                "qty": qty,
+            }
+            self.fills.append(fill)
+            if client_id is not None:
+                self._by_client_id[client_id] = fill
+            return fill
+
+    def check_limits(self, current_price, symbol, atr=None):
+        return None
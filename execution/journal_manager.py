@@ -1,7 +1,22 @@
-import csv
-import os
-
 from config.settings import JOURNAL_CONFIG
+from utils import latency
+from utils.log_index import parse_money, parse_timestamp
+from utils.write_behind import get_log
+
+JOURNAL_FIELDS = [
+    "Ticket",
+    "Symbol",
+    "Direction",
+    "Size",
+    "Entry Price",
+    "Exit Price",
+    "PnL",
+    "Strategy",
+    "Regime",
+    "Sentiment",
+    "Entry Time",
+    "Exit Time",
+]
 
 
 class JournalManager:
@@ -14,39 +29,57 @@ class JournalManager:
 
     @staticmethod
     def log_trade(trade_data):
+        """Queues the row on the journal's write-behind log; no file I/O on the order path."""
         if not JOURNAL_CONFIG["enabled"]:
             return
 
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(JournalManager.FILE_PATH), exist_ok=True)
-        file_exists = os.path.isfile(JournalManager.FILE_PATH)
-
-        with open(JournalManager.FILE_PATH, mode="a", newline="") as file:
-            fieldnames = [
-                "Ticket",
-                "Symbol",
-                "Direction",
-                "Size",
-                "Entry Price",
-                "Exit Price",
-                "PnL",
-                "Strategy",
-                "Regime",
-                "Sentiment",
-                "Entry Time",
-                "Exit Time",
-            ]
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-
-            if not file_exists:
-                writer.writeheader()
-
-            # Safe row construction
-            row = {k: trade_data.get(k, "N/A") for k in fieldnames}
+        with latency.timer("journal"):
+            # Safe row construction ("Exit Time" or the broker's "exit_time")
+            row = {
+                k: trade_data.get(k, trade_data.get(k.lower().replace(" ", "_"), "N/A"))
+                for k in JOURNAL_FIELDS
+            }
 
             # Format PnL
             if isinstance(row["PnL"], (int, float)):
                 row["PnL"] = f"${row['PnL']:.2f}"
 
-            writer.writerow(row)
-            print(f"   📓 JOURNAL: Trade #{row['Ticket']} logged.")
+            JournalManager.get_log().write_row([row[k] for k in JOURNAL_FIELDS])
+        print(f"   📓 JOURNAL: Trade #{row['Ticket']} logged.")
+
+    @staticmethod
+    def get_log():
+        return get_log(
+            JournalManager.FILE_PATH,
+            header=JOURNAL_FIELDS,
+            policy=JOURNAL_CONFIG.get("backpressure", "spill"),
+            maxsize=JOURNAL_CONFIG.get("queue_size", 10_000),
+            index=JournalManager.index_key,
+        )
+
+    @staticmethod
+    def index_key(row):
+        """(exit or entry time, PnL) for the sidecar index; None for the header."""
+        record = dict(zip(JOURNAL_FIELDS, row, strict=False))
+        ts = parse_timestamp(record.get("Exit Time")) or parse_timestamp(record.get("Entry Time"))
+        if ts is None:
+            return None
+        return ts, parse_money(record.get("PnL"))
+
+    @staticmethod
+    def get_index():
+        """Index of the journal, current up to everything queued so far."""
+        log = JournalManager.get_log()
+        log.flush()
+        return log.index
+
+    @staticmethod
+    def read_trades(start=None, end=None, limit=None):
+        """Journal rows as dicts: the last `limit`, or those closed in [start, end)."""
+        index = JournalManager.get_index()
+        entries = index.tail(limit) if limit else index.between(start, end)
+        return [dict(zip(JOURNAL_FIELDS, row, strict=False)) for row in index.read_rows(entries)]
+
+    @staticmethod
+    def flush(durable=True):
+        JournalManager.get_log().flush(durable=durable)
@@ -0,0 +1,218 @@
+import json
+from datetime import datetime
+
+from utils.time_utils import get_local_now
+
+# Event types
+ORDER_PLACED = "ORDER_PLACED"
+ORDER_CANCELLED = "ORDER_CANCELLED"
+ORDER_REPLACED = "ORDER_REPLACED"  # new limit_price / qty for a resting order
+ORDER_FILLED = "ORDER_FILLED"
+POSITION_CLOSED = "POSITION_CLOSED"  # reason: SL_HIT / TP_HIT / CLOSE; qty < size = partial
+EQUITY_ADJUSTED = "EQUITY_ADJUSTED"
+
+DEFAULT_EQUITY = 500000.0
+QTY_EPSILON = 1e-9  # A close within this of the open size closes the position
+# Position fields added after the first events were written (same defaults as the columns)
+POSITION_DEFAULTS = {"strategy": None, "trail": 0.0, "atr_mult": 0.0}
+
+
+def empty_state():
+    return {
+        "account": {"equity": DEFAULT_EQUITY, "balance": DEFAULT_EQUITY},
+        "positions": {},
+        "orders": {},
+        "last_exit": {},
+    }
+
+
+def apply_event(state, event_type, payload, ts):
+    """
+    The one place broker state changes. The live cache and every replay
+    (startup, point-in-time audit) run the same reducer, so they cannot disagree.
+    """
+    if event_type == ORDER_PLACED:
+        state["orders"][payload["order_id"]] = dict(payload)
+    elif event_type == ORDER_CANCELLED:
+        state["orders"].pop(payload["order_id"], None)
+    elif event_type == ORDER_REPLACED:
+        order = state["orders"].get(payload["order_id"])
+        if order is not None:
+            order["limit_price"], order["qty"] = payload["limit_price"], payload["qty"]
+    elif event_type == ORDER_FILLED:
+        state["positions"][payload["id"]] = {**POSITION_DEFAULTS, **payload}
+    elif event_type == POSITION_CLOSED:
+        positions = state["positions"]
+        position_id = payload.get("position_id")
+        if position_id is None:
+            # Events written before positions were keyed by id close the whole symbol
+            for pid in [p for p, pos in positions.items() if pos["symbol"] == payload["symbol"]]:
+                del positions[pid]
+        else:
+            position = positions.get(position_id)
+            qty = payload.get("qty")
+            if position is not None and qty is not None and qty < position["qty"] - QTY_EPSILON:
+                position["qty"] = position["qty"] - qty  # same arithmetic as the SQL UPDATE
+            else:
+                positions.pop(position_id, None)
+        state["last_exit"][payload["symbol"]] = payload.get("exit_time", ts)
+    elif event_type == EQUITY_ADJUSTED:
+        state["account"]["equity"] = payload["equity"]
+        if payload.get("balance"):
+            state["account"]["balance"] = payload["balance"]
+    else:
+        raise ValueError(f"Unknown ledger event '{event_type}'")
+    return state
+
+
+def _encode_state(state):
+    return json.dumps(state, separators=(",", ":"))
+
+
+def _decode_state(text):
+    state = json.loads(text)
+    # JSON object keys are strings; order and position ids are integers.
+    # Snapshots from before multi-position support keyed positions by symbol.
+    state["orders"] = {int(k): v for k, v in state["orders"].items()}
+    state["positions"] = {
+        int(pos["id"]): {**POSITION_DEFAULTS, **pos} for pos in state["positions"].values()
+    }
+    return state
+
+
+class PaperLedger:
+    """
+    Protocol 9.4: Event-Sourced Paper Ledger.
+    An append-only log of broker events in bot_state.db plus periodic compact
+    snapshots. Startup = latest snapshot + the events after it (at most
+    `snapshot_every`), so it costs the same after ten trades or ten million.
+    Any past state can be rebuilt with `state_at` for auditing.
+    Appends use the DBManager's connection, so they commit (or roll back)
+    together with the table write-through they describe.
+    """
+
+    def __init__(self, db, snapshot_every=500):
+        self.db = db
+        self.snapshot_every = snapshot_every
+        self._init_tables()
+        self.last_seq = self._max_seq()
+        self.last_ts = None
+        self.last_snapshot_seq = self._latest_snapshot_seq()
+
+    def _init_tables(self):
+        with self.db.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ledger_events (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    ts TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    payload TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ledger_snapshots (
+                    seq INTEGER PRIMARY KEY,
+                    ts TEXT NOT NULL,
+                    state TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ledger_events_ts ON ledger_events(ts)")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_ledger_snapshots_ts ON ledger_snapshots(ts)"
+            )
+
+    def _max_seq(self):
+        row = self.db._get_conn().execute("SELECT MAX(seq) FROM ledger_events").fetchone()
+        return row[0] or 0
+
+    def _latest_snapshot_seq(self):
+        row = self.db._get_conn().execute("SELECT MAX(seq) FROM ledger_snapshots").fetchone()
+        return row[0]
+
+    # --- WRITES ---
+
+    def append(self, event_type, payload, ts=None):
+        """Appends one event; call inside `db.transaction()` with the matching table write."""
+        ts = ts or get_local_now().isoformat()
+        cursor = self.db._get_conn().execute(
+            "INSERT INTO ledger_events (ts, type, payload) VALUES (?, ?, ?)",
+            (ts, event_type, json.dumps(payload, separators=(",", ":"))),
+        )
+        self.last_seq, self.last_ts = cursor.lastrowid, ts
+        return self.last_seq, ts
+
+    def snapshot_due(self):
+        base = self.last_snapshot_seq or 0
+        return self.last_seq - base >= self.snapshot_every
+
+    def snapshot(self, state, ts=None):
+        """Stores `state` as of the last appended event (stamped with that event's time)."""
+        ts = ts or self.last_ts or get_local_now().isoformat()
+        self.db._get_conn().execute(
+            "INSERT OR REPLACE INTO ledger_snapshots (seq, ts, state) VALUES (?, ?, ?)",
+            (self.last_seq, ts, _encode_state(state)),
+        )
+        self.last_snapshot_seq = self.last_seq
+
+    # --- READS ---
+
+    def _snapshot_before(self, seq=None, ts=None):
+        sql, params = "SELECT seq, state FROM ledger_snapshots", ()
+        if seq is not None:
+            sql, params = sql + " WHERE seq <= ?", (seq,)
+        elif ts is not None:
+            sql, params = sql + " WHERE ts <= ?", (ts,)
+        row = self.db._get_conn().execute(sql + " ORDER BY seq DESC LIMIT 1", params).fetchone()
+        if row is None:
+            return 0, empty_state()
+        return row[0], _decode_state(row[1])
+
+    def events(self, after_seq=0, until_seq=None, until_ts=None):
+        """Yields (seq, ts, type, payload) in log order."""
+        sql, params = "SELECT seq, ts, type, payload FROM ledger_events WHERE seq > ?", [after_seq]
+        if until_seq is not None:
+            sql += " AND seq <= ?"
+            params.append(until_seq)
+        if until_ts is not None:
+            sql += " AND ts <= ?"
+            params.append(until_ts)
+        for seq, ts, event_type, payload in self.db._get_conn().execute(
+            sql + " ORDER BY seq", params
+        ):
+            yield seq, ts, event_type, json.loads(payload)
+
+    def position(self):
+        """Append cursor, saved/restored by callers that roll back."""
+        return self.last_seq, self.last_ts, self.last_snapshot_seq
+
+    def rewind(self, position):
+        self.last_seq, self.last_ts, self.last_snapshot_seq = position
+
+    def has_snapshot(self):
+        return self.last_snapshot_seq is not None
+
+    def load(self):
+        """Latest state: newest snapshot + the tail of the log behind it."""
+        return self.state_at()
+
+    def state_at(self, when=None):
+        """
+        State after event `when` (int seq) or as of timestamp `when`
+        (datetime/ISO string); None means now.
+        """
+        if isinstance(when, int):
+            base_seq, state = self._snapshot_before(seq=when)
+            tail = self.events(base_seq, until_seq=when)
+        elif when is not None:
+            ts = when.isoformat() if isinstance(when, datetime) else str(when)
+            base_seq, state = self._snapshot_before(ts=ts)
+            tail = self.events(base_seq, until_ts=ts)
+        else:
+            base_seq, state = self._snapshot_before()
+            tail = self.events(base_seq)
+        for _, ts, event_type, payload in tail:
+            apply_event(state, event_type, payload, ts)
+        return state
+
+    def equity_at(self, when):
+        return self.state_at(when)["account"]["equity"]
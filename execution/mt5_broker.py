@@ -11,6 +11,7 @@ class MT5Broker(BrokerInterface):
         import MetaTrader5 as mt5
 
         from execution.base_broker import BrokerInterface
+        from utils import latency
         from utils.notifier import TelegramNotifier
 
         class MT5Broker(BrokerInterface):
@@ -33,10 +34,11 @@ class MT5Broker(BrokerInterface):
                 self.connected = True
                 return True
 
-            def get_positions(self):
+            def get_positions(self, symbol=None):
                 """
                 Protocol 6.1: Reconciliation.
-                Reads live positions from MT5 and standardizes them for the bot.
+                Reads every live position and pending order from MT5 (one
+                symbol, or all) and standardizes them for the bot.
                 """
                 if not self.connected:
                     self._connect()
@@ -44,18 +46,14 @@ class MT5Broker(BrokerInterface):
                 # 1. Get Account Info
                 account_info = mt5.account_info()
                 if account_info is None:
-                    return {"equity": 0.0, "position": "FLAT", "orders": []}
+                    return {"equity": 0.0, "position": "FLAT", "positions": [], "orders": []}
 
-                equity = account_info.equity
+                # 2. Open Positions and Pending Orders
+                raw_positions = mt5.positions_get(symbol=symbol) if symbol else mt5.positions_get()
+                raw_orders = mt5.orders_get(symbol=symbol) if symbol else mt5.orders_get()
 
-                # 2. Get Open Positions (Only for our Symbol)
-                # Assuming single symbol architecture for now
-                positions = mt5.positions_get(symbol="XAUUSD")
-
-                pos_data = "FLAT"
-                if positions and len(positions) > 0:
-                    p = positions[0]
-                    pos_data = {
+                positions = [
+                    {
                         "symbol": p.symbol,
                         "type": "LONG" if p.type == mt5.ORDER_TYPE_BUY else "SHORT",
                         "qty": p.volume,
@@ -64,11 +62,30 @@ class MT5Broker(BrokerInterface):
                         "tp": p.tp,
                         "ticket": p.ticket,
                     }
+                    for p in raw_positions or ()
+                ]
+                buys = (mt5.ORDER_TYPE_BUY_LIMIT, mt5.ORDER_TYPE_BUY_STOP)
+                limits = (mt5.ORDER_TYPE_BUY_LIMIT, mt5.ORDER_TYPE_SELL_LIMIT)
+                orders = [
+                    {
+                        "symbol": o.symbol,
+                        "action": 1 if o.type in buys else 2,
+                        "type": "LIMIT" if o.type in limits else "STOP",
+                        "limit_price": o.price_open,
+                        "qty": o.volume_current,
+                        "sl": o.sl,
+                        "tp": o.tp,
+                        "ticket": o.ticket,
+                    }
+                    for o in raw_orders or ()
+                ]
 
                 return {
-                    "equity": equity,
-                    "position": pos_data,
-                    "orders": [],  # Not parsing pending orders for this simplified version
+                    "equity": account_info.equity,
+                    # Oldest open position, for single-position callers
+                    "position": positions[0] if positions else "FLAT",
+                    "positions": positions,
+                    "orders": orders,
                 }
 
             def place_order(self, action, symbol, price, qty, **kwargs):
@@ -108,26 +125,22 @@ class MT5Broker(BrokerInterface):
 
                 # Send
                 print(f"   📤 SENDING TO MT5: {symbol} {qty} lots @ {price}")
+                latency.mark("submit")
                 result = mt5.order_send(request)
+                latency.mark("ack")
 
                 if result.retcode != mt5.TRADE_RETCODE_DONE:
                     print(f"   ❌ MT5 ERROR: {result.comment} (Code: {result.retcode})")
-                    import asyncio
-
-                    asyncio.run(
-                        TelegramNotifier.send_message(f"⚠️ *EXECUTION FAILED*\n{result.comment}")
-                    )
+                    TelegramNotifier.notify(f"⚠️ *EXECUTION FAILED*\n{result.comment}")
                     return False
 
                 print(f"   ✅ FILLED: Ticket #{result.order}")
+                latency.mark("fill")  # a DEAL is filled when order_send returns DONE
+                latency.finish()
 
                 # Telemetry
                 msg = "OPEN LONG" if action == 1 else "OPEN SHORT"
-                import asyncio
-
-                asyncio.run(
-                    TelegramNotifier.send_message(
-                        f"🚀 *{msg}*\nSize: {qty}\nSL: {sl}\nTicket: {result.order}"
-                    )
+                TelegramNotifier.notify(
+                    f"🚀 *{msg}*\nSize: {qty}\nSL: {sl}\nTicket: {result.order}"
                 )
                 return True
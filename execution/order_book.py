@@ -0,0 +1,156 @@
+import heapq
+
+BUY, SELL = 1, 2
+COMPACT_MIN = 1024  # Stale heap entries tolerated before a rebuild
+
+
+def triggers_below(action, kind):
+    """Buy limits and sell stops fire when price falls to them; the rest when it rises."""
+    return (action == BUY) == (kind == "LIMIT")
+
+
+class OrderBook:
+    """
+    Protocol 2.4: Price-Indexed Order Book.
+    Resting orders per symbol in two heaps keyed by trigger price: one for
+    orders that fire when price falls to them (buy limits, sell stops;
+    highest on top) and one for orders that fire when it rises (sell limits,
+    buy stops; lowest on top). A tick only pops the orders it crosses, so
+    thousands of resting orders cost O(1) on a quiet tick. Cancel is lazy
+    (the dead entry is skipped when it surfaces) and replace pushes a fresh
+    entry, both O(log n). Entries linked as OCO cancel each other when
+    either one triggers.
+    """
+
+    def __init__(self):
+        self._below = {}  # symbol -> heap of (-price, seq, entry_id)
+        self._above = {}  # symbol -> heap of (price, seq, entry_id)
+        self._live = {}  # entry_id -> {"symbol", "action", "kind", "price", "seq"}
+        self._oco = {}  # entry_id -> linked entry_id
+        self._seq = 0
+        self._stale = 0
+
+    def __len__(self):
+        return len(self._live)
+
+    def __contains__(self, entry_id):
+        return entry_id in self._live
+
+    def get(self, entry_id):
+        entry = self._live.get(entry_id)
+        return dict(entry) if entry else None
+
+    # --- MUTATIONS ---
+
+    def add(self, entry_id, symbol, action, kind, price, oco=None):
+        """Rests `entry_id` (any hashable) at `price`; kind is "LIMIT" or "STOP"."""
+        if entry_id in self._live:
+            self.cancel(entry_id)
+        self._seq += 1
+        entry = {"symbol": symbol, "action": action, "kind": kind, "price": price, "seq": self._seq}
+        self._live[entry_id] = entry
+        self._push(entry_id, entry)
+        if oco is not None:
+            self.link(entry_id, oco)
+
+    def _push(self, entry_id, entry):
+        if triggers_below(entry["action"], entry["kind"]):
+            heap = self._below.setdefault(entry["symbol"], [])
+            heapq.heappush(heap, (-entry["price"], entry["seq"], entry_id))
+        else:
+            heap = self._above.setdefault(entry["symbol"], [])
+            heapq.heappush(heap, (entry["price"], entry["seq"], entry_id))
+
+    def link(self, first, second):
+        """One-cancels-other: when either triggers (or is cancelled) the other goes too."""
+        self._oco[first] = second
+        self._oco[second] = first
+
+    def cancel(self, entry_id):
+        """Removes the entry and its OCO partner. Returns False if it was not resting."""
+        entry = self._live.pop(entry_id, None)
+        if entry is None:
+            return False
+        self._stale += 1
+        partner = self._oco.pop(entry_id, None)
+        if partner is not None:
+            self._oco.pop(partner, None)
+            if self._live.pop(partner, None) is not None:
+                self._stale += 1
+        self._maybe_compact()
+        return True
+
+    def replace(self, entry_id, price):
+        """Moves a resting entry to a new trigger price, keeping its OCO link."""
+        entry = self._live.get(entry_id)
+        if entry is None:
+            return False
+        self._seq += 1
+        entry["price"], entry["seq"] = price, self._seq
+        self._stale += 1
+        self._push(entry_id, entry)
+        self._maybe_compact()
+        return True
+
+    def _maybe_compact(self):
+        if self._stale < max(COMPACT_MIN, len(self._live)):
+            return
+        below, above = {}, {}
+        for entry_id, entry in self._live.items():
+            if triggers_below(entry["action"], entry["kind"]):
+                below.setdefault(entry["symbol"], []).append(
+                    (-entry["price"], entry["seq"], entry_id)
+                )
+            else:
+                above.setdefault(entry["symbol"], []).append(
+                    (entry["price"], entry["seq"], entry_id)
+                )
+        for heap in (*below.values(), *above.values()):
+            heapq.heapify(heap)
+        self._below, self._above, self._stale = below, above, 0
+
+    # --- MATCHING ---
+
+    def _pop_crossed(self, heap, crossed):
+        """Pops live entries from the top of `heap` while `crossed(price)` holds."""
+        fired = []
+        while heap:
+            _, seq, entry_id = heap[0]
+            entry = self._live.get(entry_id)
+            if entry is None or entry["seq"] != seq:
+                heapq.heappop(heap)  # cancelled or replaced
+                self._stale -= 1
+                continue
+            if not crossed(entry["price"]):
+                break
+            heapq.heappop(heap)
+            fired.append((entry_id, entry["price"]))
+        return fired
+
+    def crossed(self, symbol, price):
+        """
+        Pops every entry in `symbol` that `price` crosses, nearest trigger
+        first, as (entry_id, trigger_price). OCO partners of the popped
+        entries are cancelled.
+        """
+        fired = []
+        below = self._below.get(symbol)
+        if below:
+            fired += self._pop_crossed(below, lambda p: price <= p)
+        above = self._above.get(symbol)
+        if above:
+            fired += self._pop_crossed(above, lambda p: price >= p)
+
+        triggered = []
+        fired_ids = {entry_id for entry_id, _ in fired}
+        for entry_id, trigger_price in fired:
+            if entry_id not in self._live:
+                continue  # OCO partner fired earlier in this tick
+            del self._live[entry_id]
+            partner = self._oco.pop(entry_id, None)
+            if partner is not None:
+                self._oco.pop(partner, None)
+                if self._live.pop(partner, None) is not None and partner not in fired_ids:
+                    self._stale += 1
+            triggered.append((entry_id, trigger_price))
+        return triggered
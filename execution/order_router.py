@@ -0,0 +1,243 @@
+import asyncio
+import inspect
+import logging
+import random
+import time
+import uuid
+
+from config.settings import EXECUTION_CONFIG
+from utils.exceptions import BrokerConnectionError
+from utils.time_utils import run_in_thread
+
+logger = logging.getLogger(__name__)
+
+# Order states
+QUEUED = "QUEUED"
+SUBMITTING = "SUBMITTING"
+RETRYING = "RETRYING"
+ACCEPTED = "ACCEPTED"  # broker returned a truthy result (fill, ticket or order id)
+REJECTED = "REJECTED"  # broker answered no (False/None): never retried
+FAILED = "FAILED"  # retries exhausted, or a non-retryable error
+UNKNOWN = "UNKNOWN"  # timed out at a broker that cannot dedupe: may have traded, reconcile
+FINAL_STATES = (ACCEPTED, REJECTED, FAILED, UNKNOWN)
+
+# Transport trouble worth another attempt; anything else is a bug or a bad order
+RETRYABLE = (BrokerConnectionError, ConnectionError, TimeoutError, OSError)
+
+
+def new_key():
+    """Client-generated idempotency key for one logical order."""
+    return uuid.uuid4().hex
+
+
+def _accepts_key(place_order):
+    """Whether the broker's place_order can be handed `client_order_id`."""
+    try:
+        params = inspect.signature(place_order).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(p.kind is p.VAR_KEYWORD or p.name == "client_order_id" for p in params)
+
+
+def _dedupes(broker):
+    """
+    Whether a resubmission with the same `client_order_id` is safe: the
+    broker says so, or names the parameter. Taking it through **kwargs
+    proves nothing (PaperBroker and MT5Broker ignore it).
+    """
+    if getattr(broker, "supports_client_order_id", False):
+        return True
+    try:
+        return "client_order_id" in inspect.signature(broker.place_order).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+class OrderRouter:
+    """
+    Protocol 7.6: Async Order Router.
+    `submit()` queues an order and returns at once; each broker has its own
+    queue and worker tasks that call its (blocking) place_order in a thread
+    with a deadline, so a slow or hung broker only delays its own orders
+    and never the strategy loop or other symbols' brokers. Every order has a
+    client idempotency key: submitting the same key twice returns the
+    tracked order instead of trading again, and retries pass it to the
+    broker as `client_order_id` so a venue that already took the order can
+    dedupe it. Transport errors are retried a bounded number of times with
+    full-jitter exponential backoff; a rejection is final. A timed-out call
+    keeps running in its thread and may still trade, so a timeout is only
+    retried at a broker that dedupes; elsewhere the order ends UNKNOWN and
+    is left for the Reconciler instead of being sent again.
+    """
+
+    def __init__(
+        self,
+        brokers,
+        workers=None,
+        max_retries=None,
+        backoff=None,
+        timeout=None,
+        seed=None,
+    ):
+        self.brokers = dict(brokers)
+        self.workers = workers or EXECUTION_CONFIG["order_workers"]
+        self.max_retries = EXECUTION_CONFIG["order_retries"] if max_retries is None else max_retries
+        self.backoff = backoff or EXECUTION_CONFIG["order_backoff_s"]  # (base, cap)
+        self.timeout = timeout or EXECUTION_CONFIG["order_timeout_s"]
+        self.rng = random.Random(seed)
+        self.orders = {}  # key -> order state dict
+        self._done = {}  # key -> asyncio.Future resolved with the final order
+        self._queues = {}
+        self._tasks = []
+        self._takes_key = {name: _accepts_key(b.place_order) for name, b in self.brokers.items()}
+        self._dedupes = {name: _dedupes(b) for name, b in self.brokers.items()}
+
+    # --- LIFECYCLE ---
+
+    async def start(self):
+        if self._tasks:
+            return self
+        for name in self.brokers:
+            queue = self._queues[name] = asyncio.Queue()
+            self._tasks += [
+                asyncio.create_task(self._worker(name, queue), name=f"router:{name}:{i}")
+                for i in range(self.workers)
+            ]
+        return self
+
+    async def stop(self, drain=True):
+        """Stops the workers, after the queued orders are done if `drain`."""
+        if drain:
+            await asyncio.gather(*(queue.join() for queue in self._queues.values()))
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop(drain=exc[0] is None)
+
+    # --- SUBMISSION / TRACKING ---
+
+    async def submit(self, broker, *args, key=None, **kwargs):
+        """
+        Queues `broker.place_order(*args, **kwargs)` and returns the tracked
+        order dict at once; a `key` already seen returns that order instead.
+        BrokerInterface brokers take (action, symbol, price, qty, **kwargs).
+        """
+        if broker not in self.brokers:
+            raise KeyError(f"No broker '{broker}' in the router")
+        key = key or new_key()
+        if key in self.orders:
+            return self.orders[key]
+        await self.start()
+        order = {
+            "key": key,
+            "broker": broker,
+            # BrokerInterface passes the symbol second; connectors take symbol=
+            "symbol": kwargs.get("symbol", args[1] if len(args) > 1 else None),
+            "args": args,
+            "kwargs": kwargs,
+            "state": QUEUED,
+            "attempts": 0,
+            "result": None,
+            "error": None,
+            "queued_at": time.perf_counter(),
+            "latency_ms": None,
+        }
+        self.orders[key] = order
+        self._done[key] = asyncio.get_running_loop().create_future()
+        self._queues[broker].put_nowait(key)
+        return order
+
+    def get(self, key):
+        return self.orders.get(key)
+
+    async def wait(self, key, timeout=None):
+        """The order once it reaches ACCEPTED / REJECTED / FAILED / UNKNOWN."""
+        return await asyncio.wait_for(asyncio.shield(self._done[key]), timeout)
+
+    def pending(self, broker=None):
+        return [
+            order
+            for order in self.orders.values()
+            if order["state"] not in FINAL_STATES and broker in (None, order["broker"])
+        ]
+
+    # --- WORKERS ---
+
+    def _backoff(self, attempt):
+        base, cap = self.backoff
+        return self.rng.uniform(0, min(cap, base * 2**attempt))
+
+    async def _worker(self, name, queue):
+        broker = self.brokers[name]
+        while True:
+            key = await queue.get()
+            try:
+                await self._execute(name, broker, self.orders[key])
+            except Exception as e:  # never let one order kill the worker
+                logger.exception(f"Router {name}: order {key} crashed")
+                self._finish(self.orders[key], FAILED, error=repr(e))
+            finally:
+                queue.task_done()
+
+    async def _execute(self, name, broker, order):
+        args, kwargs = order["args"], dict(order["kwargs"])
+        if self._takes_key[name]:
+            kwargs["client_order_id"] = order["key"]
+
+        while True:
+            order["attempts"] += 1
+            order["state"] = SUBMITTING
+            try:
+                result = await asyncio.wait_for(
+                    run_in_thread(broker.place_order, *args, **kwargs), self.timeout
+                )
+            except TimeoutError as e:
+                if not self._dedupes[name]:
+                    logger.warning(
+                        f"Router {name}: {order['symbol']} timed out after {self.timeout}s "
+                        "and the broker cannot dedupe; not resending, reconcile it"
+                    )
+                    self._finish(order, UNKNOWN, error=repr(e))
+                    return
+                if not await self._retry(name, order, e):
+                    return
+                continue
+            except RETRYABLE as e:
+                if not await self._retry(name, order, e):
+                    return
+                continue
+            except Exception as e:
+                self._finish(order, FAILED, error=repr(e))
+                return
+            self._finish(order, ACCEPTED if result else REJECTED, result=result)
+            return
+
+    async def _retry(self, name, order, error):
+        """Backs off before the next attempt; False (order FAILED) once retries are spent."""
+        if order["attempts"] > self.max_retries:
+            self._finish(order, FAILED, error=repr(error))
+            return False
+        order["state"], order["error"] = RETRYING, repr(error)
+        delay = self._backoff(order["attempts"] - 1)
+        logger.warning(
+            f"Router {name}: {order['symbol']} attempt {order['attempts']} failed "
+            f"({error!r}); retrying in {delay:.2f}s"
+        )
+        await asyncio.sleep(delay)
+        return True
+
+    def _finish(self, order, state, result=None, error=None):
+        order["state"] = state
+        order["result"] = result
+        if error is not None:
+            order["error"] = error
+        order["latency_ms"] = round((time.perf_counter() - order["queued_at"]) * 1000, 3)
+        done = self._done[order["key"]]
+        if not done.done():
+            done.set_result(order)
@@ -0,0 +1,311 @@
+import asyncio
+import logging
+
+from config.settings import EXECUTION_CONFIG
+from utils.time_utils import get_local_now
+
+logger = logging.getLogger(__name__)
+
+# Discrepancy types (the broker is the source of truth)
+MISSING = "MISSING"  # in the ledger, gone at the broker
+ORPHANED = "ORPHANED"  # at the broker, unknown to the ledger
+SIZE_DRIFT = "SIZE_DRIFT"
+PRICE_DRIFT = "PRICE_DRIFT"
+RESOLVED = "RESOLVED"  # a previously reported discrepancy has cleared
+
+RECONCILED = "RECONCILED"  # strategy / close reason on auto-healed ledger rows
+
+_PRICE_KEYS = (
+    "entry_price",
+    "avg_entry",
+    "avg_entry_price",
+    "avg_fill_price",
+    "price_open",
+    "price",
+)
+
+
+def _side(item):
+    """LONG / SHORT from the field the broker uses ("type", "side", "action" or signed qty)."""
+    kind = str(item.get("type") or item.get("side") or "").upper()
+    if kind in ("LONG", "BUY"):
+        return "LONG"
+    if kind in ("SHORT", "SELL"):
+        return "SHORT"
+    if "action" in item:
+        return "LONG" if item["action"] == 1 else "SHORT"
+    return "SHORT" if float(item.get("qty") or 0) < 0 else "LONG"
+
+
+def _price(item):
+    for key in _PRICE_KEYS:
+        if item.get(key) is not None:
+            return float(item[key])
+    return 0.0
+
+
+def index_positions(positions):
+    """{(symbol, side): {"qty", "avg_entry"}}, netting every position of a key together."""
+    index = {}
+    for pos in positions:
+        qty = abs(float(pos.get("qty", pos.get("volume")) or 0))
+        if qty <= 0:
+            continue
+        entry = index.setdefault((pos["symbol"], _side(pos)), {"qty": 0.0, "cost": 0.0})
+        entry["qty"] += qty
+        entry["cost"] += qty * _price(pos)
+    return {
+        key: {"qty": entry["qty"], "avg_entry": entry["cost"] / entry["qty"]}
+        for key, entry in index.items()
+    }
+
+
+def index_orders(orders):
+    """{(symbol, side, type, price): {"qty"}}: venues and the ledger number orders differently."""
+    index = {}
+    for order in orders:
+        price = order.get("limit_price", order.get("price")) or 0.0
+        kind = str(order.get("type") or "LIMIT").upper()
+        key = (order["symbol"], _side(order), kind, round(float(price), 6))
+        entry = index.setdefault(key, {"qty": 0.0})
+        entry["qty"] += abs(float(order.get("qty") or 0))
+    return index
+
+
+def split_snapshot(snapshot):
+    """(positions, orders) lists from any broker's get_positions() result."""
+    if isinstance(snapshot, dict):
+        positions = snapshot.get("positions")
+        if positions is None:
+            position = snapshot.get("position")
+            positions = [position] if isinstance(position, dict) else []
+        return positions, snapshot.get("orders") or []
+    return list(snapshot or []), []
+
+
+class Reconciler:
+    """
+    Protocol 7.7: Broker Reconciliation.
+    Snapshots every broker concurrently (each get_positions() runs in a
+    thread under a deadline, so one slow venue never holds up the rest),
+    indexes broker and ledger positions by (symbol, side) and resting orders
+    by (symbol, side, type, price), and diffs the two indexes key by key.
+    Only changes are emitted: a discrepancy is reported when it appears or
+    changes and once more as RESOLVED when it clears. A broker whose
+    snapshot and ledger are both unchanged since the last pass is not
+    diffed at all, so a quiet pass costs one dict comparison per broker.
+    With `auto_heal` the ledger is brought in line with the broker.
+    """
+
+    def __init__(
+        self,
+        brokers,
+        ledgers,
+        interval=None,
+        timeout=None,
+        qty_tolerance=None,
+        price_tolerance=None,
+        auto_heal=None,
+        on_delta=None,
+    ):
+        self.brokers = dict(brokers)
+        self.ledgers = dict(ledgers)  # name -> BrokerStateCache mirroring that broker
+        self.interval = interval or EXECUTION_CONFIG["reconcile_interval_s"]
+        self.timeout = timeout or EXECUTION_CONFIG["reconcile_timeout_s"]
+        self.qty_tolerance = (
+            EXECUTION_CONFIG["reconcile_qty_tol"] if qty_tolerance is None else qty_tolerance
+        )
+        self.price_tolerance = (
+            EXECUTION_CONFIG["reconcile_price_tol_pct"]
+            if price_tolerance is None
+            else price_tolerance
+        )
+        self.auto_heal = EXECUTION_CONFIG["reconcile_auto_heal"] if auto_heal is None else auto_heal
+        self.on_delta = on_delta
+        self.open = {}  # (broker, kind, key) -> current discrepancy
+        self._seen = {}  # broker -> (ledger version, broker indexes) of the last diff
+        self._task = None
+
+    # --- SNAPSHOTS ---
+
+    async def _fetch(self, name):
+        try:
+            return await asyncio.wait_for(
+                asyncio.to_thread(self.brokers[name].get_positions), self.timeout
+            )
+        except Exception as e:
+            logger.warning(f"Reconcile {name}: snapshot failed ({e!r}); skipped this pass")
+            return None
+
+    async def snapshot(self):
+        """{broker: get_positions() result}, fetched concurrently; failed brokers are left out."""
+        names = list(self.brokers)
+        results = await asyncio.gather(*(self._fetch(name) for name in names))
+        return {
+            name: result for name, result in zip(names, results, strict=True) if result is not None
+        }
+
+    # --- DIFF ---
+
+    def _ledger_indexes(self, ledger):
+        positions = ledger.get_positions()
+        orders = [order for order in ledger.get_orders() if order.get("type") in ("LIMIT", "STOP")]
+        return index_positions(positions), index_orders(orders)
+
+    def _compare(self, kind, local, remote):
+        found = {}
+        for key in local.keys() | remote.keys():
+            ours, theirs = local.get(key), remote.get(key)
+            if theirs is None:
+                found[key] = (MISSING, ours, None)
+            elif ours is None:
+                found[key] = (ORPHANED, None, theirs)
+            elif abs(ours["qty"] - theirs["qty"]) > self.qty_tolerance:
+                found[key] = (SIZE_DRIFT, ours, theirs)
+            elif (
+                kind == "position"
+                and abs(ours["avg_entry"] - theirs["avg_entry"])
+                > self.price_tolerance * theirs["avg_entry"]
+            ):
+                found[key] = (PRICE_DRIFT, ours, theirs)
+        return found
+
+    def diff(self, name, snapshot):
+        """Current discrepancies of one broker: {(kind, key): (issue, ledger, broker)}."""
+        ledger = self.ledgers[name]
+        positions, orders = split_snapshot(snapshot)
+        remote = (index_positions(positions), index_orders(orders))
+        version = ledger.ledger.position()[0]
+        if self._seen.get(name) == (version, remote):
+            return None  # nothing moved on either side
+        self._seen[name] = (version, remote)
+        local = self._ledger_indexes(ledger)
+        found = {}
+        for kind, ours, theirs in zip(("position", "order"), local, remote, strict=True):
+            for key, issue in self._compare(kind, ours, theirs).items():
+                found[(kind, key)] = issue
+        return found
+
+    def _deltas(self, name, found):
+        deltas = []
+        for (kind, key), (issue, ours, theirs) in found.items():
+            delta = {
+                "broker": name,
+                "kind": kind,
+                "key": key,
+                "issue": issue,
+                "ledger": ours,
+                "remote": theirs,
+            }
+            if self.open.get((name, kind, key)) != delta:
+                self.open[(name, kind, key)] = delta
+                deltas.append(delta)
+        for open_key in [k for k in self.open if k[0] == name and k[1:] not in found]:
+            cleared = self.open.pop(open_key)
+            deltas.append({**cleared, "issue": RESOLVED})
+        return deltas
+
+    # --- HEAL (the broker wins) ---
+
+    def heal(self, name, found):
+        """Applies the broker's view of `found` to the ledger in one transaction."""
+        ledger = self.ledgers[name]
+        with ledger.transaction():
+            for (kind, key), (issue, ours, theirs) in found.items():
+                if issue == PRICE_DRIFT:
+                    continue  # entry prices are history; report, never rewrite
+                have = ours["qty"] if ours else 0.0
+                want = theirs["qty"] if theirs else 0.0
+                if kind == "position":
+                    self._heal_position(ledger, key, have, want, ours, theirs)
+                else:
+                    self._heal_order(ledger, key, want)
+        self._seen.pop(name, None)  # re-diff next pass to confirm
+
+    def _heal_position(self, ledger, key, have, want, ours, theirs):
+        symbol, side = key
+        if want > have:
+            # Priced so the ledger's average entry comes out at the broker's
+            cost = want * theirs["avg_entry"] - (have * ours["avg_entry"] if ours else 0.0)
+            price = cost / (want - have) if cost > 0 else theirs["avg_entry"]
+            ledger.add_trade(None, symbol, side, want - have, price, 0.0, 0.0, strategy=RECONCILED)
+            return
+        excess = have - want
+        held = [pos for pos in ledger.get_positions(symbol) if pos["type"] == side]
+        for pos in reversed(held):  # newest first
+            if excess <= self.qty_tolerance:
+                break
+            qty = min(pos["qty"], excess)
+            ledger.close_position(pos["id"], pos["entry_price"], 0.0, qty=qty, reason=RECONCILED)
+            excess -= qty
+
+    def _heal_order(self, ledger, key, want):
+        symbol, side, kind, price = key
+        matches = [
+            order
+            for order in ledger.get_orders(symbol)
+            if _side(order) == side
+            and order.get("type") == kind
+            and round(float(order["limit_price"]), 6) == price
+        ]
+        for order in matches[1:] if want else matches:
+            ledger.remove_order(order["order_id"], reason=RECONCILED)
+        if not want:
+            return
+        if matches:
+            ledger.replace_order(matches[0]["order_id"], qty=want)
+        else:
+            ledger.add_order(
+                {
+                    "symbol": symbol,
+                    "action": 1 if side == "LONG" else 2,
+                    "limit_price": price,
+                    "qty": want,
+                    "sl": 0.0,
+                    "tp": 0.0,
+                    "type": kind,
+                    "date": get_local_now().isoformat(),
+                    "strategy": RECONCILED,
+                }
+            )
+
+    # --- PASSES ---
+
+    async def reconcile(self):
+        """One pass over every broker; returns the deltas (new, changed or RESOLVED)."""
+        deltas = []
+        for name, snapshot in (await self.snapshot()).items():
+            found = self.diff(name, snapshot)
+            if found is None:
+                continue
+            deltas += self._deltas(name, found)
+            if self.auto_heal and found:
+                self.heal(name, found)
+        for delta in deltas:
+            logger.warning(
+                f"Reconcile {delta['broker']}: {delta['issue']} {delta['kind']} {delta['key']} "
+                f"ledger={delta['ledger']} broker={delta['remote']}"
+            )
+        if deltas and self.on_delta:
+            self.on_delta(deltas)
+        return deltas
+
+    async def run(self):
+        """Reconciles every `interval` seconds until cancelled."""
+        while True:
+            try:
+                await self.reconcile()
+            except Exception:
+                logger.exception("Reconcile pass failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(), name="reconciler")
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,288 @@
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from config.settings import EXECUTION_CONFIG
+
+logger = logging.getLogger(__name__)
+
+BUY, SELL = 1, 2
+HOURS = 24
+
+
+def relative_volatility(df, window=14):
+    """
+    ATR / Close per bar: the frame's ATR column if it has one, else a rolling
+    true range (or, without High/Low, the rolling absolute close change).
+    """
+    cols = {c.lower(): c for c in df.columns}
+    close = df[cols["close"]].astype(float)
+    prev = close.shift(1).fillna(close)
+    if "atr" in cols:
+        atr = df[cols["atr"]].astype(float)
+    else:
+        if "high" in cols and "low" in cols:
+            high, low = df[cols["high"]].astype(float), df[cols["low"]].astype(float)
+            true_range = np.maximum(high, prev) - np.minimum(low, prev)
+        else:
+            true_range = (close - prev).abs()
+        atr = true_range.rolling(window, min_periods=1).mean()
+    return (atr / close).fillna(0.0).to_numpy()
+
+
+def bar_hours(df, time_col=None):
+    """UTC hour of each bar, from `time_col`, a usual timestamp column or the index (else noon)."""
+    if time_col is None:
+        names = ("timestamp", "datetime", "date", "time")
+        time_col = next((c for c in df.columns if str(c).lower() in names), None)
+    times = df[time_col] if time_col is not None else df.index
+    times = pd.to_datetime(pd.Series(times), errors="coerce")
+    return times.dt.hour.fillna(12).to_numpy(dtype=np.int64)
+
+
+class SlippageModel:
+    """
+    Protocol 5.2.3: Calibrated Execution Costs.
+    Spread and slippage as fractions of price in lookup tables indexed by
+    UTC hour, volatility bin (ATR / price) and size bin (lots):
+    `spread[hour, vol]`, `slip_mean[hour, vol, size]` and
+    `slip_std[hour, vol, size]`, a few KB of float32 that apply to any
+    quote currency. Prices follow the paper broker's convention: the quote
+    is the bid, a BUY pays spread + slippage above it and a SELL gives up
+    slippage below it. `execution_prices()` prices a whole batch of fills
+    with array indexing and one normal draw, so backtests, the RL
+    environment and the paper broker share one model at no per-fill Python
+    cost. `fit()` / `calibrate()` estimate the tables from fills joined to
+    tick history; cells with too few fills fall back to the overall mean
+    for their size bin.
+    """
+
+    def __init__(self, vol_edges, size_edges, spread, slip_mean, slip_std):
+        self.vol_edges = np.asarray(vol_edges, dtype=np.float64)
+        self.size_edges = np.asarray(size_edges, dtype=np.float64)
+        self.spread = np.asarray(spread, dtype=np.float32)
+        self.slip_mean = np.asarray(slip_mean, dtype=np.float32)
+        self.slip_std = np.asarray(slip_std, dtype=np.float32)
+
+    @classmethod
+    def default(cls):
+        """Uncalibrated prior: the paper broker's former $0.20 spread and ~$0.08 slippage on ~$2000."""
+        vol_edges = EXECUTION_CONFIG["slippage_vol_edges"]
+        size_edges = EXECUTION_CONFIG["slippage_size_edges"]
+        shape = (HOURS, len(vol_edges) + 1, len(size_edges) + 1)
+        return cls(
+            vol_edges,
+            size_edges,
+            np.full(shape[:2], EXECUTION_CONFIG["default_spread_pct"]),
+            np.full(shape, 4e-5),  # uniform($0.01, $0.15): mean $0.08, sd ~$0.04
+            np.full(shape, 2e-5),
+        )
+
+    # --- LOOKUP ---
+
+    def _cells(self, hours, vol, size):
+        h = np.asarray(hours, dtype=np.int64) % HOURS
+        v = np.searchsorted(self.vol_edges, np.asarray(vol, dtype=np.float64), side="right")
+        s = np.searchsorted(self.size_edges, np.asarray(size, dtype=np.float64), side="right")
+        return h, v, s
+
+    def costs(self, hours, vol, size):
+        """(spread, expected slippage, slippage sd) as fractions of price, for a batch."""
+        h, v, s = self._cells(hours, vol, size)
+        return self.spread[h, v], self.slip_mean[h, v, s], self.slip_std[h, v, s]
+
+    def execution_prices(self, prices, sides, hours, vol, size, rng=None):
+        """
+        Fill prices for a batch (arrays broadcast together). `sides` is 1 (BUY)
+        or 2 (SELL). With `rng` (numpy Generator) slippage is drawn around its
+        mean; without it the expected cost is used (deterministic backtests).
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        spread, slip, sd = self.costs(hours, vol, size)
+        if rng is not None:
+            slip = slip + sd * rng.standard_normal(np.shape(slip))
+        buy = np.asarray(sides) == BUY
+        return np.where(buy, prices * (1 + spread + slip), prices * (1 - slip))
+
+    def size_bin(self, size):
+        """Row of `price_table()` that prices a fill of `size` lots."""
+        return int(np.searchsorted(self.size_edges, float(size), side="right"))
+
+    def price_table(self, prices, sides, hours, vol):
+        """
+        Expected fill prices for every size bin, shape (size bins, bars), so a
+        loop that only learns the traded quantity at fill time picks
+        `table[size_bin(qty), i]` instead of pricing bar by bar.
+        """
+        sizes = np.concatenate(([0.0], self.size_edges))[:, None]  # one size inside each bin
+        prices, sides = np.asarray(prices)[None, :], np.asarray(sides)[None, ...]
+        hours, vol = np.asarray(hours)[None, :], np.asarray(vol)[None, :]
+        return self.execution_prices(prices, sides, hours, vol, sizes)
+
+    # --- CALIBRATION ---
+
+    @classmethod
+    def fit(
+        cls,
+        hours,
+        vol,
+        size,
+        slippage,
+        spread_hours,
+        spread_vol,
+        spread,
+        vol_edges=None,
+        size_edges=None,
+        min_samples=None,
+    ):
+        """
+        Tables from observed fills (slippage beyond the spread) and quotes
+        (bid/ask spread), both as fractions of price. Volatility bin edges default to the
+        quartiles of the fills' volatility.
+        """
+        min_samples = min_samples or EXECUTION_CONFIG["slippage_min_samples"]
+        vol = np.asarray(vol, dtype=np.float64)
+        if vol_edges is None:
+            vol_edges = np.quantile(vol, [0.25, 0.5, 0.75]) if len(vol) else [0.0]
+        size_edges = EXECUTION_CONFIG["slippage_size_edges"] if size_edges is None else size_edges
+        model = cls(vol_edges, size_edges, 0, 0, 0)
+        n_vol, n_size = len(model.vol_edges) + 1, len(model.size_edges) + 1
+
+        # Spread: mean per (hour, vol) cell, overall mean where a cell is thin
+        h, v, _ = model._cells(spread_hours, spread_vol, 0)
+        model.spread = cls._cell_means(
+            h * n_vol + v, np.asarray(spread, dtype=np.float64), HOURS * n_vol, min_samples
+        )[0].reshape(HOURS, n_vol)
+
+        # Slippage: mean and sd per (hour, vol, size), size-bin mean where thin
+        h, v, s = model._cells(hours, vol, size)
+        slippage = np.asarray(slippage, dtype=np.float64)
+        flat = (h * n_vol + v) * n_size + s
+        mean, sd = cls._cell_means(flat, slippage, HOURS * n_vol * n_size, min_samples, s, n_size)
+        model.slip_mean = mean.reshape(HOURS, n_vol, n_size)
+        model.slip_std = sd.reshape(HOURS, n_vol, n_size)
+        return model
+
+    @staticmethod
+    def _cell_means(cells, values, n_cells, min_samples, groups=None, n_groups=1):
+        """Per-cell mean / sd via bincount; thin cells take their group's (or the global) stats."""
+        count = np.bincount(cells, minlength=n_cells)
+        total = np.bincount(cells, values, minlength=n_cells)
+        squares = np.bincount(cells, values * values, minlength=n_cells)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+            sd = np.sqrt(np.maximum(squares / count - mean * mean, 0.0))
+
+        groups = np.zeros(len(cells), np.int64) if groups is None else groups
+        g_count = np.bincount(groups, minlength=n_groups)
+        g_total = np.bincount(groups, values, minlength=n_groups)
+        g_squares = np.bincount(groups, values * values, minlength=n_groups)
+        overall = values.mean() if len(values) else 0.0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            g_mean = np.where(g_count > 0, g_total / g_count, overall)
+            g_sd = np.sqrt(np.maximum(g_squares / g_count - g_mean * g_mean, 0.0))
+        g_sd = np.nan_to_num(g_sd)
+
+        thin = count < min_samples
+        cell_group = np.arange(n_cells) % n_groups
+        mean[thin] = g_mean[cell_group[thin]]
+        sd[thin] = g_sd[cell_group[thin]]
+        return mean.astype(np.float32), sd.astype(np.float32)
+
+    @classmethod
+    def calibrate(cls, fills, ticks, **kwargs):
+        """
+        Fits from fills (dicts with time, side, qty, price; see journal_fills)
+        joined as-of their time to tick history (TickStore rows: timestamp,
+        bid, ask, high, low, close). A BUY's slippage is fill - ask, a SELL's
+        bid - fill, relative to the bid.
+        """
+        quotes = pd.DataFrame(ticks)
+        quotes["timestamp"] = pd.to_datetime(quotes["timestamp"])
+        quotes = quotes.sort_values("timestamp").reset_index(drop=True)
+        bid = quotes["bid"].fillna(quotes["close"])
+        quotes["bid"] = bid
+        quotes["spread"] = ((quotes["ask"].fillna(bid) - bid) / bid).clip(lower=0)
+        quotes["vol"] = relative_volatility(quotes)
+
+        fills = pd.DataFrame(fills)
+        fills["time"] = pd.to_datetime(fills["time"], errors="coerce")
+        fills = fills.dropna(subset=["time"]).sort_values("time")
+        joined = pd.merge_asof(
+            fills, quotes, left_on="time", right_on="timestamp", direction="backward"
+        ).dropna(subset=["bid"])
+
+        buy = joined["side"].to_numpy() == BUY
+        fill_px = joined["price"].to_numpy(dtype=np.float64)
+        bid_px = joined["bid"].to_numpy()
+        slippage = np.where(
+            buy, fill_px / bid_px - 1 - joined["spread"].to_numpy(), 1 - fill_px / bid_px
+        )
+        logger.info(f"Slippage model: calibrating on {len(joined)} fills, {len(quotes)} quotes")
+        return cls.fit(
+            joined["time"].dt.hour.to_numpy(),
+            joined["vol"].to_numpy(),
+            joined["qty"].to_numpy(dtype=np.float64),
+            slippage,
+            quotes["timestamp"].dt.hour.to_numpy(),
+            quotes["vol"].to_numpy(),
+            quotes["spread"].to_numpy(),
+            **kwargs,
+        )
+
+    @staticmethod
+    def journal_fills(rows):
+        """Entry and exit fills of JournalManager rows, as calibrate() input."""
+        fills = []
+        for row in rows:
+            side = SELL if str(row.get("Direction")).upper() == "SHORT" else BUY
+            for time_key, price_key, action in (
+                ("Entry Time", "Entry Price", side),
+                ("Exit Time", "Exit Price", BUY + SELL - side),
+            ):
+                try:
+                    price, qty = float(row[price_key]), float(row["Size"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                fills.append(
+                    {"time": row.get(time_key), "side": action, "qty": qty, "price": price}
+                )
+        return fills
+
+    # --- PERSISTENCE ---
+
+    def save(self, path=None):
+        path = path or EXECUTION_CONFIG["slippage_model_path"]
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                vol_edges=self.vol_edges,
+                size_edges=self.size_edges,
+                spread=self.spread,
+                slip_mean=self.slip_mean,
+                slip_std=self.slip_std,
+            )
+
+    @classmethod
+    def load(cls, path=None):
+        """The calibrated tables at `path`, or the default prior if none were saved."""
+        path = path or EXECUTION_CONFIG["slippage_model_path"]
+        if not os.path.exists(path):
+            return cls.default()
+        with np.load(path) as tables:
+            return cls(**{key: tables[key] for key in tables.files})
+
+
+_MODEL = None
+
+
+def get_slippage_model():
+    """The shared model (loaded once per process)."""
+    global _MODEL
+    if _MODEL is None:
+        _MODEL = SlippageModel.load()
+    return _MODEL
@@ -0,0 +1,458 @@
+import threading
+from contextlib import contextmanager
+
+from execution.ledger import (
+    EQUITY_ADJUSTED,
+    ORDER_CANCELLED,
+    ORDER_FILLED,
+    ORDER_PLACED,
+    ORDER_REPLACED,
+    POSITION_CLOSED,
+    QTY_EPSILON,
+    PaperLedger,
+    apply_event,
+)
+from execution.order_book import OrderBook
+from src.gold_trading_bot.risk_management.stop_loss_manager import StopLossManager
+
+EQUITY_TOLERANCE = 0.005  # Floats round-trip through SQLite; compare to the half cent
+_MISSING = object()  # undo-log marker: the entry did not exist before the event
+
+
+class BrokerStateCache:
+    """
+    Protocol 9.3: In-Memory Broker State.
+    Account, open positions (by position id, indexed by symbol, with a
+    per-symbol exposure summary) and pending orders (by order id and by
+    symbol) live in memory and are authoritative for reads, so per-tick
+    checks never touch disk. A symbol can hold several positions at once
+    (pyramiding, concurrent strategies) and each can be closed in part. Every mutation is written through to the
+    DBManager tables and appended to the PaperLedger in one transaction,
+    then applied to memory with the ledger's reducer. Inside `transaction()`
+    each event first copies the entries it is about to change into an undo
+    log, so a rollback restores the in-memory state (and re-indexes only
+    what it touched) at a cost proportional to the transaction, not to the
+    number of orders and positions; `stops` is reconciled rather than
+    rebuilt, so ratcheted trailing stops survive it. `book` indexes resting
+    orders by trigger price and `stops` holds every position's SL/TP and
+    trailing settings in arrays, so a tick check is a few heap pops and
+    array ops rather than a loop over orders and positions.
+    """
+
+    def __init__(self, db, snapshot_every=500):
+        self.db = db
+        self.ledger = PaperLedger(db, snapshot_every=snapshot_every)
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._savepoint = None  # ledger position at the outermost transaction()
+        self._undo = []  # (section, key, previous entry or _MISSING), oldest first
+        self._detached = {}  # position_id -> stops closed inside the open transaction
+        self.load()
+
+    # --- STATE VIEWS ---
+
+    @property
+    def account(self):
+        return self._state["account"]
+
+    @property
+    def positions(self):
+        return self._state["positions"]
+
+    @property
+    def orders(self):
+        return self._state["orders"]
+
+    @property
+    def last_exit(self):
+        return self._state["last_exit"]
+
+    # --- WARM LOAD / CONSISTENCY ---
+
+    def load(self, from_tables=False):
+        """
+        Startup: latest ledger snapshot + log tail. A database that predates
+        the ledger is read from its tables once and becomes the genesis snapshot.
+        `from_tables=True` adopts the tables as they are now (after an external
+        edit) and records them as a new snapshot.
+        """
+        with self._lock:
+            if self.ledger.has_snapshot() and not from_tables:
+                self._state = self.ledger.load()
+            else:
+                with self.db.transaction():
+                    self._state = self._load_tables()
+                    self.ledger.snapshot(self._state)
+            self._index_orders()
+            self._index_positions()
+            self._index_triggers()
+
+    def _load_tables(self):
+        return {
+            "account": self.db.get_account(),
+            "positions": self.db.get_open_positions(),
+            "orders": {o["order_id"]: o for o in self.db.get_all_orders()},
+            "last_exit": self.db.get_last_exit_times(),
+        }
+
+    def _index_orders(self):
+        self.orders_by_symbol = {}  # symbol -> {order_id: None} (ordered set)
+        for order_id, order in self.orders.items():
+            self.orders_by_symbol.setdefault(order["symbol"], {})[order_id] = None
+
+    def _index_triggers(self):
+        self._index_book()
+        self.stops = StopLossManager()
+        for position in self.positions.values():
+            self.stops.add_position(position)
+
+    def _index_book(self):
+        self.book = OrderBook()
+        for order in self.orders.values():
+            self._book_order(order)
+
+    def _book_order(self, order):
+        if order.get("type") in ("LIMIT", "STOP"):
+            self.book.add(
+                ("order", order["order_id"]),
+                order["symbol"],
+                order["action"],
+                order["type"],
+                order["limit_price"],
+            )
+
+    def _index_positions(self):
+        self.positions_by_symbol = {}
+        self.exposure = {}
+        for position_id in sorted(self.positions):  # ids ascend in fill order (FIFO)
+            symbol = self.positions[position_id]["symbol"]
+            self.positions_by_symbol.setdefault(symbol, []).append(position_id)
+        for symbol in list(self.positions_by_symbol):
+            self._update_exposure(symbol)
+
+    def _update_exposure(self, symbol):
+        """Re-derives one symbol's id list and exposure; O(positions in that symbol)."""
+        ids = [pid for pid in self.positions_by_symbol.get(symbol, ()) if pid in self.positions]
+        if not ids:
+            self.positions_by_symbol.pop(symbol, None)
+            self.exposure.pop(symbol, None)
+            return
+        self.positions_by_symbol[symbol] = ids
+        long_qty = short_qty = cost = risk = 0.0
+        for pid in ids:
+            pos = self.positions[pid]
+            if pos["type"] == "SHORT":
+                short_qty += pos["qty"]
+            else:
+                long_qty += pos["qty"]
+            cost += pos["entry_price"] * pos["qty"]
+            if pos.get("sl"):
+                risk += abs(pos["entry_price"] - pos["sl"]) * pos["qty"]
+        self.exposure[symbol] = {
+            "positions": len(ids),
+            "long_qty": long_qty,
+            "short_qty": short_qty,
+            "net_qty": long_qty - short_qty,
+            "avg_entry": cost / (long_qty + short_qty) if long_qty + short_qty else 0.0,
+            # Price distance to stop x qty; times contract size = money at risk
+            "risk": risk,
+        }
+
+    def verify(self):
+        """
+        Compares memory against the database tables. Returns a list of mismatch
+        descriptions (empty when consistent); callers decide whether to `load()`.
+        """
+        with self._lock, self.db.transaction(write=False):
+            account = self.db.get_account()
+            positions = self.db.get_open_positions()
+            order_ids = {o["order_id"] for o in self.db.get_all_orders()}
+
+            problems = []
+            for key in ("equity", "balance"):
+                if abs((account[key] or 0) - (self.account[key] or 0)) > EQUITY_TOLERANCE:
+                    problems.append(f"account.{key}: memory={self.account[key]} db={account[key]}")
+            for position_id in set(positions) | set(self.positions):
+                if positions.get(position_id) != self.positions.get(position_id):
+                    problems.append(
+                        f"position {position_id}: memory={self.positions.get(position_id)} "
+                        f"db={positions.get(position_id)}"
+                    )
+            if order_ids != set(self.orders):
+                problems.append(f"orders: memory={sorted(self.orders)} db={sorted(order_ids)}")
+        return problems
+
+    def state_at(self, when):
+        """Point-in-time broker state (ledger seq or timestamp) for audits."""
+        return self.ledger.state_at(when)
+
+    # --- TRANSACTIONS ---
+
+    @contextmanager
+    def transaction(self):
+        """DB transaction whose rollback also rolls back the cached state."""
+        with self._lock:
+            if self._depth == 0:
+                self._savepoint = self.ledger.position()
+            self._depth += 1
+            try:
+                with self.db.transaction():
+                    yield self
+            except BaseException:
+                if self._depth == 1:
+                    self.ledger.rewind(self._savepoint)
+                    self._rollback()
+                raise
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._savepoint = None
+                    self._undo = []
+                    self._detached = {}
+
+    def _remember(self, section, key=None):
+        """Copies the entry an event is about to change into the undo log."""
+        table = self._state[section]
+        if section == "account":
+            previous = dict(table)
+        elif key in table:
+            previous = dict(table[key]) if isinstance(table[key], dict) else table[key]
+        else:
+            previous = _MISSING
+        self._undo.append((section, key, previous))
+
+    def _remember_event(self, event_type, payload):
+        if event_type in (ORDER_PLACED, ORDER_CANCELLED, ORDER_REPLACED):
+            self._remember("orders", payload["order_id"])
+        elif event_type == ORDER_FILLED:
+            self._remember("positions", payload["id"])
+        elif event_type == POSITION_CLOSED:
+            if payload.get("position_id") is not None:
+                self._remember("positions", payload["position_id"])
+            else:
+                for position_id in self.positions_by_symbol.get(payload["symbol"], ()):
+                    self._remember("positions", position_id)
+            self._remember("last_exit", payload["symbol"])
+        elif event_type == EQUITY_ADJUSTED:
+            self._remember("account")
+
+    def _rollback(self):
+        """Replays the undo log backwards, then re-indexes the orders and positions it touched."""
+        orders, positions = {}, {}  # id -> symbol
+        for section, key, previous in reversed(self._undo):
+            table = self._state[section]
+            if section in ("orders", "positions"):
+                entry = table.get(key) if previous is _MISSING else previous
+                if entry is not None:
+                    (orders if section == "orders" else positions)[key] = entry["symbol"]
+            if section == "account":
+                table.clear()
+                table.update(previous)
+            elif previous is _MISSING:
+                table.pop(key, None)
+            else:
+                table[key] = previous
+
+        for order_id, symbol in orders.items():
+            self.book.cancel(("order", order_id))
+            ids = self.orders_by_symbol.setdefault(symbol, {})
+            order = self.orders.get(order_id)
+            if order is None:
+                ids.pop(order_id, None)
+            else:
+                self._book_order(order)
+                if order_id not in ids:  # re-inserted: restore id (= placement) order
+                    ids[order_id] = None
+                    self.orders_by_symbol[symbol] = dict.fromkeys(sorted(ids))
+            if not self.orders_by_symbol[symbol]:
+                del self.orders_by_symbol[symbol]
+
+        for symbol in set(positions.values()):
+            ids = set(self.positions_by_symbol.get(symbol, ()))
+            ids |= {pid for pid, sym in positions.items() if sym == symbol}
+            self.positions_by_symbol[symbol] = sorted(pid for pid in ids if pid in self.positions)
+            self._update_exposure(symbol)
+        for position_id in positions:
+            if position_id not in self.positions:
+                self.stops.remove(position_id)
+            elif position_id in self._detached:
+                self.stops.reattach(position_id, self._detached[position_id])
+            elif position_id not in self.stops:
+                self.stops.add_position(self.positions[position_id])
+
+    def _record(self, event_type, payload, ts=None):
+        """Appends the event (caller holds `transaction()`) and applies it to memory."""
+        _, ts = self.ledger.append(event_type, payload, ts)
+        cancelled = self.orders.get(payload["order_id"]) if event_type == ORDER_CANCELLED else None
+        self._remember_event(event_type, payload)
+        apply_event(self._state, event_type, payload, ts)
+        if event_type == ORDER_PLACED:
+            self.orders_by_symbol.setdefault(payload["symbol"], {})[payload["order_id"]] = None
+            self._book_order(payload)
+        elif event_type == ORDER_CANCELLED and cancelled is not None:
+            ids = self.orders_by_symbol.get(cancelled["symbol"], {})
+            ids.pop(payload["order_id"], None)
+            if not ids:
+                self.orders_by_symbol.pop(cancelled["symbol"], None)
+            self.book.cancel(("order", payload["order_id"]))
+        elif event_type == ORDER_REPLACED:
+            self.book.replace(("order", payload["order_id"]), payload["limit_price"])
+        elif event_type == ORDER_FILLED:
+            self.positions_by_symbol.setdefault(payload["symbol"], []).append(payload["id"])
+            self.stops.add_position(self.positions[payload["id"]])
+            self._update_exposure(payload["symbol"])
+        elif event_type == POSITION_CLOSED:
+            for position_id in self.positions_by_symbol.get(payload["symbol"], ()):
+                if position_id not in self.positions:
+                    detached = self.stops.detach(position_id)
+                    if detached is not None:
+                        self._detached[position_id] = detached
+            self._update_exposure(payload["symbol"])
+        if self.ledger.snapshot_due():
+            self.ledger.snapshot(self._state)
+
+    # --- READS (memory only) ---
+
+    def get_account(self):
+        return dict(self.account)
+
+    def get_open_position(self, symbol):
+        """Oldest open position in `symbol` (single-position callers), or "FLAT"."""
+        ids = self.positions_by_symbol.get(symbol)
+        return dict(self.positions[ids[0]]) if ids else "FLAT"
+
+    def get_position(self, position_id):
+        pos = self.positions.get(position_id)
+        return dict(pos) if pos else None
+
+    def get_positions(self, symbol=None, strategy=None):
+        """Open positions, oldest first; optionally one symbol and/or strategy."""
+        ids = sorted(self.positions) if symbol is None else self.positions_by_symbol.get(symbol, ())
+        positions = (self.positions[pid] for pid in ids)
+        return [
+            dict(pos) for pos in positions if strategy is None or pos.get("strategy") == strategy
+        ]
+
+    def get_exposure(self, symbol=None):
+        """Per-symbol exposure summary; all symbols when `symbol` is None (O(#symbols))."""
+        if symbol is not None:
+            exposure = self.exposure.get(symbol)
+            return dict(exposure) if exposure else None
+        return {sym: dict(exposure) for sym, exposure in self.exposure.items()}
+
+    def get_orders(self, symbol=None):
+        if symbol is None:
+            return [dict(order) for order in self.orders.values()]
+        return [dict(self.orders[oid]) for oid in self.orders_by_symbol.get(symbol, ())]
+
+    def get_order(self, order_id):
+        order = self.orders.get(order_id)
+        return dict(order) if order else None
+
+    def get_last_exit_time(self, symbol):
+        return self.last_exit.get(symbol)
+
+    # --- WRITES (write-through + ledger) ---
+
+    def update_equity(self, equity, balance=None):
+        with self.transaction():
+            self.db.update_equity(equity, balance)
+            self._record(EQUITY_ADJUSTED, {"equity": equity, "balance": balance})
+
+    def add_trade(
+        self,
+        ticket,
+        symbol,
+        direction,
+        size,
+        price,
+        sl,
+        tp,
+        magic=123456,
+        strategy=None,
+        trail=0.0,
+        atr_mult=0.0,
+    ):
+        """
+        Opens a new position (alongside any already open); returns its id.
+        `trail` (price units) or `atr_mult` (ATRs) > 0 make its stop trail.
+        """
+        with self.transaction():
+            trade_id = self.db.add_trade(
+                ticket, symbol, direction, size, price, sl, tp, magic, strategy, trail, atr_mult
+            )
+            position = {
+                "id": trade_id,
+                "type": direction,
+                "symbol": symbol,
+                "entry_price": price,
+                "qty": size,
+                "sl": sl,
+                "tp": tp,
+                "strategy": strategy,
+                "trail": trail,
+                "atr_mult": atr_mult,
+            }
+            self._record(ORDER_FILLED, position)
+            return trade_id
+
+    def close_position(self, position_id, exit_price, pnl, qty=None, reason="CLOSE"):
+        """Closes one position, or `qty` of it (partial close). Returns the exit time."""
+        with self.transaction():
+            position = self.positions[position_id]
+            if qty is None or qty >= position["qty"] - QTY_EPSILON:
+                qty = position["qty"]
+                exit_time = self.db.close_position(position_id, exit_price, pnl)
+            else:
+                exit_time = self.db.close_position(position_id, exit_price, pnl, qty=qty)
+            self._record(
+                POSITION_CLOSED,
+                {
+                    "position_id": position_id,
+                    "symbol": position["symbol"],
+                    "qty": qty,
+                    "exit_price": exit_price,
+                    "pnl": pnl,
+                    "exit_time": exit_time,
+                    "reason": reason,
+                },
+                ts=exit_time,
+            )
+            return exit_time
+
+    def close_trade(self, symbol, exit_price, pnl, reason="CLOSE"):
+        """Closes every position in `symbol`, splitting `pnl` by size. Returns the exit time."""
+        with self.transaction():
+            positions = self.get_positions(symbol)
+            total = sum(pos["qty"] for pos in positions) or 1
+            exit_time = None
+            for pos in positions:
+                exit_time = self.close_position(
+                    pos["id"], exit_price, pnl * pos["qty"] / total, reason=reason
+                )
+            return exit_time
+
+    def add_order(self, order_dict):
+        with self.transaction():
+            order_id = self.db.add_order(order_dict)
+            self._record(ORDER_PLACED, {"order_id": order_id, **order_dict})
+            return order_id
+
+    def remove_order(self, order_id, reason="CANCELLED"):
+        with self.transaction():
+            self.db.remove_order(order_id)
+            self._record(ORDER_CANCELLED, {"order_id": order_id, "reason": reason})
+
+    def replace_order(self, order_id, limit_price=None, qty=None):
+        """Moves a resting order's trigger price and/or size; returns False if it is gone."""
+        order = self.orders.get(order_id)
+        if order is None:
+            return False
+        limit_price = order["limit_price"] if limit_price is None else limit_price
+        qty = order["qty"] if qty is None else qty
+        with self.transaction():
+            self.db.replace_order(order_id, limit_price, qty)
+            self._record(
+                ORDER_REPLACED, {"order_id": order_id, "limit_price": limit_price, "qty": qty}
+            )
+        return True
@@ -123,8 +123,7 @@ def check_market():
             }
             try:
                 from utils.notifier import TelegramNotifier
-                import asyncio
-                asyncio.run(TelegramNotifier.send_message(f"🚀 BUY SIGNAL\nPrice: ₹{current_price:.2f}\nRSI: {current_row['rsi']:.1f}"))
+                TelegramNotifier.notify(f"🚀 BUY SIGNAL\nPrice: ₹{current_price:.2f}\nRSI: {current_row['rsi']:.1f}")
             except Exception as e:
                 print(f"Operation failed: {e}")
             trade_happened = True
@@ -151,8 +150,7 @@ def check_market():
             try:
                 from utils.notifier import TelegramNotifier
                 emoji = "✅" if pnl > 0 else "❌"
-                import asyncio
-                asyncio.run(TelegramNotifier.send_message(f"{emoji} SELL SIGNAL\nP&L: ₹{pnl:.2f}\nExit: ₹{current_price:.2f}"))
+                TelegramNotifier.notify(f"{emoji} SELL SIGNAL\nP&L: ₹{pnl:.2f}\nExit: ₹{current_price:.2f}")
             except Exception as e:
                 print(f"Operation failed: {e}")
 
@@ -13,6 +13,7 @@ from execution.db_manager import DBManager
 from execution.risk_manager import CircuitBreaker
 from strategies.data_handler import DataHandler
 from strategies.xauusd_strategy import check_market
+from utils.latency import get_recorder
 from utils.run_scheduler import run_scheduler
 import schedule
 import time
@@ -73,6 +74,7 @@ async def main():
 
     # 2. Initialize Data Pipelines
     print("🤖 STARTING TRADING ENGINE...")
+    get_recorder().start_export()  # Protocol 9.6: per-stage latency -> logs/latency.json
     print(f"   ACTIVE PIPELINES: {ENABLED_MARKETS}")
 
     # Schedule pre-market routine at 08:00 AM every weekday
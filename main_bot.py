@@ -153,16 +153,13 @@ class GoldTradingBot:
                 result = self.paper_trading.place_buy_order(symbol, quantity, price, trade_id)
                 if result:
                     msg = f"BUY {quantity} {symbol} @ ₹{price:.2f}"
-                    import asyncio
-                    asyncio.run(
-                        TelegramNotifier.notify_trade(
-                            trade_type="BUY",
-                            price=price,
-                            size=quantity,
-                            sl=0,
-                            tp=0,
-                            sentiment="Rule-Based Signal",
-                        )
+                    TelegramNotifier.notify_trade_sync(
+                        trade_type="BUY",
+                        price=price,
+                        size=quantity,
+                        sl=0,
+                        tp=0,
+                        sentiment="Rule-Based Signal",
                     )
                     print(f"[+] {msg}")
                     logger.info(msg)
@@ -170,24 +167,20 @@ class GoldTradingBot:
                 result = self.paper_trading.place_sell_order(symbol, quantity, price, trade_id)
                 if result:
                     msg = f"SELL {quantity} {symbol} @ ₹{price:.2f}"
-                    import asyncio
-                    asyncio.run(
-                        TelegramNotifier.notify_trade(
-                            trade_type="SELL",
-                            price=price,
-                            size=quantity,
-                            sl=0,
-                            tp=0,
-                            sentiment="Rule-Based Signal",
-                        )
+                    TelegramNotifier.notify_trade_sync(
+                        trade_type="SELL",
+                        price=price,
+                        size=quantity,
+                        sl=0,
+                        tp=0,
+                        sentiment="Rule-Based Signal",
                     )
                     print(f"[+] {msg}")
                     logger.info(msg)
             return result
         except Exception as e:
             logger.error(f"Error executing trade: {str(e)}")
-            import asyncio
-            asyncio.run(TelegramNotifier.send_message(f"Trade execution error: {str(e)}"))
+            TelegramNotifier.notify(f"Trade execution error: {str(e)}")
             print(f"[-] Error: {str(e)}")
             return False
 
@@ -195,8 +188,7 @@ class GoldTradingBot:
         """Send daily trading summary via Telegram"""
         try:
             summary = self.paper_trading.get_account_summary()
-            import asyncio
-            asyncio.run(TelegramNotifier.send_message(f"Daily Summary: {summary}"))
+            TelegramNotifier.notify(f"Daily Summary: {summary}")
             # Save summary
             os.makedirs("reports", exist_ok=True)
             with open(f"reports/summary_{datetime.now().strftime('%Y%m%d')}.json", "w") as f:
@@ -233,7 +225,9 @@ class GoldTradingBot:
 
             # ========== PHASE 2: Initialize Gateway ==========
             logger.info("[2/5] Initializing pre-trade gateway...")
-            self.pretrade_gateway = self._initialize_gateway()
+            # Built once so verdict caches and last-known values survive between cycles
+            if self.pretrade_gateway is None:
+                self.pretrade_gateway = self._initialize_gateway()
             logger.info("✓ Gateway initialized with 8 modules")
 
             # ========== PHASE 3: Run Gateway Checks ==========
@@ -360,9 +354,7 @@ class GoldTradingBot:
         logger.warning(alert_msg)
 
         # Send Telegram alert for gateway failure
-        import asyncio
-
-        asyncio.run(TelegramNotifier.send_message(alert_msg))
+        TelegramNotifier.notify(alert_msg)
 
     def generate_daily_summary(self, gateway_blocked: bool = False):
         """
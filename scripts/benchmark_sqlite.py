@@ -0,0 +1,154 @@
+"""
+SQLite hot-query benchmark (Protocol 7.4).
+
+Builds synthetic copies of goldbot.db, bot_state.db and trading_history.db,
+times every store's HOT_QUERIES at the latest schema version with the tuned
+connection pragmas, then rolls the migrations back to version 0 and times
+them again on a default connection. Prints before/after latency and plans.
+
+    python scripts/benchmark_sqlite.py [--rows 200000] [--repeat 30]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution import db_manager
+from execution.db_manager import DBManager
+from src import database
+from src.database import Database
+from utils.history_store import HistoryStore, history_migrations
+from utils.migrations import apply_pragmas, explain, migrate, time_query
+
+START = datetime(2025, 1, 1)
+
+
+def build_goldbot(path, rows):
+    Database(path, buffered=False).close()
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO trades (timestamp, algo_id, symbol, side, quantity, entry_price, pnl, status) "
+        "VALUES (?, 'BENCH', 'XAUUSD', 'BUY', 1, 2000, ?, ?)",
+        (
+            (
+                (START + timedelta(minutes=5 * i)).isoformat(" "),
+                random.uniform(-50, 50),
+                "OPEN" if i % 1000 == 0 else "CLOSED",
+            )
+            for i in range(rows)
+        ),
+    )
+    conn.commit()
+    conn.close()
+    Database(path, buffered=False).rebuild_daily_pnl("2026-01-05")
+    return "goldbot", database.MIGRATIONS, database.HOT_QUERIES
+
+
+def build_bot_state(path, rows):
+    DBManager(path).close()
+    symbols = ["XAUUSD", "XAGUSD", "MCX:GOLD", "EURUSD"]
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO trades (symbol, direction, size, entry_price, status, entry_time, exit_time) "
+        "VALUES (?, 'LONG', 1, 2000, ?, ?, ?)",
+        (
+            (
+                symbols[i % len(symbols)],
+                "OPEN" if i >= rows - len(symbols) else "CLOSED",
+                (START + timedelta(minutes=i)).isoformat(),
+                (START + timedelta(minutes=i + 1)).isoformat(),
+            )
+            for i in range(rows)
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO orders (symbol, action, limit_price, qty, type) VALUES (?, 1, 1990, 1, 'LIMIT')",
+        # Pending orders spread over a watchlist, a handful per symbol
+        (
+            (symbols[i % len(symbols)] if i % 25 == 0 else f"SYM{i % 500}",)
+            for i in range(rows // 10)
+        ),
+    )
+    conn.commit()
+    conn.close()
+    return "bot_state", db_manager.MIGRATIONS, db_manager.HOT_QUERIES
+
+
+def build_history(path, rows):
+    store = HistoryStore(path, "XAUUSD")
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        f"INSERT INTO {store.table} (time, open, high, low, close, adx) VALUES (?, 1, 1, 1, 1, ?)",
+        (
+            (
+                (START + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S"),
+                None if i >= rows - 100 else 25.0,
+            )
+            for i in range(rows)
+        ),
+    )
+    conn.commit()
+    conn.close()
+    return f"history:{store.table}", history_migrations(store.table), store.hot_queries()
+
+
+def measure(path, queries, repeat, tuned):
+    conn = sqlite3.connect(path)
+    if tuned:
+        apply_pragmas(conn)
+    results = {
+        name: (time_query(conn, sql, params, repeat), explain(conn, sql, params))
+        for name, (sql, params) in queries.items()
+    }
+    conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+    random.seed(7)
+
+    workdir = tempfile.mkdtemp(prefix="sqlite_bench_")
+    try:
+        print(f"{'store':<22} {'query':<18} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+        plans = []
+        for name, build in (
+            ("goldbot.db", build_goldbot),
+            ("bot_state.db", build_bot_state),
+            ("trading_history.db", build_history),
+        ):
+            path = os.path.join(workdir, name)
+            store, migrations, queries = build(path, args.rows)
+
+            after = measure(path, queries, args.repeat, tuned=True)
+            conn = sqlite3.connect(path)
+            migrate(conn, store, migrations, target=0)
+            conn.close()
+            before = measure(path, queries, args.repeat, tuned=False)
+
+            for query in queries:
+                b, a = before[query][0], after[query][0]
+                print(f"{name:<22} {query:<18} {b:>10.3f} {a:>10.3f} {b / max(a, 1e-6):>7.1f}x")
+                plans.append((name, query, before[query][1], after[query][1]))
+
+        print("\nQuery plans (before -> after):")
+        for name, query, before_plan, after_plan in plans:
+            print(f"  {name} {query}")
+            print(f"    before: {' | '.join(before_plan)}")
+            print(f"    after:  {' | '.join(after_plan)}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
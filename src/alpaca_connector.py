@@ -6,7 +6,6 @@ Using alpaca-py 0.21.0 with Paper Trading
 import logging
 import os
 
-import yfinance as yf
 from alpaca.data.historical import StockHistoricalDataClient
 from alpaca.data.requests import StockLatestQuoteRequest
 from alpaca.trading.client import TradingClient
@@ -14,6 +13,8 @@ from alpaca.trading.enums import OrderSide, TimeInForce
 from alpaca.trading.requests import LimitOrderRequest, MarketOrderRequest
 from dotenv import load_dotenv
 
+from utils.market_data import get_market_data
+
 load_dotenv()
 logger = logging.getLogger(__name__)
 
@@ -60,8 +61,7 @@ class AlpacaConnector:
         """Get current gold price via yfinance (Alpaca doesn't support XAUUSD)"""
         try:
             # Get gold futures price (GC=F)
-            gold = yf.Ticker("GC=F")
-            data = gold.history(period="1d", interval="1m")
+            data = get_market_data().get_history("GC=F", period="1d", interval="1m")
 
             if not data.empty:
                 price = data["Close"].iloc[-1]
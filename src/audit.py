@@ -1,41 +1,56 @@
-import csv
 import os
 from datetime import datetime
 
 from config.config import Config
+from utils.log_index import parse_timestamp, tail_rows
+from utils.write_behind import get_log
+
+AUDIT_HEADER = [
+    "Timestamp",
+    "Algo_ID",
+    "Event_Type",
+    "Symbol",
+    "Action",
+    "Price",
+    "Quantity",
+    "Details",
+]
+
+
+def audit_index_key(row):
+    """Timestamp of an audit row for the sidecar index (audit rows carry no PnL)."""
+    ts = parse_timestamp(row[0])
+    return None if ts is None else (ts, None)
+
+
+def get_audit_log(file_path=None):
+    """The audit file's shared write-behind log (also used by the kill switch)."""
+    return get_log(
+        file_path or Config.AUDIT_FILE,
+        header=AUDIT_HEADER,
+        policy=Config.AUDIT_BACKPRESSURE,
+        index=audit_index_key,
+    )
 
 
 class AuditLogger:
-    def __init__(self):
-        self.file_path = Config.AUDIT_FILE
+    def __init__(self, file_path=None):
+        self.file_path = file_path or Config.AUDIT_FILE
         self._initialize_file()
 
     def _initialize_file(self):
-        if not os.path.exists(self.file_path):
-            with open(self.file_path, "w", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow(
-                    [
-                        "Timestamp",
-                        "Algo_ID",
-                        "Event_Type",
-                        "Symbol",
-                        "Action",
-                        "Price",
-                        "Quantity",
-                        "Details",
-                    ]
-                )
+        is_new = not os.path.exists(self.file_path)
+        # The writer creates the file and its header on first use
+        self.writer = get_audit_log(self.file_path)
+        if is_new:
             print(f"✅ Audit log created: {self.file_path}")
 
     def log(self, event_type, symbol="N/A", action="INFO", price=0, qty=0, details=""):
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
         try:
-            with open(self.file_path, "a", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow(
-                    [timestamp, Config.ALGO_ID, event_type, symbol, action, price, qty, details]
-                )
+            self.writer.write_row(
+                [timestamp, Config.ALGO_ID, event_type, symbol, action, price, qty, details]
+            )
 
             emoji = {"TRADE": "📊", "ALERT": "⚠️", "ERROR": "❌", "SYSTEM": "⚙️", "INFO": "ℹ️"}.get(
                 event_type, "📝"
@@ -44,18 +59,30 @@ class AuditLogger:
         except Exception as e:
             print(f"❌ Audit log error: {str(e)}")
 
+    def flush(self, durable=False):
+        self.writer.flush(durable=durable)
+
     def read_last_trades(self, limit=10):
-        trades = []
+        """Last `limit` audit rows, read backwards from the end of the file."""
+        self.flush()
         try:
-            with open(self.file_path, encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    trades.append(row)
-            return trades[-limit:]
+            return [
+                dict(zip(AUDIT_HEADER, row, strict=False))
+                for row in tail_rows(self.file_path, limit)
+            ]
         except Exception as e:
             print(f"Operation failed: {e}")
             return []
 
+    def read_between(self, start=None, end=None):
+        """Audit rows logged in [start, end), located through the sidecar index."""
+        self.flush()
+        index = self.writer.index
+        return [
+            dict(zip(AUDIT_HEADER, row, strict=False))
+            for row in index.read_rows(index.between(start, end))
+        ]
+
 
 if __name__ == "__main__":
     logger = AuditLogger()
@@ -5,6 +5,8 @@ import numpy as np
 import pandas as pd
 from tensorflow.keras.models import load_model
 
+from utils.data_validator import DataValidator
+
 
 class BacktestEngine:
     """A generic engine for backtesting a trading strategy based on a signal model."""
@@ -32,6 +34,7 @@ class BacktestEngine:
         self.model = None
         self.scaler = None
         self.data = None
+        self.quality = None
         self.trades = []
         self.equity_curve = []
 
@@ -58,6 +61,11 @@ class BacktestEngine:
             return False
 
         self.data = df
+        # Protocol 1.1: one vectorized scan, then O(log n) lookups per bar
+        self.quality = DataValidator().validate_frame(
+            df, time_col=self.date_col, price_cols=self.ohlc_cols
+        )
+        print(f"Data quality: {self.quality.summary()}")
         print(
             f"Data loaded successfully. Backtest period: {self.data[self.date_col].min():%Y-%m-%d} to {self.data[self.date_col].max():%Y-%m-%d}"
         )
@@ -85,6 +93,10 @@ class BacktestEngine:
             prediction = self.model.predict(X_test, verbose=0)[0][0]
             signal = 1 if prediction > 0.5 else 0
 
+            # Never open a position off a window with gaps, bad bars or spikes
+            if signal == 1 and position == 0 and not self.quality.is_clean(i - self.lookback, i):
+                signal = 0
+
             current_price = self.data[self.ohlc_cols[3]].iloc[i]  # Close price
             current_date = self.data[self.date_col].iloc[i]
 
@@ -5,6 +5,8 @@ import numpy as np
 import pandas as pd
 from tensorflow.keras.models import load_model
 
+from execution.slippage_model import BUY, SELL, bar_hours, get_slippage_model, relative_volatility
+
 
 def prepare_lstm_data(data: np.ndarray, scaler, lookback: int = 60) -> np.ndarray:
     """Prepares data for LSTM model prediction."""
@@ -34,6 +36,7 @@ class BacktestEngine:
         ohlc_cols: list[str] = None,
         date_col: str = "timestamp",
         lookback: int = 60,
+        quantity: float = 1.0,
     ):
         """
         Initializes the backtesting engine.
@@ -47,6 +50,7 @@ class BacktestEngine:
             ohlc_cols (List[str]): A list of column names for Open, High, Low, Close.
             date_col (str): The name of the date/timestamp column.
             lookback (int): The lookback period required by the model.
+            quantity (float): Lots bought on each entry and sold on each exit.
         """
         self.csv_path = csv_path
         self.model_path = model_path
@@ -56,6 +60,7 @@ class BacktestEngine:
         self.ohlc_cols = ohlc_cols if ohlc_cols else ["Open", "High", "Low", "Close"]
         self.date_col = date_col
         self.lookback = lookback
+        self.quantity = quantity
 
         self.model = None
         self.scaler = None
@@ -86,6 +91,15 @@ class BacktestEngine:
             return False
 
         self.data = df
+
+        # Protocol 5.2.3: every bar's buy/sell fill price per size bin from the shared cost model,
+        # in one pass; trades pick the row for the quantity they fill
+        self.cost_model = get_slippage_model()
+        bars = df[self.ohlc_cols].set_axis(["Open", "High", "Low", "Close"], axis=1)
+        close = bars["Close"].to_numpy(dtype=np.float64)
+        hours, vol = bar_hours(df, self.date_col), relative_volatility(bars)
+        self.buy_prices = self.cost_model.price_table(close, BUY, hours, vol)
+        self.sell_prices = self.cost_model.price_table(close, SELL, hours, vol)
         print(
             f"Data loaded successfully. Backtest period: {self.data[self.date_col].min():%Y-%m-%d} to {self.data[self.date_col].max():%Y-%m-%d}"
         )
@@ -101,6 +115,7 @@ class BacktestEngine:
         equity = self.initial_equity
         position = 0  # 0 for no position, 1 for long
         entry_price = 0
+        size_bin = self.cost_model.size_bin(self.quantity)
 
         # Feature columns are assumed to be the OHLC columns
         feature_cols = self.ohlc_cols
@@ -117,20 +132,25 @@ class BacktestEngine:
             prediction = self.model.predict(X_test)[0][0]
             signal = 1 if prediction > 0.5 else 0  # 1 for UP (Buy), 0 for DOWN (Sell/Hold)
 
-            current_price = self.data[self.ohlc_cols[3]].iloc[i]  # Close price
             current_date = self.data[self.date_col].iloc[i]
 
             # Trading Logic
             if signal == 1 and position == 0:  # Buy signal and no position
                 position = 1
-                entry_price = current_price
+                entry_price = self.buy_prices[size_bin, i]
                 self.trades.append(
-                    {"type": "BUY", "date": current_date, "price": entry_price, "pnl": 0}
+                    {
+                        "type": "BUY",
+                        "date": current_date,
+                        "price": entry_price,
+                        "quantity": self.quantity,
+                        "pnl": 0,
+                    }
                 )
             elif signal == 0 and position == 1:  # Sell signal and in a long position
                 position = 0
-                exit_price = current_price
-                pnl = exit_price - entry_price
+                exit_price = self.sell_prices[size_bin, i]
+                pnl = (exit_price - entry_price) * self.quantity
                 equity += pnl
 
                 # Update last trade
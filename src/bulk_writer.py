@@ -0,0 +1,239 @@
+import atexit
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Open writers, flushed at exit. Held strongly until close() so an unclosed writer
+# dropped by its owner still gets its buffered rows written; close() releases it.
+_WRITERS = set()
+
+
+def _transient(error):
+    """Lock contention: the same rows are worth another try later."""
+    return isinstance(error, sqlite3.OperationalError) and any(
+        word in str(error) for word in ("locked", "busy")
+    )
+
+
+@atexit.register
+def _close_all():
+    for writer in list(_WRITERS):
+        writer.close()
+
+
+class BulkWriter:
+    """
+    Buffered bulk writer for high-rate inserts (ticks, feature vectors).
+    Rows are queued per INSERT statement and written with `executemany`
+    inside one transaction when the buffer reaches `max_rows`, when the
+    oldest row is `max_delay` seconds old, or on `flush()`/`close()`.
+    With `background=True` a daemon thread does the flushing so producers
+    never wait on disk unless the backlog passes `max_pending`. A locked
+    database is retried up to `max_retries` flushes in a row; any other
+    failure bisects the batch so the good rows commit and each bad row
+    (constraint violation, wrong arity) goes to `dead_letters` instead of
+    poisoning every later flush.
+    """
+
+    def __init__(
+        self,
+        db_path,
+        max_rows=500,
+        max_delay=0.25,
+        max_pending=50_000,
+        background=True,
+        max_retries=3,
+    ):
+        self.db_path = db_path
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.background = background
+        self.max_retries = max_retries
+        self.dead_letters = deque(maxlen=max_pending)  # (sql, row, error), newest last
+        self._retries = 0
+
+        self._buffers = {}  # sql -> [rows]
+        self._pending = 0
+        self._oldest = None  # monotonic enqueue time of the oldest buffered row
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._conn = None
+        self.metrics = {
+            "rows_written": 0,
+            "flushes": 0,
+            "errors": 0,
+            "dead_rows": 0,
+            "inline_flushes": 0,
+            "last_batch": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "last_lag_ms": 0.0,
+            "max_lag_ms": 0.0,
+        }
+
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._run, name="bulk-writer", daemon=True)
+            self._thread.start()
+        _WRITERS.add(self)
+
+    def _get_conn(self):
+        if self._conn is None:
+            # Only ever used under _flush_lock, so sharing it across threads is safe
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+        return self._conn
+
+    # --- PRODUCER SIDE ---
+
+    def add(self, sql, row):
+        if self._closed:
+            raise RuntimeError("BulkWriter is closed")
+        with self._lock:
+            self._buffers.setdefault(sql, []).append(row)
+            self._pending += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            pending = self._pending
+            age = time.monotonic() - self._oldest
+
+        if pending >= self.max_pending:
+            # Backpressure: the writer thread is behind, so the producer helps out
+            self.metrics["inline_flushes"] += 1
+            self.flush()
+        elif pending >= self.max_rows or age >= self.max_delay:
+            if self.background:
+                self._wake.set()
+            else:
+                self.flush()
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def lag(self):
+        """Age in seconds of the oldest row not yet on disk (0.0 when empty)."""
+        oldest = self._oldest
+        return time.monotonic() - oldest if oldest is not None else 0.0
+
+    # --- FLUSHING ---
+
+    def flush(self):
+        """Writes everything buffered so far in one transaction. Returns rows written."""
+        with self._flush_lock:
+            with self._lock:
+                buffers, oldest = self._buffers, self._oldest
+                self._buffers, self._pending, self._oldest = {}, 0, None
+            if not buffers:
+                return 0
+
+            rows = sum(len(batch) for batch in buffers.values())
+            start = time.monotonic()
+            conn = self._get_conn()
+            try:
+                with conn:
+                    for sql, batch in buffers.items():
+                        conn.executemany(sql, batch)
+            except sqlite3.Error as e:
+                self.metrics["errors"] += 1
+                if _transient(e) and self._retries < self.max_retries:
+                    self._retries += 1
+                    logger.warning(
+                        f"Bulk flush of {rows} rows deferred ({e}), retry {self._retries}"
+                    )
+                    self._requeue(buffers, oldest)
+                    return 0
+                logger.error(f"Bulk flush of {rows} rows failed: {e}")
+                rows = self._write_isolating(conn, buffers, e)
+            self._retries = 0
+
+            done = time.monotonic()
+            flush_ms = (done - start) * 1000
+            lag_ms = (done - oldest) * 1000
+            m = self.metrics
+            m["rows_written"] += rows
+            m["flushes"] += 1
+            m["last_batch"] = rows
+            m["last_flush_ms"] = flush_ms
+            m["max_flush_ms"] = max(m["max_flush_ms"], flush_ms)
+            m["last_lag_ms"] = lag_ms
+            m["max_lag_ms"] = max(m["max_lag_ms"], lag_ms)
+            return rows
+
+    def _write_isolating(self, conn, buffers, error):
+        """Writes what can be written after a failed flush; returns the rows written."""
+        if _transient(error):  # still locked after the retries: give the batch up
+            for sql, batch in buffers.items():
+                self._dead_letter(sql, batch, error)
+            return 0
+        try:
+            with conn:
+                conn.execute("BEGIN")
+                return sum(self._bisect(conn, sql, batch) for sql, batch in buffers.items())
+        except sqlite3.Error as e:
+            for sql, batch in buffers.items():
+                self._dead_letter(sql, batch, e)
+            return 0
+
+    def _bisect(self, conn, sql, rows):
+        """Inserts `rows` under a savepoint, splitting on failure down to the bad rows."""
+        conn.execute("SAVEPOINT bulk_rows")
+        try:
+            conn.executemany(sql, rows)
+        except sqlite3.Error as e:
+            conn.execute("ROLLBACK TO bulk_rows")
+            conn.execute("RELEASE bulk_rows")
+            if len(rows) == 1:
+                self._dead_letter(sql, rows, e)
+                return 0
+            mid = len(rows) // 2
+            return self._bisect(conn, sql, rows[:mid]) + self._bisect(conn, sql, rows[mid:])
+        conn.execute("RELEASE bulk_rows")
+        return len(rows)
+
+    def _dead_letter(self, sql, rows, error):
+        self.metrics["dead_rows"] += len(rows)
+        self.dead_letters.extend((sql, row, repr(error)) for row in rows)
+        logger.error(f"Bulk writer: {len(rows)} row(s) dead-lettered ({error})")
+
+    def _requeue(self, buffers, oldest):
+        """Puts a failed batch back in front of anything queued meanwhile."""
+        with self._lock:
+            for sql, batch in self._buffers.items():
+                buffers.setdefault(sql, []).extend(batch)
+            self._pending = sum(len(batch) for batch in buffers.values())
+            self._buffers = buffers
+            self._oldest = oldest
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.max_delay)
+            self._wake.clear()
+            if self._pending:
+                self.flush()
+
+    def get_metrics(self):
+        return {**self.metrics, "pending": self._pending, "lag_ms": self.lag() * 1000}
+
+    def close(self):
+        """Stops the writer thread and guarantees everything buffered is written."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        _WRITERS.discard(self)
@@ -1,6 +1,9 @@
 from datetime import datetime
 
 from config.config import Config
+from src.audit import get_audit_log
+from utils.notifier import TelegramNotifier
+from utils.write_behind import flush_all
 
 
 class ComplianceGuard:
@@ -39,8 +42,13 @@ class ComplianceGuard:
 ╚════════════════════════════════════════════════════════════════╝
         """
         print(alert_msg)
-        with open(Config.AUDIT_FILE, "a", encoding="utf-8") as f:
-            f.write(f"\n{timestamp} | KILL_SWITCH_ACTIVATED | {reason} | {details}\n")
+        get_audit_log().write_text(
+            f"\n{timestamp} | KILL_SWITCH_ACTIVATED | {reason} | {details}\n"
+        )
+        # Jumps the alert queue: goes out ahead of any pending trade digests
+        TelegramNotifier.notify(f"🚨 *KILL SWITCH ACTIVATED*\n{reason}\n{details}", urgent=True)
+        # Nothing queued (journal, audit) may be lost if the process is stopped now
+        flush_all(durable=True)
 
     def can_trade(self):
         return self.is_alive
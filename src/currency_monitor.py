@@ -1,12 +1,13 @@
 import logging
 
-import yfinance as yf
+from utils.market_data import get_market_data
 
 
 class CurrencyMonitor:
     """Monitor currency pairs and dollar index."""
 
-    def __init__(self):
+    def __init__(self, market_data=None):
+        self.market_data = market_data or get_market_data()
         self.usdinr_price = None
         self.dxy_price = None
         self.usdinr_change_pct = None
@@ -14,16 +15,10 @@ class CurrencyMonitor:
 
     def fetch_currencies(self):
         try:
-            usdinr = yf.download("USDINR=X", period="2d", progress=False)
-            self.usdinr_price = usdinr["Close"].iloc[-1]
-            self.usdinr_change_pct = (
-                (usdinr["Close"].iloc[-1] - usdinr["Close"].iloc[-2]) / usdinr["Close"].iloc[-2]
-            ) * 100
-            dxy = yf.download("^DXY", period="2d", progress=False)
-            self.dxy_price = dxy["Close"].iloc[-1]
-            self.dxy_change_pct = (
-                (dxy["Close"].iloc[-1] - dxy["Close"].iloc[-2]) / dxy["Close"].iloc[-2]
-            ) * 100
+            # One combined download for both pairs, shared with other monitors via the cache
+            quotes = self.market_data.change_pct(["USDINR=X", "^DXY"], period="2d")
+            self.usdinr_price, self.usdinr_change_pct = quotes["USDINR=X"]
+            self.dxy_price, self.dxy_change_pct = quotes["^DXY"]
             logging.info(
                 f"USD/INR: {self.usdinr_price:.2f} ({self.usdinr_change_pct:+.2f}%), DXY: {self.dxy_price:.2f} ({self.dxy_change_pct:+.2f}%)"
             )
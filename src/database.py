@@ -1,43 +1,130 @@
 import sqlite3
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
 from config.config import Config
+from src.bulk_writer import BulkWriter
+from src.tick_store import TickStore
+from utils.migrations import Migration, apply_pragmas, migrate, query_plans
+
+SQL_INSERT_FEATURES = """
+    INSERT INTO features
+    (timestamp, symbol, rsi, macd, bb_width, adx, bid_ask_spread, order_imbalance, usdinr, us_yield, au_ag_ratio, monsoon_factor, real_yield, import_duty, duty_shock, lunar_demand, fair_value)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+# Incremental daily_pnl upkeep: counters add up, max_drawdown keeps the worst loss
+SQL_UPSERT_DAILY_PNL = """
+    INSERT INTO daily_pnl (date, total_trades, winning_trades, losing_trades, total_pnl, max_drawdown)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(date) DO UPDATE SET
+        total_trades = total_trades + excluded.total_trades,
+        winning_trades = winning_trades + excluded.winning_trades,
+        losing_trades = losing_trades + excluded.losing_trades,
+        total_pnl = total_pnl + excluded.total_pnl,
+        max_drawdown = MAX(max_drawdown, excluded.max_drawdown)
+"""
+# Full recompute from trades (backfill / repair); same rules as the old Python loop
+SQL_AGGREGATE_DAILY_PNL = """
+    SELECT substr(timestamp, 1, 10) AS date,
+           COUNT(*) AS total_trades,
+           COALESCE(SUM(pnl > 0), 0) AS winning_trades,
+           COALESCE(SUM(pnl < 0), 0) AS losing_trades,
+           COALESCE(SUM(pnl), 0) AS total_pnl,
+           COALESCE(MAX(CASE WHEN pnl < 0 THEN -pnl END), 0) AS max_drawdown
+    FROM trades
+"""
+DAILY_PNL_COLUMNS = "date, total_trades, winning_trades, losing_trades, total_pnl, max_drawdown"
+SQL_OPEN_TRADES = "SELECT * FROM trades WHERE status != 'CLOSED' ORDER BY timestamp DESC"
+SQL_TRADES_FOR_DATE = (
+    "SELECT * FROM trades WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp ASC"
+)
+SQL_GET_DAILY_PNL = f"SELECT {DAILY_PNL_COLUMNS} FROM daily_pnl WHERE date = ?"
+
+# Versioned schema changes for the "goldbot" store (see utils/migrations.py)
+MIGRATIONS = [
+    Migration(
+        1,
+        "trade indexes",
+        [
+            # Range scans by day, and open-trade lookups that skip closed history
+            "CREATE INDEX IF NOT EXISTS idx_trades_timestamp ON trades(timestamp)",
+            "CREATE INDEX IF NOT EXISTS idx_trades_open ON trades(timestamp) "
+            "WHERE status != 'CLOSED'",
+        ],
+        ["DROP INDEX IF EXISTS idx_trades_timestamp", "DROP INDEX IF EXISTS idx_trades_open"],
+    ),
+    Migration(
+        2,
+        "backfill daily_pnl",
+        # Older files only had the snapshots calculate_daily_pnl happened to write
+        [
+            f"INSERT OR REPLACE INTO daily_pnl ({DAILY_PNL_COLUMNS}) "
+            f"{SQL_AGGREGATE_DAILY_PNL} GROUP BY substr(timestamp, 1, 10)"
+        ],
+        [],
+    ),
+]
+# Reads the bot and reports issue constantly, with representative parameters
+HOT_QUERIES = {
+    "open_trades": (SQL_OPEN_TRADES, ()),
+    "trades_for_date": (SQL_TRADES_FOR_DATE, ("2026-01-05", "2026-01-06")),
+    "daily_pnl": (SQL_GET_DAILY_PNL, ("2026-01-05",)),
+}
+
+FEATURE_NAMES = [
+    "rsi",
+    "macd",
+    "bb_width",
+    "adx",
+    "bid_ask_spread",
+    "order_imbalance",
+    "usdinr",
+    "us_yield",
+    "au_ag_ratio",
+    "monsoon_factor",
+    "real_yield",
+    "import_duty",
+    "duty_shock",
+    "lunar_demand",
+    "fair_value",
+]
+
+
+def _day_bounds(date_str):
+    """[day, next day) as strings comparable with stored timestamps (index-friendly)"""
+    day = date.fromisoformat(str(date_str)[:10])
+    return day.isoformat(), (day + timedelta(days=1)).isoformat()
 
 
 class Database:
-    """SQLite database for market data and trades"""
+    """
+    SQLite database for market data and trades.
+    Ticks and feature vectors go through a BulkWriter (batched executemany);
+    reads flush it first, so callers always see their own writes.
+    Ticks are stored in daily partitions with M1/M5 rollups (see TickStore).
+    daily_pnl is kept current as trades are logged and closed, so reports are
+    a single keyed read rather than a pass over the day's trades.
+    """
 
-    def __init__(self, db_path="goldbot.db"):
+    def __init__(self, db_path="goldbot.db", buffered=True, tick_options=None, **writer_options):
         self.db_path = db_path
+        # Before initialize(): the tick store sets auto_vacuum, which needs an empty file
+        self.ticks = TickStore(db_path, **(tick_options or {}))
         self.initialize()
+        self.writer = BulkWriter(db_path, background=buffered, **writer_options)
+        if not buffered:
+            # Unbuffered mode keeps the old one-commit-per-row behaviour
+            self.writer.max_rows = 1
 
     def get_connection(self):
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
-        return conn
+        return apply_pragmas(conn)
 
     def initialize(self):
         """Create tables"""
         conn = self.get_connection()
         cursor = conn.cursor()
 
-        # Market ticks table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS market_ticks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME NOT NULL,
-                symbol TEXT NOT NULL,
-                open REAL NOT NULL,
-                high REAL NOT NULL,
-                low REAL NOT NULL,
-                close REAL NOT NULL,
-                volume INTEGER,
-                bid REAL,
-                ask REAL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
         # Trades table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS trades (
@@ -87,37 +174,45 @@ class Database:
         """)
 
         conn.commit()
+        migrate(conn, "goldbot", MIGRATIONS)
         conn.close()
         print(f"✅ Database initialized: {self.db_path}")
 
     def insert_tick(self, symbol, open_p, high, low, close, volume, bid=None, ask=None):
-        """Insert market tick"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        timestamp = datetime.now()
-        cursor.execute(
-            """
-            INSERT INTO market_ticks (timestamp, symbol, open, high, low, close, volume, bid, ask)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-            (timestamp, symbol, open_p, high, low, close, volume, bid, ask),
+        """Queue market tick (timestamped now, written by the next bulk flush)"""
+        now = datetime.now()
+        self.writer.add(
+            self.ticks.insert_sql(now),
+            (now.isoformat(" "), symbol, open_p, high, low, close, volume, bid, ask),
         )
-        conn.commit()
-        conn.close()
+
+    def flush(self):
+        """Write all buffered ticks/features now"""
+        return self.writer.flush()
+
+    def get_write_metrics(self):
+        """Flush lag, batch sizes and backlog of the tick/feature writer"""
+        return self.writer.get_metrics()
+
+    def close(self):
+        """Flush and stop the background writer"""
+        self.writer.close()
 
     def get_latest_ticks(self, symbol, limit=100):
-        """Get last N ticks"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT * FROM market_ticks WHERE symbol = ? ORDER BY timestamp DESC LIMIT ?
-        """,
-            (symbol, limit),
-        )
-        rows = cursor.fetchall()
-        conn.close()
-        return [dict(row) for row in reversed(rows)]
+        """Get last N ticks (newest partitions only, via the (symbol, timestamp) index)"""
+        self.flush()
+        return self.ticks.latest_ticks(symbol, limit)
+
+    def get_bars(self, symbol, start, end, resolution=None):
+        """Ticks or M1/M5 bars for a range; see TickStore.query"""
+        self.flush()
+        return self.ticks.query(symbol, start, end, resolution)
+
+    def maintain(self, now=None):
+        """Migrate legacy ticks, roll up closed days, enforce retention"""
+        self.flush()
+        self.ticks.migrate_legacy()
+        return self.ticks.maintain(now)
 
     def insert_trade(
         self, symbol, side, quantity, entry_price, algo_id=None, order_id=None, status="PENDING"
@@ -135,13 +230,14 @@ class Database:
         """,
             (timestamp, algo_id, symbol, side, quantity, entry_price, status, order_id),
         )
+        cursor.execute(SQL_UPSERT_DAILY_PNL, (timestamp.date().isoformat(), 1, 0, 0, 0, 0))
         conn.commit()
         trade_id = cursor.lastrowid
         conn.close()
         return trade_id
 
     def close_trade(self, trade_id, exit_price):
-        """Close trade and calculate P&L"""
+        """Close trade, calculate P&L and fold it into the day's daily_pnl row"""
         conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM trades WHERE id = ?", (trade_id,))
@@ -157,10 +253,24 @@ class Database:
 
         cursor.execute(
             """
-            UPDATE trades SET exit_price = ?, pnl = ?, status = 'CLOSED' WHERE id = ?
+            UPDATE trades SET exit_price = ?, pnl = ?, status = 'CLOSED'
+            WHERE id = ? AND status IS NOT 'CLOSED'
         """,
             (exit_price, pnl, trade_id),
         )
+        if cursor.rowcount:
+            # Same transaction as the UPDATE; a repeated close is not counted twice
+            cursor.execute(
+                SQL_UPSERT_DAILY_PNL,
+                (
+                    str(trade["timestamp"])[:10],
+                    0,
+                    int(pnl > 0),
+                    int(pnl < 0),
+                    pnl,
+                    -pnl if pnl < 0 else 0,
+                ),
+            )
 
         conn.commit()
         conn.close()
@@ -170,9 +280,8 @@ class Database:
         """Get all open trades"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT * FROM trades WHERE status != 'CLOSED' ORDER BY timestamp DESC
-        """)
+        # Predicate matches idx_trades_open, which also supplies the order
+        cursor.execute(SQL_OPEN_TRADES)
         rows = cursor.fetchall()
         conn.close()
         return [dict(row) for row in rows]
@@ -181,90 +290,62 @@ class Database:
         """Get trades for a date"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT * FROM trades WHERE DATE(timestamp) = ? ORDER BY timestamp ASC
-        """,
-            (date_str,),
-        )
+        cursor.execute(SQL_TRADES_FOR_DATE, _day_bounds(date_str))
         rows = cursor.fetchall()
         conn.close()
         return [dict(row) for row in rows]
 
     def insert_features(self, symbol, features_dict):
-        """Insert feature vector"""
+        """Queue feature vector"""
+        timestamp = datetime.now().isoformat(" ")
+        values = tuple(features_dict.get(name, 0) for name in FEATURE_NAMES)
+        self.writer.add(SQL_INSERT_FEATURES, (timestamp, symbol, *values))
+
+    def get_daily_pnl(self, date_str):
+        """Materialized P&L summary for a date (one keyed read), or None"""
         conn = self.get_connection()
-        cursor = conn.cursor()
-        timestamp = datetime.now()
-        cursor.execute(
-            """
-            INSERT INTO features
-            (timestamp, symbol, rsi, macd, bb_width, adx, bid_ask_spread, order_imbalance, usdinr, us_yield, au_ag_ratio, monsoon_factor, real_yield, import_duty, duty_shock, lunar_demand, fair_value)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-            (
-                timestamp,
-                symbol,
-                features_dict.get("rsi", 0),
-                features_dict.get("macd", 0),
-                features_dict.get("bb_width", 0),
-                features_dict.get("adx", 0),
-                features_dict.get("bid_ask_spread", 0),
-                features_dict.get("order_imbalance", 0),
-                features_dict.get("usdinr", 0),
-                features_dict.get("us_yield", 0),
-                features_dict.get("au_ag_ratio", 0),
-                features_dict.get("monsoon_factor", 0),
-                features_dict.get("real_yield", 0),
-                features_dict.get("import_duty", 0),
-                features_dict.get("duty_shock", 0),
-                features_dict.get("lunar_demand", 0),
-                features_dict.get("fair_value", 0),
-            ),
-        )
-        conn.commit()
+        row = conn.execute(SQL_GET_DAILY_PNL, (date_str,)).fetchone()
+        conn.close()
+        return dict(row) if row else None
+
+    def rebuild_daily_pnl(self, date_str):
+        """Recompute a date's daily_pnl row from trades in SQL (repair path)"""
+        conn = self.get_connection()
+        summary = None
+        with conn:
+            row = conn.execute(
+                f"{SQL_AGGREGATE_DAILY_PNL} WHERE timestamp >= ? AND timestamp < ?",
+                _day_bounds(date_str),
+            ).fetchone()
+            if row["total_trades"]:
+                summary = {**dict(row), "date": date_str}
+                conn.execute(
+                    f"INSERT OR REPLACE INTO daily_pnl ({DAILY_PNL_COLUMNS}) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    tuple(summary[name] for name in DAILY_PNL_COLUMNS.split(", ")),
+                )
+            else:
+                conn.execute("DELETE FROM daily_pnl WHERE date = ?", (date_str,))
         conn.close()
+        return summary
 
     def calculate_daily_pnl(self, date_str):
-        """Calculate daily P&L"""
-        trades = self.get_trades_for_date(date_str)
-        if not trades:
-            return None
-
-        total_trades = len(trades)
-        winning_trades = sum(1 for t in trades if t["pnl"] and t["pnl"] > 0)
-        losing_trades = sum(1 for t in trades if t["pnl"] and t["pnl"] < 0)
-        total_pnl = sum(t["pnl"] for t in trades if t["pnl"])
-        drawdowns = [abs(t["pnl"]) for t in trades if t["pnl"] and t["pnl"] < 0]
-        max_drawdown = max(drawdowns) if drawdowns else 0
+        """Daily P&L (kept current by insert_trade/close_trade; no per-trade pass)"""
+        return self.get_daily_pnl(date_str)
 
+    def query_plans(self):
+        """EXPLAIN QUERY PLAN of every hot query against this file"""
         conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT OR REPLACE INTO daily_pnl (date, total_trades, winning_trades, losing_trades, total_pnl, max_drawdown)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """,
-            (date_str, total_trades, winning_trades, losing_trades, total_pnl, max_drawdown),
-        )
-        conn.commit()
+        plans = query_plans(conn, HOT_QUERIES)
         conn.close()
-
-        return {
-            "date": date_str,
-            "total_trades": total_trades,
-            "winning_trades": winning_trades,
-            "losing_trades": losing_trades,
-            "total_pnl": total_pnl,
-            "max_drawdown": max_drawdown,
-        }
+        return plans
 
     def get_stats(self):
         """Get database stats"""
+        self.flush()
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM market_ticks")
-        ticks = cursor.fetchone()[0]
+        ticks = self.ticks.count()
         cursor.execute("SELECT COUNT(*) FROM trades")
         trades = cursor.fetchone()[0]
         cursor.execute("SELECT COUNT(*) FROM features")
@@ -278,3 +359,4 @@ if __name__ == "__main__":
     db.insert_tick("MCX:GOLDPETAL", 68500, 68550, 68450, 68510, 5000, 68505, 68515)
     ticks = db.get_latest_ticks("MCX:GOLDPETAL")
     print(f"✅ Database working. {len(ticks)} ticks found")
+    db.close()
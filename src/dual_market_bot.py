@@ -4,14 +4,14 @@ import sys
 import time
 from datetime import datetime
 
-import yfinance as yf
-
 from alpaca_connector import AlpacaConnector
 from broker_manager import BrokerManager
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from utils.market_data import get_market_data  # noqa: E402
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
@@ -24,9 +24,8 @@ class DualMarketBot:
 
     def get_price(self):
         try:
-            # Download 1 day of data, 1-minute interval
-            ticker = yf.Ticker(self.symbol)
-            data = ticker.history(period="1d", interval="1m")
+            # 1 day of 1-minute data, shared through the market data cache
+            data = get_market_data().get_history(self.symbol, period="1d", interval="1m")
 
             if data.empty:
                 logging.error(f"No data found for {self.symbol}")
@@ -77,11 +76,17 @@ class DualMarketBot:
         Primary: GC=F (Gold Futures)
         Fallback: GLD (Gold ETF)
         """
+        # Primary and fallback in one combined request
+        frames = {}
+        try:
+            frames = get_market_data().get_many(["GC=F", "GLD"], period="1d")
+        except Exception as e:
+            logger.warning(f"Gold price download failed: {e}")
+
         try:
             # Primary: Gold Futures (GC=F)
             logger.info("Fetching gold price from GC=F (Gold Futures)...")
-            gold_futures = yf.Ticker("GC=F")
-            data = gold_futures.history(period="1d")
+            data = frames["GC=F"]
 
             if not data.empty and "Close" in data.columns:
                 price = data["Close"].iloc[-1]
@@ -96,8 +101,7 @@ class DualMarketBot:
         try:
             # Fallback: GLD ETF (divide by ~10 for oz price approximation)
             logger.info("Fetching gold price from GLD (Gold ETF)...")
-            gld = yf.Ticker("GLD")
-            data = gld.history(period="1d")
+            data = frames["GLD"]
 
             if not data.empty and "Close" in data.columns:
                 gld_price = data["Close"].iloc[-1]
@@ -281,8 +285,7 @@ class DualMarketGoldBot:
 
         # Method 1: Try Gold Futures (GC=F) - Most reliable
         try:
-            gold_futures = yf.Ticker("GC=F")
-            data = gold_futures.history(period="1d")
+            data = get_market_data().get_history("GC=F", period="1d")
             if not data.empty:
                 price = data["Close"].iloc[-1]
                 if 2000 < price < 3500:  # Sanity check
@@ -294,8 +297,7 @@ class DualMarketGoldBot:
 
         # Method 2: Derive from GLD (always works)
         try:
-            gld = yf.Ticker("GLD")
-            data = gld.history(period="1d", interval="1m")
+            data = get_market_data().get_history("GLD", period="1d", interval="1m")
             if not data.empty:
                 gld_price = data["Close"].iloc[-1]
                 prices["gld"] = gld_price
@@ -312,8 +314,7 @@ class DualMarketGoldBot:
 
         # Method 3: Try XAUUSD=X as last resort
         try:
-            gold_spot = yf.Ticker("XAUUSD=X")
-            data = gold_spot.history(period="5d")  # Wider period
+            data = get_market_data().get_history("XAUUSD=X", period="5d")  # Wider period
             if not data.empty:
                 price = data["Close"].iloc[-1]
                 if 2000 < price < 3500:
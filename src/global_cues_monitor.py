@@ -1,49 +1,53 @@
 import logging
 
-import yfinance as yf
+from utils.market_data import get_market_data
+
+SGX_SYMBOL = "^NSEI"
+US_SYMBOLS = {"Dow": "^DJI", "S&P 500": "^GSPC", "Nasdaq": "^IXIC"}
+ASIA_SYMBOLS = {"Nikkei": "^N225", "Hang Seng": "^HSI"}
 
 
 class GlobalCuesMonitor:
     """Monitor global markets for bias direction."""
 
-    def __init__(self):
+    def __init__(self, market_data=None):
+        self.market_data = market_data or get_market_data()
         self.sgx_nifty = None
         self.us_futures = {}
         self.asia_indices = {}
         self.session_bias = None
 
+    def prefetch(self):
+        """Downloads every cue in ONE request; the fetch_* calls below then hit the cache."""
+        tickers = [SGX_SYMBOL, *US_SYMBOLS.values(), *ASIA_SYMBOLS.values()]
+        try:
+            self.market_data.get_many(tickers, period="2d")
+        except Exception as e:
+            logging.warning(f"Global cues prefetch failed: {str(e)}")
+
     def fetch_sgx_nifty(self):
         try:
-            sgx = yf.download("^NSEI", period="2d", progress=False)
-            self.sgx_nifty = sgx["Close"].iloc[-1] - sgx["Close"].iloc[-2]
+            close = self.market_data.get_history(SGX_SYMBOL, period="2d")["Close"]
+            self.sgx_nifty = close.iloc[-1] - close.iloc[-2]
             return self.sgx_nifty
         except Exception as e:
             logging.warning(f"SGX fetch failed: {str(e)}")
             return None
 
-    def fetch_us_futures(self):
-        symbols = {"Dow": "^DJI", "S&P 500": "^GSPC", "Nasdaq": "^IXIC"}
+    def _fetch_changes(self, symbols, target, label):
+        quotes = self.market_data.change_pct(list(symbols.values()), period="2d")
         for name, symbol in symbols.items():
-            try:
-                data = yf.download(symbol, period="2d", progress=False)
-                change_pct = (
-                    (data["Close"].iloc[-1] - data["Close"].iloc[-2]) / data["Close"].iloc[-2]
-                ) * 100
-                self.us_futures[name] = change_pct
-            except Exception as e:
-                logging.warning(f"US futures fetch failed for {name}: {str(e)}")
+            _, change_pct = quotes.get(symbol, (None, None))
+            if change_pct is None:
+                logging.warning(f"{label} fetch failed for {name}: no data")
+                continue
+            target[name] = change_pct
+
+    def fetch_us_futures(self):
+        self._fetch_changes(US_SYMBOLS, self.us_futures, "US futures")
 
     def fetch_asia_indices(self):
-        symbols = {"Nikkei": "^N225", "Hang Seng": "^HSI"}
-        for name, symbol in symbols.items():
-            try:
-                data = yf.download(symbol, period="2d", progress=False)
-                change_pct = (
-                    (data["Close"].iloc[-1] - data["Close"].iloc[-2]) / data["Close"].iloc[-2]
-                ) * 100
-                self.asia_indices[name] = change_pct
-            except Exception as e:
-                logging.warning(f"Asia fetch failed for {name}: {str(e)}")
+        self._fetch_changes(ASIA_SYMBOLS, self.asia_indices, "Asia")
 
     def determine_session_bias(self):
         bias_scores = []
@@ -69,6 +73,7 @@ class GlobalCuesMonitor:
 
 if __name__ == "__main__":
     monitor = GlobalCuesMonitor()
+    monitor.prefetch()
     monitor.fetch_sgx_nifty()
     monitor.fetch_us_futures()
     monitor.fetch_asia_indices()
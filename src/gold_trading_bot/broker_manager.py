@@ -4,21 +4,41 @@ Handles both Alpaca (XAUUSD/GLD) and Indian Broker (MCX Gold)
 """
 
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 
 import pytz
 
+from config.settings import EXECUTION_CONFIG
+from utils.market_data import get_market_data
+
 logger = logging.getLogger(__name__)
 
 
 class BrokerManager:
-    """Manages multiple brokers for dual-market trading"""
+    """
+    Manages multiple brokers for dual-market trading.
+    Position queries fan out to every broker at once, each with its own
+    deadline, into a short-lived snapshot that exposure, P&L and risk checks
+    share: a trading cycle costs one round trip per broker, however many
+    callers ask.
+    """
 
     def __init__(self, config: dict):
         self.config = config
         self.brokers = {}
-        self.positions = {}
+        self.positions = {}  # {broker: (fetched_at, positions)}, the shared snapshot
         self.active_markets = []
+        self.positions_ttl = config.get("positions_ttl_s", EXECUTION_CONFIG["positions_ttl_s"])
+        self.positions_timeout = config.get(
+            "positions_timeout_s", EXECUTION_CONFIG["positions_timeout_s"]
+        )
+        self.usd_inr = EXECUTION_CONFIG["usd_inr_fallback"]  # last good USD/INR rate
+        self._inflight = {}  # {broker: Future of a get_positions() still running}
+        self._lock = threading.Lock()
+        self._executor = None
 
     def add_broker(self, name: str, connector):
         """Add a broker connector"""
@@ -35,43 +55,108 @@ class BrokerManager:
             logger.error(f"❌ Error adding {name}: {e}")
             return False
 
-    def get_all_positions(self) -> dict:
-        """Get positions from all brokers"""
-        all_positions = {}
-
-        for name, broker in self.brokers.items():
-            try:
-                positions = broker.get_positions()
-                all_positions[name] = positions
-                logger.info(f"📋 {name}: {len(positions)} positions")
-            except Exception as e:
-                logger.error(f"❌ Error fetching {name} positions: {e}")
-                all_positions[name] = []
-
-        return all_positions
+    # --- POSITION SNAPSHOT ---
 
-    def get_total_exposure(self) -> dict:
-        """Calculate total exposure across all markets"""
-        exposure = {"alpaca_usd": 0, "mcx_inr": 0, "total_usd": 0}
+    def _store_positions(self, name, future):
+        with self._lock:
+            current = self._inflight.get(name) is future
+            if current:
+                del self._inflight[name]
+        try:
+            positions = future.result()
+        except Exception as e:
+            logger.error(f"❌ Error fetching {name} positions: {e}")
+            return
+        if not current:
+            return  # invalidated while in flight: predates the change
+        with self._lock:
+            self.positions[name] = (time.monotonic(), positions)
+        logger.info(f"📋 {name}: {len(positions)} positions")
+
+    def get_all_positions(self, max_age=None) -> dict:
+        """
+        Get positions from all brokers, concurrently.
+        Brokers whose snapshot is younger than `max_age` (default
+        positions_ttl_s) are not asked again, and a call already in flight is
+        joined rather than repeated. A broker that fails or misses the
+        deadline keeps its last positions ([] if it never answered); a late
+        answer still lands in the snapshot.
+        """
+        max_age = self.positions_ttl if max_age is None else max_age
+        now = time.monotonic()
+        pending, started = [], []
+        with self._lock:
+            for name, broker in self.brokers.items():
+                cached = self.positions.get(name)
+                if cached is not None and now - cached[0] < max_age:
+                    continue
+                future = self._inflight.get(name)
+                if future is None:
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=max(4, len(self.brokers)), thread_name_prefix="brokers"
+                        )
+                    future = self._inflight[name] = self._executor.submit(broker.get_positions)
+                    started.append((name, future))
+                pending.append((name, future))
+
+        for name, future in started:
+            future.add_done_callback(lambda f, name=name: self._store_positions(name, f))
+        if pending:
+            _, late = wait([future for _, future in pending], timeout=self.positions_timeout)
+            for name, future in pending:
+                if future in late:
+                    logger.error(f"❌ {name} positions timed out after {self.positions_timeout}s")
+
+        with self._lock:
+            return {name: list(self.positions.get(name, (0, []))[1]) for name in self.brokers}
+
+    def invalidate_positions(self, market: str | None = None):
+        """Drops the snapshot of `market` (or all) so the next query asks the broker again."""
+        with self._lock:
+            for name in list(self.brokers) if market is None else [market]:
+                self.positions.pop(name, None)
+                self._inflight.pop(name, None)
+
+    def get_usd_inr(self) -> float:
+        """Live USD/INR from the shared market data cache; the last good rate if it fails."""
+        try:
+            rate = get_market_data().last_close(EXECUTION_CONFIG["usd_inr_ticker"])
+        except Exception as e:
+            logger.warning(f"⚠️ USD/INR fetch failed, using {self.usd_inr}: {e}")
+            rate = None
+        if rate:
+            self.usd_inr = rate
+        return self.usd_inr
 
-        all_positions = self.get_all_positions()
+    def _sum_by_market(self, all_positions, value) -> dict:
+        """value(position) summed per market, MCX (INR) converted at the live rate."""
+        totals = {"alpaca_usd": 0, "mcx_inr": 0, "total_usd": 0}
 
-        # Alpaca exposure (USD)
-        if "alpaca" in all_positions:
-            for pos in all_positions["alpaca"]:
-                exposure["alpaca_usd"] += abs(pos.get("market_value", 0))
+        # Alpaca (USD)
+        for pos in all_positions.get("alpaca", []):
+            totals["alpaca_usd"] += value(pos)
 
-        # MCX exposure (INR converted to USD)
+        # MCX (INR converted to USD)
         if "mcx" in all_positions:
-            usd_inr = 83.50  # Update with current rate
+            totals["usd_inr"] = usd_inr = self.get_usd_inr()
             for pos in all_positions["mcx"]:
-                inr_value = abs(pos.get("market_value", 0))
-                exposure["mcx_inr"] += inr_value
-                exposure["total_usd"] += inr_value / usd_inr
+                inr_value = value(pos)
+                totals["mcx_inr"] += inr_value
+                totals["total_usd"] += inr_value / usd_inr
+
+        totals["total_usd"] += totals["alpaca_usd"]
+        return totals
 
-        exposure["total_usd"] += exposure["alpaca_usd"]
+    def get_total_exposure(self, all_positions=None) -> dict:
+        """Calculate total exposure across all markets (from the shared snapshot)"""
+        all_positions = self.get_all_positions() if all_positions is None else all_positions
+        return self._sum_by_market(all_positions, lambda pos: abs(pos.get("market_value", 0)))
 
-        return exposure
+    def get_unrealized_pnl(self, all_positions=None) -> dict:
+        """Open P&L across all markets (from the shared snapshot)"""
+        all_positions = self.get_all_positions() if all_positions is None else all_positions
+        return self._sum_by_market(all_positions, lambda pos: pos.get("unrealized_pl", 0))
 
     def is_market_open(self, market: str) -> bool:
         """Check if specific market is currently open"""
@@ -113,6 +198,7 @@ class BrokerManager:
         try:
             order_id = self.brokers[market].place_order(**kwargs)
             if order_id:
+                self.invalidate_positions(market)
                 logger.info(f"✅ Order placed on {market}: {order_id}")
             return order_id
         except Exception as e:
@@ -126,6 +212,7 @@ class BrokerManager:
 
         try:
             result = self.brokers[market].close_all_positions()
+            self.invalidate_positions(market)
             logger.info(f"🔒 Closed all {market} positions")
             return result
         except Exception as e:
@@ -140,6 +227,9 @@ class BrokerManager:
                 logger.info(f"👋 Disconnected from {name}")
             except Exception as e:
                 logger.error(f"❌ Error disconnecting {name}: {e}")
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
 
 
 # Example usage
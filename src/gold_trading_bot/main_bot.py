@@ -301,7 +301,9 @@ class GoldTradingBot:
 
             # ========== PHASE 2: Initialize Gateway ==========
             logger.info("[2/5] Initializing pre-trade gateway...")
-            self.pretrade_gateway = self._initialize_gateway()
+            # Built once so verdict caches and last-known values survive between cycles
+            if self.pretrade_gateway is None:
+                self.pretrade_gateway = self._initialize_gateway()
             logger.info(" Gateway initialized with 8 modules")
 
             # ========== PHASE 3: Run Gateway Checks ==========
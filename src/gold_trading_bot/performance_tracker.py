@@ -8,17 +8,36 @@ import pandas as pd
 import datetime
 import os
 
-TRADE_JOURNAL_PATH = os.path.join("data", "trade_journal.csv")
+from dateutil.tz import tzlocal
+
+from execution.journal_manager import JOURNAL_FIELDS, JournalManager
+
 PERFORMANCE_REPORT_PATH = os.path.join("reports", "daily_performance_report.csv")
+TRACKER_COLUMNS = ["timestamp", "symbol", "side", "qty", "price", "strategy", "pnl", "fees"]
 
 
-def load_trade_journal():
-    if os.path.exists(TRADE_JOURNAL_PATH):
-        return pd.read_csv(TRADE_JOURNAL_PATH)
-    else:
-        return pd.DataFrame(columns=[
-            "timestamp", "symbol", "side", "qty", "price", "strategy", "pnl", "fees"
-        ])
+def load_trade_journal(start=None, end=None):
+    """Journal trades closed in [start, end), fetched via the sidecar index."""
+    if not os.path.exists(JournalManager.FILE_PATH):
+        return pd.DataFrame(columns=TRACKER_COLUMNS)
+    index = JournalManager.get_index()
+    entries = index.between(start, end)
+    journal = pd.DataFrame(index.read_rows(entries), columns=JOURNAL_FIELDS)
+    # Index stamps are epoch seconds; the journal was written in naive local time
+    closed = pd.Series(pd.to_datetime(entries["ts"], unit="s", utc=True))
+    return pd.DataFrame(
+        {
+            "timestamp": closed.dt.tz_convert(tzlocal()).dt.tz_localize(None),
+            "symbol": journal["Symbol"],
+            "side": journal["Direction"],
+            "qty": journal["Size"],
+            "price": journal["Exit Price"],
+            "strategy": journal["Strategy"],
+            "pnl": entries["pnl"],
+            "fees": 0.0,
+        },
+        columns=TRACKER_COLUMNS,
+    )
 
 def compute_performance_metrics(df):
     if df.empty:
@@ -47,9 +66,8 @@ def daily_pnl_analysis(df):
     return df.groupby("date")["pnl"].sum().reset_index()
 
 def generate_daily_report():
-    df = load_trade_journal()
     today = datetime.date.today()
-    today_trades = df[pd.to_datetime(df["timestamp"]).dt.date == today]
+    today_trades = load_trade_journal(today, today + datetime.timedelta(days=1))
     metrics = compute_performance_metrics(today_trades)
     strat_comp = compare_strategies(today_trades)
     daily_pnl = daily_pnl_analysis(today_trades)
@@ -1,7 +1,216 @@
 """
 StopLossManager: ATR-based stop loss logic.
 """
+
+import numpy as np
+
+SL_HIT, TP_HIT, TRAIL_HIT = "SL_HIT", "TP_HIT", "TRAIL_HIT"
+
+
+class _SymbolStops:
+    """
+    Parallel arrays for one symbol's positions; rows [0, n) are live.
+    Levels are stored signed (side * price, side +1 long / -1 short) so one
+    comparison serves both directions: a stop fires when side * price <= sl,
+    a target when side * price >= tp. NaN means no level.
+    """
+
+    ARRAYS = ("ids", "side", "sl", "tp", "trail", "atr_mult", "extreme", "trailed")
+
+    def __init__(self, capacity=16):
+        self.n = 0
+        self.rows = {}  # position_id -> row
+        self.atr = np.nan  # latest ATR seen for the symbol
+        self.ids = np.zeros(capacity, np.int64)
+        self.side = np.zeros(capacity)
+        self.sl = np.full(capacity, np.nan)
+        self.tp = np.full(capacity, np.nan)
+        self.trail = np.zeros(capacity)  # fixed trailing distance (price units)
+        self.atr_mult = np.zeros(capacity)  # trailing distance in ATRs (overrides trail)
+        self.extreme = np.full(capacity, -np.inf)  # best signed price since entry
+        self.trailed = np.zeros(capacity, bool)  # stop has been ratcheted
+
+    def _grow(self):
+        for name in self.ARRAYS:
+            old = getattr(self, name)
+            new = np.empty(len(old) * 2, old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, position_id, side, sl, tp, trail, atr_mult, entry):
+        if self.n == len(self.ids):
+            self._grow()
+        row = self.n
+        self.rows[position_id] = row
+        self.ids[row] = position_id
+        self.side[row] = side
+        self.sl[row] = side * sl if sl else np.nan
+        self.tp[row] = side * tp if tp else np.nan
+        self.trail[row] = trail or 0.0
+        self.atr_mult[row] = atr_mult or 0.0
+        self.extreme[row] = side * entry if entry else -np.inf
+        self.trailed[row] = False
+        self.n += 1
+
+    def row(self, position_id):
+        """The position's values across the arrays, for `restore()`."""
+        row = self.rows[position_id]
+        return {name: getattr(self, name)[row] for name in self.ARRAYS}
+
+    def restore(self, values):
+        if self.n == len(self.ids):
+            self._grow()
+        row = self.n
+        for name in self.ARRAYS:
+            getattr(self, name)[row] = values[name]
+        self.rows[int(values["ids"])] = row
+        self.n += 1
+
+    def remove(self, position_id):
+        """Swap-remove: the last row moves into the freed slot (O(1))."""
+        row = self.rows.pop(position_id)
+        last = self.n - 1
+        if row != last:
+            for name in self.ARRAYS:
+                array = getattr(self, name)
+                array[row] = array[last]
+            self.rows[int(self.ids[row])] = row
+        self.n = last
+
+
 class StopLossManager:
-    def calculate_stop(self, price, atr):
-        # Implement ATR-based stop loss
-        pass
+    """
+    Protocol 2.5: Vectorized Stop Management.
+    SL, TP, trailing distance and ATR multiple of every open position live in
+    parallel NumPy arrays per symbol. One `update()` per tick ratchets all
+    trailing stops and finds every triggered exit with a handful of array
+    ops, however many positions and strategies are open, and returns the
+    exits as events for the broker to fill. Triggered positions stay armed
+    until `remove()`, so an exit that fails to fill fires again next tick.
+    Ratcheted levels live in memory; a restart resumes from the stored SL.
+    """
+
+    def __init__(self):
+        self._symbols = {}  # symbol -> _SymbolStops
+        self._where = {}  # position_id -> symbol
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, position_id):
+        return position_id in self._where
+
+    def __iter__(self):
+        return iter(list(self._where))
+
+    def calculate_stop(self, price, atr, multiple=2.0, direction="LONG"):
+        """Initial ATR stop: `multiple` ATRs below a long entry (above a short)."""
+        side = -1 if direction == "SHORT" else 1
+        return price - side * multiple * atr
+
+    # --- POSITIONS ---
+
+    def add(
+        self, position_id, symbol, direction, entry=0.0, sl=0.0, tp=0.0, trail=0.0, atr_mult=0.0
+    ):
+        """Arms a position. `trail` / `atr_mult` > 0 make its stop trail the best price."""
+        if position_id in self._where:
+            self.remove(position_id)
+        stops = self._symbols.setdefault(symbol, _SymbolStops())
+        side = -1 if direction == "SHORT" else 1
+        stops.add(position_id, side, sl, tp, trail, atr_mult, entry)
+        self._where[position_id] = symbol
+
+    def add_position(self, position):
+        """Arms a broker position dict (state cache / DBManager shape)."""
+        self.add(
+            position["id"],
+            position["symbol"],
+            position["type"],
+            entry=position["entry_price"],
+            sl=position.get("sl"),
+            tp=position.get("tp"),
+            trail=position.get("trail"),
+            atr_mult=position.get("atr_mult"),
+        )
+
+    def remove(self, position_id):
+        symbol = self._where.pop(position_id, None)
+        if symbol is None:
+            return False
+        self._symbols[symbol].remove(position_id)
+        return True
+
+    def detach(self, position_id):
+        """Removes a position and returns its armed state (ratchets included), or None."""
+        symbol = self._where.get(position_id)
+        if symbol is None:
+            return None
+        values = self._symbols[symbol].row(position_id)
+        self.remove(position_id)
+        return symbol, values
+
+    def reattach(self, position_id, detached):
+        """Re-arms a position exactly as `detach()` left it."""
+        symbol, values = detached
+        if position_id in self._where:
+            self.remove(position_id)
+        self._symbols.setdefault(symbol, _SymbolStops()).restore(values)
+        self._where[position_id] = symbol
+
+    def levels(self, position_id):
+        """Current {"sl", "tp", "trailed"} prices of a position (0.0 = none), or None."""
+        symbol = self._where.get(position_id)
+        if symbol is None:
+            return None
+        stops = self._symbols[symbol]
+        row = stops.rows[position_id]
+        side = stops.side[row]
+        sl, tp = stops.sl[row], stops.tp[row]
+        return {
+            "sl": 0.0 if np.isnan(sl) else float(side * sl),
+            "tp": 0.0 if np.isnan(tp) else float(side * tp),
+            "trailed": bool(stops.trailed[row]),
+        }
+
+    # --- PER TICK ---
+
+    def update(self, symbol, price, atr=None):
+        """
+        Ratchets trailing stops to the new price (and ATR, if given) and
+        returns the triggered exits as [{"position_id", "symbol", "reason",
+        "price"}], where price is the stop/target level that was crossed.
+        """
+        stops = self._symbols.get(symbol)
+        if stops is None or stops.n == 0:
+            return []
+        n = stops.n
+        if atr is not None:
+            stops.atr = atr
+        side = stops.side[:n]
+        signed = side * price
+
+        extreme = stops.extreme[:n]
+        np.maximum(extreme, signed, out=extreme)
+        atr_mult = stops.atr_mult[:n]
+        distance = np.where(atr_mult > 0, atr_mult * stops.atr, stops.trail[:n])
+        candidate = np.where(distance > 0, extreme - distance, np.nan)
+        sl = stops.sl[:n]
+        raised = ~np.isnan(candidate) & ~(candidate <= sl)  # a stop only ever tightens
+        sl[raised] = candidate[raised]
+        stops.trailed[:n] |= raised
+
+        hit_sl = signed <= sl
+        hit_tp = signed >= stops.tp[:n]
+        rows = np.flatnonzero(hit_sl | hit_tp)
+        if len(rows) == 0:
+            return []
+        return [
+            {
+                "position_id": int(stops.ids[row]),
+                "symbol": symbol,
+                "reason": (TRAIL_HIT if stops.trailed[row] else SL_HIT) if hit_sl[row] else TP_HIT,
+                "price": float(side[row] * (sl[row] if hit_sl[row] else stops.tp[row])),
+            }
+            for row in rows
+        ]
@@ -4,16 +4,45 @@ Coordinates all 8 professional pre-trade checks before any trade execution.
 """
 
 import logging
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from typing import Any
 
 logger = logging.getLogger(__name__)
 
+# Verdict validity windows: seconds, or "daily"/"session" (valid until the next boundary)
+CHECK_VALIDITY = {
+    "DUTY_CONFIRMATION": "daily",
+    "GLOBAL_CUES": 300,
+    "ECONOMIC_CALENDAR": 60,
+    "CURRENCY_MONITOR": 60,
+    "GEOPOLITICAL_RISK": 300,
+    "PIVOT_LEVELS": "session",
+    "SIGNAL_CONFLUENCE": 0,
+    "RISK_MANAGER": 0,
+}
+
+# Per-check deadlines (seconds); the network-bound checks get the longer ones
+CHECK_TIMEOUTS = {
+    "DUTY_CONFIRMATION": 5.0,
+    "GLOBAL_CUES": 4.0,
+    "ECONOMIC_CALENDAR": 4.0,
+    "CURRENCY_MONITOR": 3.0,
+    "GEOPOLITICAL_RISK": 4.0,
+    "PIVOT_LEVELS": 1.0,
+    "SIGNAL_CONFLUENCE": 1.0,
+    "RISK_MANAGER": 1.0,
+}
+
 
 class PreTradeGateway:
     """
-    Orchestrates all pre-trade checks in sequence.
+    Orchestrates all pre-trade checks.
     Returns a "go/no-go" decision with detailed reasoning.
+    In concurrent mode the checks run in parallel with per-check deadlines,
+    so the gateway costs the slowest check rather than the sum of all eight.
     """
 
     def __init__(
@@ -26,6 +55,10 @@ class PreTradeGateway:
         signal_filter=None,
         geo_risk=None,
         risk_manager=None,
+        concurrent=True,
+        timeouts=None,
+        validity=None,
+        session_start_hour=9,
     ):
         self.fiscal_loader = fiscal_loader
         self.global_cues = global_cues
@@ -39,59 +72,116 @@ class PreTradeGateway:
         self.checks_failed = []
         self.last_gateway_decision = None
 
-    def run_all_checks(self) -> tuple[bool, dict[str, Any]]:
+        self.concurrent = concurrent
+        self.timeouts = {**CHECK_TIMEOUTS, **(timeouts or {})}
+        self.validity = {**CHECK_VALIDITY, **(validity or {})}
+        self.session_start_hour = session_start_hour
+        # name -> (context key, method); order is the report order
+        self.checks = [
+            ("DUTY_CONFIRMATION", "fiscal_policy", self._check_fiscal_policy),
+            ("GLOBAL_CUES", "global_cues", self._check_global_cues),
+            ("ECONOMIC_CALENDAR", "economic_calendar", self._check_economic_calendar),
+            ("CURRENCY_MONITOR", "currency_monitor", self._check_currency_monitor),
+            ("GEOPOLITICAL_RISK", "geopolitical_risk", self._check_geopolitical_risk),
+            ("PIVOT_LEVELS", "pivot_levels", self._check_pivot_levels),
+            ("SIGNAL_CONFLUENCE", "signal_confluence", self._check_signal_confluence),
+            ("RISK_MANAGER", "risk_manager", self._check_risk_manager),
+        ]
+        self._verdicts = {}  # name -> (expires_at, passed, ctx)
+        self._last_known = {}  # name -> (passed, ctx, at)
+        self._inflight = {}  # name -> Future still running past its deadline
+        self._lock = threading.Lock()
+        self._executor = None
+
+    # --- VERDICT CACHE ---
+
+    def _expires_at(self, name, now):
+        validity = self.validity.get(name, 0)
+        if validity == "daily":
+            tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+            return tomorrow.timestamp()
+        if validity == "session":
+            boundary = now.replace(hour=self.session_start_hour, minute=0, second=0, microsecond=0)
+            if boundary <= now:
+                boundary += timedelta(days=1)
+            return boundary.timestamp()
+        return now.timestamp() + float(validity)
+
+    def _cached_verdict(self, name):
+        with self._lock:
+            cached = self._verdicts.get(name)
+        if cached and cached[0] > time.time():
+            return cached[1], {**cached[2], "cached": True}
+        return None
+
+    def _remember(self, name, passed, ctx):
+        with self._lock:
+            self._last_known[name] = (passed, ctx, time.time())
+            # Errors are never cached: the next run should try again
+            if "error" not in ctx and self.validity.get(name, 0):
+                self._verdicts[name] = (self._expires_at(name, datetime.now()), passed, ctx)
+
+    def _fallback(self, name, reason):
+        """Last known verdict for a check that missed its deadline (FAIL if there is none)."""
+        with self._lock:
+            last = self._last_known.get(name)
+        if last is None:
+            return False, {"status": "FAIL", "error": reason}
+        passed, ctx, at = last
+        return passed, {**ctx, "stale": True, "stale_reason": reason, "as_of": at}
+
+    def invalidate(self, name=None):
+        """Drops cached verdicts (all of them, or one check) e.g. after a duty notification."""
+        with self._lock:
+            if name is None:
+                self._verdicts.clear()
+            else:
+                self._verdicts.pop(name, None)
+
+    # --- RUNNERS ---
+
+    def _run_check(self, name, method):
+        cached = self._cached_verdict(name)
+        if cached is not None:
+            return cached
+        passed, ctx = method()
+        self._remember(name, passed, ctx)
+        return passed, ctx
+
+    def _record(self, context, name, key, passed, ctx):
+        context["checks"][key] = ctx
+        (self.checks_passed if passed else self.checks_failed).append(name)
+
+    def _new_context(self):
         self.checks_passed = []
         self.checks_failed = []
-        context = {
+        return {
             "timestamp": datetime.now().isoformat(),
             "gateway_status": "RUNNING",
             "checks": {},
         }
+
+    def run_all_checks(self, concurrent=None) -> tuple[bool, dict[str, Any]]:
+        concurrent = self.concurrent if concurrent is None else concurrent
+        context = self._new_context()
         print("\n" + "=" * 70)
-        print("PRE-TRADE GATEWAY: Starting all checks")
+        print(
+            f"PRE-TRADE GATEWAY: Starting all checks ({'concurrent' if concurrent else 'sequential'})"
+        )
         print("=" * 70)
-        # CHECK 1: Duty Confirmation (CRITICAL - blocks if fails)
-        duty_pass, duty_ctx = self._check_fiscal_policy()
-        context["checks"]["fiscal_policy"] = duty_ctx
-        if not duty_pass:
-            self.checks_failed.append("DUTY_CONFIRMATION")
+        start = time.perf_counter()
+
+        blocked = self._run_concurrent(context) if concurrent else self._run_sequential(context)
+
+        context["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        if blocked:
+            # CHECK 1 (duty confirmation) is CRITICAL: nothing else matters without it
             context["gateway_status"] = "BLOCKED_CRITICAL"
+            context["checks_passed"] = self.checks_passed
+            context["checks_failed"] = self.checks_failed
+            self.last_gateway_decision = (False, context)
             return False, context
-        # CHECK 2: Global Cues (session bias)
-        bias_pass, bias_ctx = self._check_global_cues()
-        context["checks"]["global_cues"] = bias_ctx
-        if not bias_pass:
-            self.checks_failed.append("GLOBAL_CUES")
-        # CHECK 3: Economic Calendar (pause on high-impact)
-        econ_pass, econ_ctx = self._check_economic_calendar()
-        context["checks"]["economic_calendar"] = econ_ctx
-        if not econ_pass:
-            self.checks_failed.append("ECONOMIC_CALENDAR")
-        # CHECK 4: Currency Monitor (USD/INR volatility)
-        curr_pass, curr_ctx = self._check_currency_monitor()
-        context["checks"]["currency_monitor"] = curr_ctx
-        if not curr_pass:
-            self.checks_failed.append("CURRENCY_MONITOR")
-        # CHECK 5: Geopolitical Risk
-        geo_pass, geo_ctx = self._check_geopolitical_risk()
-        context["checks"]["geopolitical_risk"] = geo_ctx
-        if not geo_pass:
-            self.checks_failed.append("GEOPOLITICAL_RISK")
-        # CHECK 6: Pivot Levels Ready
-        pivot_pass, pivot_ctx = self._check_pivot_levels()
-        context["checks"]["pivot_levels"] = pivot_ctx
-        if not pivot_pass:
-            self.checks_failed.append("PIVOT_LEVELS")
-        # CHECK 7: Signal Confluence
-        conf_pass, conf_ctx = self._check_signal_confluence()
-        context["checks"]["signal_confluence"] = conf_ctx
-        if not conf_pass:
-            self.checks_failed.append("SIGNAL_CONFLUENCE")
-        # CHECK 8: Risk Manager Ready
-        risk_pass, risk_ctx = self._check_risk_manager()
-        context["checks"]["risk_manager"] = risk_ctx
-        if not risk_pass:
-            self.checks_failed.append("RISK_MANAGER")
+
         # Final decision
         all_pass = len(self.checks_failed) == 0
         context["gateway_status"] = "GO" if all_pass else "NO-GO"
@@ -101,10 +191,76 @@ class PreTradeGateway:
         self.last_gateway_decision = (all_pass, context)
         return all_pass, context
 
+    def _run_sequential(self, context):
+        for name, key, method in self.checks:
+            passed, ctx = self._run_check(name, method)
+            self._record(context, name, key, passed, ctx)
+            if name == "DUTY_CONFIRMATION" and not passed:
+                return True
+        return False
+
+    def _run_concurrent(self, context):
+        """
+        Runs the local duty check first; only if it passes are the network
+        checks submitted at once and collected against their own deadlines.
+        """
+        (duty_name, duty_key, duty_method), *network = self.checks
+        passed, ctx = self._run_check(duty_name, duty_method)
+        self._record(context, duty_name, duty_key, passed, ctx)
+        if not passed:
+            return True  # CRITICAL: no network call is started for a blocked trade
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=len(network), thread_name_prefix="gateway"
+            )
+        submitted = time.monotonic()
+        futures = {}
+        results = {}
+        for name, _, method in network:
+            cached = self._cached_verdict(name)
+            if cached is not None:
+                results[name] = cached
+                continue
+            with self._lock:
+                future = self._inflight.get(name)
+            # A check still hung from a previous run is not started twice
+            if future is None or future.done():
+                future = self._executor.submit(self._run_check, name, method)
+                with self._lock:
+                    self._inflight[name] = future
+            futures[name] = future
+
+        for name, key, _ in network:
+            if name not in results:
+                results[name] = self._collect(name, futures[name], submitted)
+            passed, ctx = results[name]
+            self._record(context, name, key, passed, ctx)
+        return False
+
+    def _collect(self, name, future, submitted):
+        remaining = self.timeouts.get(name, 5.0) - (time.monotonic() - submitted)
+        try:
+            passed, ctx = future.result(timeout=max(remaining, 0))
+        except TimeoutError:
+            logger.warning(f"{name} check exceeded {self.timeouts.get(name)}s; using last known")
+            return self._fallback(name, "timeout")
+        except Exception as e:
+            logger.warning(f"{name} check crashed: {e}")
+            return self._fallback(name, str(e))
+        with self._lock:
+            if self._inflight.get(name) is future:
+                del self._inflight[name]
+        return passed, ctx
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
     def _check_fiscal_policy(self) -> tuple[bool, dict]:
         try:
             duty = self.fiscal_loader.validate_duty_before_trading()
-            self.checks_passed.append("DUTY_CONFIRMATION")
             return True, {"status": "PASS", "duty_rate": duty}
         except Exception as e:
             logger.error(f"Duty check failed: {e}")
@@ -113,7 +269,6 @@ class PreTradeGateway:
     def _check_global_cues(self) -> tuple[bool, dict]:
         try:
             bias = self.global_cues.get_bias()
-            self.checks_passed.append("GLOBAL_CUES")
             return True, {"status": "PASS", "bias": bias}
         except Exception as e:
             logger.warning(f"Global cues check failed: {e}")
@@ -123,7 +278,6 @@ class PreTradeGateway:
         try:
             is_safe = self.econ_calendar.is_safe_to_trade()
             if is_safe:
-                self.checks_passed.append("ECONOMIC_CALENDAR")
                 return True, {"status": "PASS"}
             else:
                 return False, {"status": "FAIL", "reason": "High-impact event within 1 hour"}
@@ -136,7 +290,6 @@ class PreTradeGateway:
             is_stable = self.currency_monitor.is_currency_stable()
             vol = self.currency_monitor.get_usdinr_volatility()
             if is_stable:
-                self.checks_passed.append("CURRENCY_MONITOR")
                 return True, {"status": "PASS", "usdinr_volatility": vol}
             else:
                 return False, {"status": "FAIL", "reason": "High currency volatility"}
@@ -148,7 +301,6 @@ class PreTradeGateway:
         try:
             risk_level = self.geo_risk.get_risk_level()
             if risk_level in ("LOW", "MEDIUM"):
-                self.checks_passed.append("GEOPOLITICAL_RISK")
                 return True, {"status": "PASS", "risk_level": risk_level}
             else:
                 return False, {"status": "FAIL", "risk_level": risk_level}
@@ -160,7 +312,6 @@ class PreTradeGateway:
         try:
             levels = self.pivot_calc.calculate_levels(high=70000, low=68000, close=69000)
             if levels and all(k in levels for k in ["S2", "S1", "Pivot", "R1", "R2"]):
-                self.checks_passed.append("PIVOT_LEVELS")
                 return True, {"status": "PASS", "levels": levels}
             else:
                 return False, {"status": "FAIL", "reason": "Pivot calculation incomplete"}
@@ -174,7 +325,6 @@ class PreTradeGateway:
                 rsi=65, macd_hist=0.5, ema_9=69500, ema_21=69200
             )
             if confluence and confluence.get("strength") in ("STRONG_BUY", "BUY"):
-                self.checks_passed.append("SIGNAL_CONFLUENCE")
                 return True, {"status": "PASS", "signal_strength": confluence.get("strength")}
             else:
                 return False, {"status": "FAIL", "reason": "Weak signal confluence"}
@@ -186,7 +336,6 @@ class PreTradeGateway:
         try:
             pos = self.risk_manager.calculate_position_size(69000, 68800)
             if pos > 0:
-                self.checks_passed.append("RISK_MANAGER")
                 return True, {"status": "PASS", "position_size": pos}
             else:
                 return False, {"status": "FAIL", "reason": "Position size calculation returned 0"}
@@ -197,6 +346,7 @@ class PreTradeGateway:
     def _print_gateway_summary(self, all_pass: bool, context: dict):
         status_str = "✓ GO" if all_pass else "✗ NO-GO"
         print(f"\n{status_str} - Gateway Decision: {context['gateway_status']}")
+        print(f"Gateway latency: {context.get('elapsed_ms', 0):.1f} ms")
         print(f"Checks passed: {len(context['checks_passed'])}/8")
         print(f"Checks failed: {len(context['checks_failed'])}/8")
         if context["checks_failed"]:
@@ -0,0 +1,347 @@
+import logging
+import re
+import sqlite3
+from datetime import date, datetime, timedelta
+
+from utils.migrations import apply_pragmas
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = "ticks_"
+PARTITION_RE = re.compile(r"^ticks_(\d{8})$")
+TICK_COLUMNS = "timestamp, symbol, open, high, low, close, volume, bid, ask"
+
+# Bar tables by resolution; bucket expressions work on the stored ISO timestamps
+RESOLUTIONS = {
+    "M1": ("bars_m1", "strftime('%Y-%m-%d %H:%M:00', timestamp)", 60),
+    "M5": (
+        "bars_m5",
+        "datetime((CAST(strftime('%s', timestamp) AS INTEGER) / 300) * 300, 'unixepoch')",
+        300,
+    ),
+}
+# Auto resolution: the coarsest one that still gives useful detail for the span
+AUTO_RESOLUTION = [(timedelta(hours=2), "TICK"), (timedelta(days=3), "M1")]
+
+
+def _as_day(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.fromisoformat(str(value)).date()
+
+
+class TickStore:
+    """
+    Protocol 7.3: Partitioned Tick Storage (goldbot.db).
+    Ticks land in one table per day (`ticks_YYYYMMDD`, indexed on
+    (symbol, timestamp)); `maintain()` rolls closed days up into M1/M5 bars,
+    drops tick partitions past `tick_retention_days` and prunes bars past
+    their own retention. A "last N ticks" read touches only the newest
+    partitions, however long the bot has been collecting.
+    """
+
+    def __init__(
+        self,
+        db_path="goldbot.db",
+        tick_retention_days=7,
+        m1_retention_days=90,
+        m5_retention_days=None,
+    ):
+        self.db_path = db_path
+        self.tick_retention_days = tick_retention_days
+        self.m1_retention_days = m1_retention_days
+        self.m5_retention_days = m5_retention_days
+        self._known = set()
+        self._init_schema()
+
+    def _get_conn(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return apply_pragmas(conn)
+
+    def _init_schema(self):
+        conn = self._get_conn()
+        # Only takes effect on a brand-new file; lets dropped partitions shrink it
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        with conn:
+            for table, _, _ in RESOLUTIONS.values():
+                conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        symbol TEXT NOT NULL,
+                        bucket TEXT NOT NULL,
+                        open REAL, high REAL, low REAL, close REAL,
+                        volume INTEGER,
+                        ticks INTEGER,
+                        PRIMARY KEY (symbol, bucket)
+                    ) WITHOUT ROWID
+                """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tick_partitions (
+                    day TEXT PRIMARY KEY,
+                    rolled_up INTEGER DEFAULT 0
+                )
+            """)
+        self._known = {row[0] for row in conn.execute("SELECT day FROM tick_partitions")}
+        conn.close()
+
+    # --- PARTITIONS ---
+
+    @staticmethod
+    def partition_name(day):
+        return f"{PARTITION_PREFIX}{_as_day(day).strftime('%Y%m%d')}"
+
+    def ensure_partition(self, day, conn=None):
+        """Creates the day's table and (symbol, timestamp) index once; returns its name."""
+        day = _as_day(day)
+        name = self.partition_name(day)
+        if day.isoformat() in self._known:
+            return name
+        own = conn is None
+        conn = conn or self._get_conn()
+        with conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {name} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp DATETIME NOT NULL,
+                    symbol TEXT NOT NULL,
+                    open REAL NOT NULL,
+                    high REAL NOT NULL,
+                    low REAL NOT NULL,
+                    close REAL NOT NULL,
+                    volume INTEGER,
+                    bid REAL,
+                    ask REAL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{name}_symbol_ts ON {name}(symbol, timestamp)"
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO tick_partitions (day) VALUES (?)", (day.isoformat(),)
+            )
+        if own:
+            conn.close()
+        self._known.add(day.isoformat())
+        return name
+
+    def insert_sql(self, day):
+        """INSERT statement for the day's partition (creating it on first use)."""
+        name = self.ensure_partition(day)
+        return f"INSERT INTO {name} ({TICK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+    def partitions(self, conn=None):
+        """Existing partition days, newest first."""
+        own = conn is None
+        conn = conn or self._get_conn()
+        rows = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'ticks_%'"
+        ).fetchall()
+        if own:
+            conn.close()
+        days = []
+        for (name,) in rows:
+            match = PARTITION_RE.match(name)
+            if match:
+                days.append(datetime.strptime(match.group(1), "%Y%m%d").date())
+        return sorted(days, reverse=True)
+
+    # --- READS ---
+
+    def latest_ticks(self, symbol, limit=100):
+        """Last `limit` ticks (oldest first); walks partitions newest-first via the index."""
+        conn = self._get_conn()
+        rows = []
+        for day in self.partitions(conn):
+            need = limit - len(rows)
+            if need <= 0:
+                break
+            rows.extend(
+                conn.execute(
+                    f"SELECT * FROM {self.partition_name(day)} WHERE symbol = ? "
+                    "ORDER BY timestamp DESC LIMIT ?",
+                    (symbol, need),
+                ).fetchall()
+            )
+        conn.close()
+        return [dict(row) for row in reversed(rows)]
+
+    def count(self):
+        conn = self._get_conn()
+        total = sum(
+            conn.execute(f"SELECT COUNT(*) FROM {self.partition_name(day)}").fetchone()[0]
+            for day in self.partitions(conn)
+        )
+        conn.close()
+        return total
+
+    def query(self, symbol, start, end, resolution=None):
+        """
+        Rows for [start, end] at `resolution` ("TICK", "M1", "M5"); None picks
+        the coarsest adequate one for the span. Falls back to coarser data when
+        the finer one has aged out. Returns (resolution_used, rows).
+        """
+        start, end = datetime.fromisoformat(str(start)), datetime.fromisoformat(str(end))
+        if resolution is None:
+            span = end - start
+            resolution = next((res for limit, res in AUTO_RESOLUTION if span <= limit), "M5")
+
+        order = ["TICK", "M1", "M5"]
+        oldest_tick_day = min(self.partitions(), default=None)
+        for res in order[order.index(resolution.upper()) :]:
+            if res == "TICK":
+                if oldest_tick_day is None or start.date() < oldest_tick_day:
+                    continue
+                return res, self._query_ticks(symbol, start, end)
+            rows = self._query_bars(res, symbol, start, end)
+            if rows or res == "M5":
+                return res, rows
+        return "M5", []
+
+    def _query_ticks(self, symbol, start, end):
+        conn = self._get_conn()
+        rows = []
+        for day in sorted(self.partitions(conn)):
+            if start.date() <= day <= end.date():
+                rows.extend(
+                    conn.execute(
+                        f"SELECT * FROM {self.partition_name(day)} "
+                        "WHERE symbol = ? AND timestamp BETWEEN ? AND ? ORDER BY timestamp",
+                        (symbol, start.isoformat(" "), end.isoformat(" ")),
+                    ).fetchall()
+                )
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def _query_bars(self, res, symbol, start, end):
+        # Closed days are rolled once and marked; today keeps taking ticks, so it is re-rolled
+        today = datetime.now().date()
+        conn = self._get_conn()
+        rolled = self._rolled_days(conn)
+        for day in self.partitions(conn):
+            if start.date() <= day <= end.date() and (
+                day == today or day.isoformat() not in rolled
+            ):
+                self._rollup_and_mark(day, conn, mark=day < today)
+        table = RESOLUTIONS[res][0]
+        rows = conn.execute(
+            f"SELECT * FROM {table} WHERE symbol = ? AND bucket BETWEEN ? AND ? ORDER BY bucket",
+            (symbol, start.strftime("%Y-%m-%d %H:%M:%S"), end.strftime("%Y-%m-%d %H:%M:%S")),
+        ).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    # --- ROLLUP & RETENTION ---
+
+    def rollup(self, day, conn=None):
+        """Aggregates one partition into M1 and M5 bars (idempotent: INSERT OR REPLACE)."""
+        own = conn is None
+        conn = conn or self._get_conn()
+        name = self.partition_name(day)
+        with conn:
+            for table, bucket, _ in RESOLUTIONS.values():
+                conn.execute(f"""
+                    INSERT OR REPLACE INTO {table} (symbol, bucket, open, high, low, close, volume, ticks)
+                    SELECT symbol, bucket, MAX(first_open), MAX(high), MIN(low), MAX(last_close),
+                           SUM(volume), COUNT(*)
+                    FROM (
+                        SELECT symbol, {bucket} AS bucket, high, low, volume,
+                               FIRST_VALUE(open) OVER w AS first_open,
+                               LAST_VALUE(close) OVER w AS last_close
+                        FROM {name}
+                        WINDOW w AS (
+                            PARTITION BY symbol, {bucket} ORDER BY timestamp, id
+                            ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+                        )
+                    )
+                    GROUP BY symbol, bucket
+                """)
+        if own:
+            conn.close()
+
+    @staticmethod
+    def _rolled_days(conn):
+        return {
+            row[0] for row in conn.execute("SELECT day FROM tick_partitions WHERE rolled_up = 1")
+        }
+
+    def _rollup_and_mark(self, day, conn, mark=True):
+        self.rollup(day, conn)
+        if mark:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO tick_partitions (day, rolled_up) VALUES (?, 1)",
+                    (day.isoformat(),),
+                )
+
+    def maintain(self, now=None):
+        """
+        Rolls up every closed day once, drops tick partitions and bars past
+        retention, and returns a summary. Safe to run on a schedule.
+        """
+        now = now or datetime.now()
+        today = now.date()
+        summary = {"rolled_up": [], "dropped": [], "bars_pruned": 0}
+        conn = self._get_conn()
+        rolled = self._rolled_days(conn)
+
+        for day in self.partitions(conn):
+            if day < today and day.isoformat() not in rolled:
+                self._rollup_and_mark(day, conn)
+                summary["rolled_up"].append(day.isoformat())
+
+            if self.tick_retention_days is not None and day < today - timedelta(
+                days=self.tick_retention_days
+            ):
+                name = self.partition_name(day)
+                with conn:
+                    conn.execute(f"DROP TABLE IF EXISTS {name}")
+                    conn.execute("DELETE FROM tick_partitions WHERE day = ?", (day.isoformat(),))
+                self._known.discard(day.isoformat())
+                summary["dropped"].append(day.isoformat())
+
+        for res, days in (("M1", self.m1_retention_days), ("M5", self.m5_retention_days)):
+            if days is None:
+                continue
+            cutoff = (today - timedelta(days=days)).isoformat()
+            with conn:
+                cur = conn.execute(f"DELETE FROM {RESOLUTIONS[res][0]} WHERE bucket < ?", (cutoff,))
+            summary["bars_pruned"] += cur.rowcount
+
+        if summary["dropped"] or summary["bars_pruned"]:
+            conn.execute("PRAGMA incremental_vacuum")
+        conn.close()
+        logger.info(f"Tick store maintenance: {summary}")
+        return summary
+
+    def migrate_legacy(self, table="market_ticks", batch_days=30):
+        """Moves rows of the old single `market_ticks` table into day partitions."""
+        conn = self._get_conn()
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)
+        ).fetchone()
+        if not exists:
+            conn.close()
+            return 0
+        days = [
+            row[0]
+            for row in conn.execute(
+                f"SELECT DISTINCT date(timestamp) FROM {table} LIMIT ?", (batch_days,)
+            )
+            if row[0]
+        ]
+        moved = 0
+        for day in days:
+            name = self.ensure_partition(day, conn)
+            with conn:
+                cur = conn.execute(
+                    f"INSERT INTO {name} ({TICK_COLUMNS}) SELECT {TICK_COLUMNS} FROM {table} "
+                    "WHERE date(timestamp) = ?",
+                    (day,),
+                )
+                conn.execute(f"DELETE FROM {table} WHERE date(timestamp) = ?", (day,))
+            moved += cur.rowcount
+        conn.close()
+        return moved
@@ -3,6 +3,7 @@ import os
 
 import pandas as pd
 
+from utils.latency import wall_to_monotonic_ns
 from utils.time_utils import get_utc_now
 
 
@@ -18,6 +19,7 @@ class DataHandler:
         self.file_path = data_file_path
         self.df = None
         self.last_update = None
+        self.bar_landed_ns = None  # perf_counter_ns() when the file was last written
         self._running = False
 
     async def start_buffer(self):
@@ -41,6 +43,7 @@ class DataHandler:
 
                         self.df = new_df
                         self.last_update = get_utc_now()
+                        self.bar_landed_ns = wall_to_monotonic_ns(os.path.getmtime(self.file_path))
             except Exception as e:
                 print(f"   ⚠️ Buffer Error ({self.symbol}): {e}")
 
@@ -210,7 +210,6 @@ def train_ppo_agent():
         lstm_model=lstm_model,
         initial_capital=100000,
         transaction_cost=0.0005,
-        slippage=10,
     )
 
     monitored_env = Monitor(env, filename="./logs/training_monitor.csv")
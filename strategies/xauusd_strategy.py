@@ -4,31 +4,30 @@ from ta.trend import SMAIndicator  # <--- NEW LIBRARY
 
 from config.settings import ASSET_CONFIG, STRATEGY_CONFIG
 from execution.calendar_filter import NewsFilter
-from execution.db_manager import DBManager
 from execution.paper_broker import PaperBroker
 from execution.risk_manager import CircuitBreaker, RiskManager
 from strategies.market_structure import MarketStructure
 from strategies.sentiment_engine import SentimentEngine
 from strategies.wyckoff import WyckoffAnalyzer
+from utils import latency
+from utils.data_validator import DataValidator
 from utils.exceptions import NewsEventError
 from utils.notifier import TelegramNotifier
+from utils.time_utils import get_local_now
 
 SYSTEM_BREAKER = None
+BROKER = None  # Built once: PaperBroker holds the DB connection and the state cache
+DATA_VALIDATOR = DataValidator()
+QUALITY_WINDOW = 120  # Bars re-validated per cycle (covers the SMA-50/Wyckoff lookbacks)
+STRATEGY_NAME = "Wyckoff_Spring"  # Position tag: other strategies can hold XAUUSD alongside
 
 
 def check_cooldown(db_manager, symbol):
-    conn = db_manager._get_conn()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT exit_time FROM trades WHERE symbol=? AND status='CLOSED' ORDER BY exit_time DESC LIMIT 1",
-        (symbol,),
-    )
-    row = cursor.fetchone()
-    conn.close()
-
-    if row and row[0]:
-        last_exit = datetime.fromisoformat(row[0])
-        now = datetime.now()
+    last_exit_time = db_manager.get_last_exit_time(symbol)
+
+    if last_exit_time:
+        last_exit = datetime.fromisoformat(last_exit_time)
+        now = get_local_now()
         diff_mins = (now - last_exit).total_seconds() / 60
         wait = STRATEGY_CONFIG["cooldown_minutes"]
         if diff_mins < wait:
@@ -37,21 +36,29 @@ def check_cooldown(db_manager, symbol):
 
 
 def get_current_portfolio_risk(db_manager, config):
-    pos = db_manager.get_open_position("XAUUSD")
-    if pos != "FLAT":
-        risk_usd = abs(pos["entry_price"] - pos["sl"]) * pos["qty"] * config["contract_size"]
-        return risk_usd
+    # Aggregate over every open XAUUSD position (all strategies), kept per symbol in memory
+    exposure = db_manager.get_exposure("XAUUSD")
+    if exposure:
+        return exposure["risk"] * config["contract_size"]
     return 0.0
 
 
 async def check_market(data_handler):
-    global SYSTEM_BREAKER
+    # Protocol 9.6: one latency trace per cycle, end-to-end from when the bar landed
+    with latency.trace(origin_ns=getattr(data_handler, "bar_landed_ns", None)):
+        await _check_market(data_handler)
+
+
+async def _check_market(data_handler):
+    global SYSTEM_BREAKER, BROKER
 
     # 1. SETUP
-    broker = PaperBroker()
-    db = DBManager()
+    if BROKER is None:
+        BROKER = PaperBroker()
+    broker = BROKER
+    db = broker.state  # In-memory state: cooldown/portfolio-risk reads never hit SQLite
 
-    account = broker.get_positions()
+    account = broker.get_positions("XAUUSD")
     equity = account["equity"]
 
     if SYSTEM_BREAKER is None:
@@ -71,10 +78,19 @@ async def check_market(data_handler):
     if df is None or len(df) < 55:
         return
 
+    # Protocol 1.1: Data Quality Gate (gaps, inverted bars, frozen feed, spikes)
+    recent = df.tail(QUALITY_WINDOW)
+    quality = DATA_VALIDATOR.validate_frame(recent)
+    if not quality.is_clean(len(recent) - 55, len(recent) - 1):
+        print(f"   🧹 DATA QUALITY VETO: {quality.problems()[-1]['flags']}")
+        return
+    latency.mark("ingest")
+
     # 3. ANALYSIS
     # Use 'ta' library for SMA
     sma_ind = SMAIndicator(close=df["Close"], window=50)
     df["SMA_50"] = sma_ind.sma_indicator()
+    latency.mark("indicators")
 
     price = float(df.iloc[-1]["Close"])
 
@@ -84,8 +100,11 @@ async def check_market(data_handler):
         return
     regime, adx = MarketStructure.get_regime(df)
     sentiment_score, sentiment_label = SentimentEngine.analyze_sentiment("XAUUSD")
+    latency.mark("sentiment")
 
-    current_pos = account["position"]
+    # Untagged positions predate strategy tags and belong to this strategy
+    held = [p for p in account["positions"] if p.get("strategy") in (STRATEGY_NAME, None)]
+    current_pos = held[0] if held else "FLAT"
     print(f"📊 Price: ${price:,.2f} | Regime: {regime} | Sentiment: {sentiment_label}")
 
     # 4. TRADING LOGIC
@@ -116,14 +135,13 @@ async def check_market(data_handler):
                 qty = RiskManager.calculate_lot_size(
                     equity, price, sl_price, "XAUUSD", 2.0, risk_load
                 )
+                latency.mark("risk")
 
                 if qty > 0:
-                    broker.place_order(1, "XAUUSD", price, qty, sl=sl_price, tp=tp_price)
+                    broker.place_order(
+                        1, "XAUUSD", price, qty, sl=sl_price, tp=tp_price, strategy=STRATEGY_NAME
+                    )
                     # 🟢 NEW: Send Telegram Notification
-                    import asyncio
-
-                    asyncio.create_task(
-                        TelegramNotifier.notify_trade(
-                            "BUY", price, qty, sl_price, tp_price, sentiment_label
-                        )
+                    TelegramNotifier.notify_trade_sync(
+                        "BUY", price, qty, sl_price, tp_price, sentiment_label
                     )
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import sys
+from datetime import UTC, datetime, timedelta
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution.algo_executor import (
+    CANCELLED,
+    DONE,
+    PARTIAL,
+    AlgoExecutor,
+    split_qty,
+    volume_profile,
+)
+from execution.order_router import ACCEPTED, REJECTED, OrderRouter
+from execution.paper_broker import PaperBroker
+from utils.time_utils import SimulatedClock, get_utc_now, set_clock
+
+START = datetime(2026, 3, 2, 14, 0, tzinfo=UTC)  # Monday
+BRACKET = {"sl": 1990.0, "tp": 2030.0, "strategy": "algo"}
+
+
+@pytest.fixture
+def clock():
+    clock = SimulatedClock(START)
+    previous = set_clock(clock)
+    yield clock
+    set_clock(previous)
+
+
+def _paper(tmp_path):
+    broker = PaperBroker(seed=7, latency=(0.0, 0.0), db_path=str(tmp_path / "state.db"))
+    return broker, AlgoExecutor(OrderRouter({"paper": broker}, seed=7))
+
+
+def test_split_and_volume_profile():
+    assert split_qty(1.0, [1, 1, 1]) == [0.34, 0.33, 0.33]
+    assert split_qty(100.0, [1, 3, 0, 4], step=0.01) == [12.5, 37.5, 0.0, 50.0]
+
+    # Two days of 1-minute bars: the 14:00-14:05 window trades 3x the 14:05-14:10 one
+    times = pd.date_range("2026-02-26", periods=2 * 1440, freq="min", tz="UTC")
+    volume = [300.0 if t.hour == 14 and t.minute < 5 else 100.0 for t in times]
+    bars = pd.DataFrame({"Datetime": times, "Volume": volume})
+    profile = volume_profile(bars, slices=2, duration_s=600, start=START)
+    assert list(profile) == [2 * 5 * 300.0, 2 * 5 * 100.0]
+
+
+@pytest.mark.asyncio
+async def test_twap_and_vwap_run_side_by_side_on_the_simulated_clock(clock, tmp_path):
+    broker, algos = _paper(tmp_path)
+    twap = await algos.twap("paper", 1, "XAUUSD", 2000.0, 1.0, duration_s=300, slices=5, **BRACKET)
+    vwap = await algos.vwap(
+        "paper", 1, "XAUUSD", 2000.0, 2.0, [1, 3], duration_s=300, **{**BRACKET, "strategy": "vwap"}
+    )
+    await algos.wait(twap["id"])
+    await algos.wait(vwap["id"])
+    await algos.router.stop()
+
+    assert twap["state"] == vwap["state"] == DONE
+    assert [c["qty"] for c in twap["children"]] == [0.2] * 5
+    assert [c["qty"] for c in vwap["children"]] == [0.5, 1.5]
+    assert all(c["state"] == ACCEPTED for c in twap["children"] + vwap["children"])
+    assert twap["filled_qty"] == 1.0 and vwap["remaining_qty"] == 0.0
+    # Both schedules shared the 4-minute horizon instead of queueing behind each other
+    assert get_utc_now() == START + timedelta(seconds=240)
+    sizes = sorted(pos["qty"] for pos in broker.state.get_positions("XAUUSD"))
+    assert sizes == sorted([0.2] * 5 + [0.5, 1.5])
+
+
+@pytest.mark.asyncio
+async def test_children_settle_from_the_fill_not_the_accept(clock, tmp_path):
+    broker = PaperBroker(seed=7, latency=(1.0, 1.0), db_path=str(tmp_path / "state.db"))
+    algos = AlgoExecutor(OrderRouter({"paper": broker}, seed=7))
+    _, margin = broker.check_margin(2000.0, 0.5, "XAUUSD")
+    broker.state.update_equity(margin * 2)  # covers the 0.5 lot child, not the 1.5 lot one
+
+    parent = await algos.vwap("paper", 1, "XAUUSD", 2000.0, 2.0, [1, 3], duration_s=60, **BRACKET)
+    await algos.wait(parent["id"])
+    await algos.router.stop()
+
+    # place_order said yes to both; the second was refused at its fill, a second later
+    assert [c["result"] for c in parent["children"]] == [True, True]
+    assert [c["state"] for c in parent["children"]] == [ACCEPTED, REJECTED]
+    assert parent["state"] == PARTIAL and parent["filled_qty"] == 0.5
+    assert get_utc_now() == START + timedelta(seconds=31)
+    assert [pos["qty"] for pos in broker.state.get_positions("XAUUSD")] == [0.5]
+    assert broker._fills == {}  # both results were reported, so neither is kept
+
+
+@pytest.mark.asyncio
+async def test_iceberg_shows_one_clip_at_a_time(clock, tmp_path):
+    broker, algos = _paper(tmp_path)
+    parent = await algos.iceberg("paper", 1, "XAUUSD", 2000.0, 1.0, 0.3, interval_s=5, **BRACKET)
+    clips = []
+    while not parent["finished_at"]:
+        clips.append(len(algos.router.pending("paper")))
+        await asyncio.sleep(0)
+    await algos.router.stop()
+
+    assert parent["state"] == DONE and max(clips) <= 1
+    assert [c["qty"] for c in parent["children"]] == [0.3, 0.3, 0.3, 0.1]
+    assert get_utc_now() == START + timedelta(seconds=15)
+    assert len(broker.state.get_positions("XAUUSD")) == 4
+
+
+@pytest.mark.asyncio
+async def test_cancel_stops_the_schedule_and_keeps_what_was_sent(tmp_path):
+    # Wall clock: cancel lands between the first child and the second
+    broker, algos = _paper(tmp_path)
+    parent = await algos.twap(
+        "paper", 1, "XAUUSD", 2000.0, 1.0, duration_s=2.0, slices=4, **BRACKET
+    )
+    await asyncio.sleep(0.25)  # the first child (t=0) is out, the next is due at 0.5 s
+    await algos.cancel(parent["id"])
+    await algos.router.stop()
+
+    assert parent["state"] == CANCELLED
+    assert [c["state"] for c in parent["children"]] == [ACCEPTED] + [CANCELLED] * 3
+    assert parent["filled_qty"] == 0.25 and parent["remaining_qty"] == 0.75
+    assert len(broker.state.get_positions("XAUUSD")) == 1
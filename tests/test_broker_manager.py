@@ -0,0 +1,109 @@
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.broker_manager import BrokerManager
+from utils import market_data
+from utils.market_data import MarketDataCache, OfflineProvider
+
+
+class SlowBroker:
+    """get_positions() after `delay` seconds; counts round trips."""
+
+    def __init__(self, positions, delay=0.0):
+        self.positions = positions
+        self.delay = delay
+        self.calls = 0
+        self.release = threading.Event()
+
+    def login(self):
+        return True
+
+    def get_positions(self):
+        self.calls += 1
+        if self.delay:
+            self.release.wait(self.delay)
+        return list(self.positions)
+
+
+@pytest.fixture
+def fx(tmp_path):
+    """Shared market data serving USD/INR at 85.0."""
+    frame = pd.DataFrame({"Close": [84.0, 85.0]}, index=pd.date_range("2026-01-01", periods=2))
+    provider = OfflineProvider({"USDINR=X": frame})
+    previous = market_data._DEFAULT
+    market_data.set_market_data(MarketDataCache(provider, cache_dir=str(tmp_path)))
+    yield provider
+    market_data.set_market_data(previous)
+
+
+def _manager(brokers, **config):
+    manager = BrokerManager(config={"positions_ttl_s": 5.0, "positions_timeout_s": 1.0, **config})
+    for name, broker in brokers.items():
+        manager.add_broker(name, broker)
+    return manager
+
+
+def test_brokers_are_queried_concurrently_and_snapshot_is_shared(fx):
+    alpaca = SlowBroker([{"market_value": 3000.0, "unrealized_pl": 40.0}], delay=0.3)
+    mcx = SlowBroker([{"market_value": -170000.0, "unrealized_pl": -8500.0}], delay=0.3)
+    manager = _manager({"alpaca": alpaca, "mcx": mcx})
+
+    start = time.perf_counter()
+    exposure = manager.get_total_exposure()
+    assert time.perf_counter() - start < 0.5  # not 0.6 s serially
+    pnl = manager.get_unrealized_pnl()
+    manager.get_all_positions()
+
+    assert alpaca.calls == mcx.calls == 1  # one round trip for the whole cycle
+    assert exposure == {
+        "alpaca_usd": 3000.0,
+        "mcx_inr": 170000.0,
+        "usd_inr": 85.0,
+        "total_usd": pytest.approx(3000.0 + 2000.0),
+    }
+    assert pnl["total_usd"] == pytest.approx(40.0 - 100.0)
+    assert len(fx.calls) == 1
+    manager.shutdown_all()
+
+
+def test_slow_broker_misses_its_deadline_without_holding_up_the_others(fx):
+    alpaca = SlowBroker([{"market_value": 1000.0}])
+    mcx = SlowBroker([{"market_value": 85000.0}], delay=5.0)
+    manager = _manager({"alpaca": alpaca, "mcx": mcx}, positions_timeout_s=0.2)
+
+    start = time.perf_counter()
+    positions = manager.get_all_positions()
+    assert time.perf_counter() - start < 0.5
+    assert positions == {"alpaca": [{"market_value": 1000.0}], "mcx": []}
+
+    manager.get_all_positions()  # still in flight: joined, not re-sent
+    assert mcx.calls == 1
+    mcx.release.set()
+    time.sleep(0.05)
+    assert manager.get_all_positions()["mcx"] == [{"market_value": 85000.0}]
+    manager.shutdown_all()
+
+
+def test_orders_invalidate_their_market_and_fx_falls_back(tmp_path):
+    previous = market_data._DEFAULT
+    market_data.set_market_data(MarketDataCache(OfflineProvider(), cache_dir=str(tmp_path)))
+    try:
+        alpaca = SlowBroker([{"market_value": 1000.0}])
+        alpaca.place_order = lambda **kwargs: "order-1"
+        mcx = SlowBroker([{"market_value": 83500.0}])
+        manager = _manager({"alpaca": alpaca, "mcx": mcx})
+
+        assert manager.get_total_exposure()["total_usd"] == pytest.approx(2000.0)  # 83.50 fallback
+        assert manager.place_order_on_market("alpaca", symbol="GLD", quantity=1, side="buy")
+        manager.get_total_exposure()
+        assert (alpaca.calls, mcx.calls) == (2, 1)
+        manager.shutdown_all()
+    finally:
+        market_data.set_market_data(previous)
@@ -0,0 +1,109 @@
+import gc
+import os
+import sqlite3
+import sys
+import time
+import weakref
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import bulk_writer
+from src.database import Database
+from src.tick_store import TickStore
+
+
+def count_ticks(path):
+    return TickStore(path).count()
+
+
+def test_buffered_ticks_sustain_thousands_per_second(tmp_path):
+    path = str(tmp_path / "ticks.db")
+    db = Database(path)
+    n = 20_000
+    start = time.perf_counter()
+    for i in range(n):
+        symbol = "XAUUSD" if i % 2 else "MCX:GOLD"
+        db.insert_tick(symbol, 2000 + i, 2001 + i, 1999 + i, 2000.5 + i, 10, 2000, 2000.2)
+    db.flush()
+    rate = n / (time.perf_counter() - start)
+
+    assert rate > 5_000
+    assert count_ticks(path) == n
+    metrics = db.get_write_metrics()
+    assert metrics["rows_written"] == n
+    assert metrics["pending"] == 0
+    assert metrics["flushes"] < n / 10  # batched, not per row
+    db.close()
+
+
+def test_reads_see_buffered_rows_and_close_flushes(tmp_path):
+    path = str(tmp_path / "ticks.db")
+    db = Database(path, max_delay=60, max_rows=10_000)
+    db.insert_tick("XAUUSD", 2000, 2001, 1999, 2000.5, 10)
+    db.insert_features("XAUUSD", {"rsi": 55.0, "adx": 30.0})
+
+    assert db.writer.pending == 2
+    assert db.get_latest_ticks("XAUUSD")[0]["close"] == 2000.5
+    assert db.get_stats()["features"] == 1
+
+    db.insert_tick("XAUUSD", 2001, 2002, 2000, 2001.5, 10)
+    db.close()
+    assert count_ticks(path) == 2
+
+
+def test_background_thread_flushes_on_time_threshold(tmp_path):
+    path = str(tmp_path / "ticks.db")
+    db = Database(path, max_delay=0.05, max_rows=10_000)
+    db.insert_tick("XAUUSD", 2000, 2001, 1999, 2000.5, 10)
+
+    deadline = time.time() + 2
+    while count_ticks(path) == 0 and time.time() < deadline:
+        time.sleep(0.02)
+    assert count_ticks(path) == 1
+    assert db.get_write_metrics()["last_lag_ms"] >= 0
+    db.close()
+
+
+def test_closed_writers_are_released(tmp_path):
+    writer = bulk_writer.BulkWriter(str(tmp_path / "w.db"), background=False)
+    assert writer in bulk_writer._WRITERS
+    writer.close()
+    ref = weakref.ref(writer)
+    del writer
+    gc.collect()
+    assert ref() is None  # the exit hook holds no strong reference
+
+
+def test_bad_rows_are_dead_lettered_not_retried_forever(tmp_path):
+    path = str(tmp_path / "w.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v REAL NOT NULL)")
+    conn.close()
+    writer = bulk_writer.BulkWriter(path, max_rows=10_000, background=False)
+    sql = "INSERT INTO t (id, v) VALUES (?, ?)"
+    for i in range(100):
+        writer.add(sql, (i, None if i in (17, 60) else float(i)))
+
+    assert writer.flush() == 98
+    assert [row for _, row, _ in writer.dead_letters] == [(17, None), (60, None)]
+    assert writer.pending == 0 and writer.get_metrics()["dead_rows"] == 2
+
+    writer.add(sql, (100, 1.0))  # later flushes are not poisoned
+    assert writer.flush() == 1
+    writer.close()
+
+
+def test_unclosed_writer_is_flushed_at_exit(tmp_path):
+    path = str(tmp_path / "w.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (v REAL)")
+    conn.close()
+    writer = bulk_writer.BulkWriter(path, max_rows=10_000, background=False)
+    writer.add("INSERT INTO t (v) VALUES (?)", (1.0,))
+    del writer
+    gc.collect()
+
+    bulk_writer._close_all()
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+    conn.close()
@@ -0,0 +1,117 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cleaning_pipeline import (
+    CleaningPipeline,
+    CoerceTypes,
+    Deduplicate,
+    DropMissing,
+    HealPrices,
+    OHLCSanity,
+    live_pipeline,
+)
+
+
+def _pipeline():
+    return CleaningPipeline(
+        [
+            CoerceTypes(volume="volume", timestamp="timestamp"),
+            HealPrices(),
+            Deduplicate(subset=["timestamp"]),
+            OHLCSanity(),
+        ]
+    )
+
+
+def _raw(n=1_000):
+    ts = pd.date_range("2026-01-01", periods=n, freq="min")
+    close = 2000 + np.arange(n) * 0.1
+    df = pd.DataFrame(
+        {
+            "timestamp": ts.strftime("%Y-%m-%d %H:%M:%S"),
+            "open": close,
+            "high": close + 1,
+            "low": close - 1,
+            "close": close,
+            "volume": "1.5K",
+        }
+    )
+    df.loc[100, "close"] = 0.0  # zero price -> healed from the previous bar
+    df.loc[250, "high"] = df.loc[250, "low"] - 5  # inverted bar -> dropped
+    df["open"] = df["open"].astype(object)
+    df.loc[300, "open"] = "2,030.00"  # thousands separator -> coerced
+    return pd.concat([df, df.iloc[495:505]], ignore_index=True)  # re-downloaded overlap
+
+
+def test_streaming_matches_single_batch(tmp_path):
+    src = tmp_path / "raw.csv"
+    dst = tmp_path / "clean.csv"
+    _raw().to_csv(src, index=False)
+
+    report = _pipeline().run_file(str(src), str(dst), chunksize=97)
+    streamed = pd.read_csv(dst, parse_dates=["timestamp"])
+    batch, _ = _pipeline().run(pd.read_csv(src))
+
+    assert report.chunks == 11
+    assert len(streamed) == 999
+    assert streamed["timestamp"].is_unique
+    assert streamed.loc[streamed["timestamp"] == "2026-01-01 01:40:00", "close"].item() > 0
+    assert report.stages["dedupe"]["rows_in"] - report.stages["dedupe"]["rows_out"] == 10
+    assert report.stages["ohlc"]["rows_in"] - report.stages["ohlc"]["rows_out"] == 1
+    assert streamed["volume"].eq(1500).all()
+    np.testing.assert_allclose(streamed["close"], batch["close"])
+
+
+def test_heal_carries_across_chunk_boundary():
+    heal = HealPrices()
+    heal.process(pd.DataFrame({"open": [1.0], "high": [2.0], "low": [0.5], "close": [1.5]}))
+    out = heal.process(pd.DataFrame({"open": [0.0], "high": [2.0], "low": [0.5], "close": [1.6]}))
+    assert out["open"].tolist() == [1.0]
+
+
+def test_aware_timestamps_across_dst_become_naive_utc():
+    df = pd.DataFrame(
+        {
+            "timestamp": ["2026-03-06 09:30:00-05:00", "2026-03-09 09:30:00-04:00"],
+            "close": [1.0, 2.0],
+        }
+    )
+    out = CoerceTypes(numeric=["close"], timestamp="timestamp").process(df)
+    assert out["timestamp"].dt.tz is None
+    assert out["timestamp"].tolist() == [
+        pd.Timestamp("2026-03-06 14:30:00"),
+        pd.Timestamp("2026-03-09 13:30:00"),
+    ]
+
+
+def test_missing_volume_is_dropped_not_healed():
+    df = pd.DataFrame(
+        {
+            "open": [1.0, 1.1, 1.2],
+            "high": [2.0, 2.0, 2.0],
+            "low": [0.5, 0.5, 0.5],
+            "close": [1.5, 1.6, 1.7],
+            "volume": [100, None, 300],
+        }
+    )
+    clean, _ = CleaningPipeline([DropMissing(["volume"]), HealPrices()]).run(df)
+    assert clean["volume"].tolist() == [100, 300]
+
+
+def test_live_batch_matches_sanitizer_rules():
+    df = pd.DataFrame(
+        {
+            "Open": [0.0, 10.0, "11", 0.0],
+            "High": [1.0, 12.0, 12.0, 13.0],
+            "Low": [1.0, 9.0, 10.0, 10.0],
+            "Close": [1.0, 11.0, 11.5, 12.0],
+        }
+    )
+    clean, report = live_pipeline().run(df)
+    assert clean["Open"].tolist() == [10.0, 11.0, 11.0]
+    assert report.stages["heal"]["rows_out"] == 3
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import sys
+import time
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution.db_manager import DBManager
+from execution.state_cache import BrokerStateCache
+from utils.time_utils import (
+    RealClock,
+    SimulatedClock,
+    get_local_now,
+    get_utc_now,
+    is_market_open,
+    run_in_thread,
+    set_clock,
+    sleep_until,
+)
+
+START = datetime(2026, 3, 2, 14, 0, tzinfo=UTC)  # Monday
+
+
+@pytest.fixture
+def clock():
+    clock = SimulatedClock(START)
+    previous = set_clock(clock)
+    yield clock
+    set_clock(previous)
+
+
+def test_simulated_clock_only_moves_when_told(clock):
+    assert get_utc_now() == START
+    clock.sleep(0.25)  # returns at once, time moves on
+    assert get_utc_now() == START + timedelta(seconds=0.25)
+    clock.advance_to(datetime(2026, 3, 7, 12, 0))  # naive means UTC
+    assert is_market_open("XAUUSD") == (False, "Weekend (Sat)")
+    with pytest.raises(ValueError):
+        clock.advance_to(START)
+
+
+def test_store_timestamps_follow_the_installed_clock(clock, tmp_path):
+    state = BrokerStateCache(DBManager(str(tmp_path / "state.db")))
+    pos = state.add_trade(1, "XAUUSD", "LONG", 1.0, 2000.0, 1990.0, 2030.0)
+    clock.advance(90)
+    exit_time = state.close_position(pos, 2010.0, 1000.0)
+
+    assert exit_time == get_local_now().isoformat()
+    assert datetime.fromisoformat(exit_time).astimezone(UTC) == START + timedelta(seconds=90)
+    assert state.ledger.last_ts == exit_time == state.get_last_exit_time("XAUUSD")
+
+    set_clock(RealClock())
+    assert abs((get_utc_now() - datetime.now(UTC)).total_seconds()) < 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sleepers_share_one_timeline(clock):
+    ran = []
+
+    async def parent(name, offsets):
+        for offset in offsets:
+            await sleep_until(START + timedelta(seconds=offset))
+            await run_in_thread(time.sleep, 0.01)  # a broker call: time stands still
+            ran.append((offset, name, (get_utc_now() - START).total_seconds()))
+
+    await asyncio.gather(parent("A", [0, 60, 120]), parent("B", [0, 30, 90]))
+    assert [(offset, name) for offset, name, _ in ran] == [
+        (0, "A"),
+        (0, "B"),
+        (30, "B"),
+        (60, "A"),
+        (90, "B"),
+        (120, "A"),
+    ]
+    assert all(at == offset for offset, _, at in ran)  # each ran at its own due time
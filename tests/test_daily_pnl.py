@@ -0,0 +1,79 @@
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database import Database
+
+
+def query_plan(path, sql, params=()):
+    conn = sqlite3.connect(path)
+    plan = str(conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall())
+    conn.close()
+    return plan
+
+
+def test_daily_pnl_is_maintained_as_trades_close(tmp_path):
+    db = Database(str(tmp_path / "gold.db"))
+    today = datetime.now().date().isoformat()
+    win = db.insert_trade("XAUUSD", "BUY", 2, 2000.0, algo_id="T")
+    loss = db.insert_trade("XAUUSD", "SELL", 1, 2000.0, algo_id="T")
+    db.insert_trade("XAUUSD", "BUY", 1, 2000.0, algo_id="T")  # stays open
+
+    assert db.get_daily_pnl(today)["total_trades"] == 3
+    db.close_trade(win, 2010.0)
+    db.close_trade(loss, 2015.0)
+    db.close_trade(loss, 2015.0)  # repeated close is not double counted
+
+    summary = db.calculate_daily_pnl(today)
+    assert summary == {
+        "date": today,
+        "total_trades": 3,
+        "winning_trades": 1,
+        "losing_trades": 1,
+        "total_pnl": 5.0,
+        "max_drawdown": 15.0,
+    }
+    assert db.rebuild_daily_pnl(today) == summary
+    assert len(db.get_open_trades()) == 1
+    assert len(db.get_trades_for_date(today)) == 3
+    assert db.calculate_daily_pnl("2000-01-01") is None
+    db.close()
+
+
+def test_existing_trades_are_backfilled_once(tmp_path):
+    path = str(tmp_path / "gold.db")
+    Database(path).close()
+    conn = sqlite3.connect(path)
+    conn.execute("DELETE FROM schema_migrations WHERE store = 'goldbot' AND version = 2")
+    conn.executemany(
+        "INSERT INTO trades (timestamp, algo_id, symbol, side, quantity, entry_price, pnl, status) "
+        "VALUES (?, 'T', 'XAUUSD', 'BUY', 1, 2000, ?, 'CLOSED')",
+        [("2026-03-02 10:00:00", 50.0), ("2026-03-02 15:00:00", -20.0), ("2026-03-03", 7.0)],
+    )
+    conn.commit()
+    conn.close()
+
+    db = Database(path)
+    day = db.get_daily_pnl("2026-03-02")
+    assert (day["total_trades"], day["total_pnl"], day["max_drawdown"]) == (2, 30.0, 20.0)
+    assert db.get_daily_pnl("2026-03-03")["winning_trades"] == 1
+    db.close()
+
+
+def test_trade_reads_use_indexes(tmp_path):
+    path = str(tmp_path / "gold.db")
+    Database(path).close()
+
+    plan = query_plan(
+        path,
+        "SELECT * FROM trades WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp",
+        ("2026-03-02", "2026-03-03"),
+    )
+    assert "idx_trades_timestamp" in plan
+    plan = query_plan(path, "SELECT * FROM trades WHERE status != 'CLOSED' ORDER BY timestamp DESC")
+    assert "idx_trades_open" in plan and "TEMP B-TREE" not in plan
+    plan = query_plan(path, "SELECT * FROM daily_pnl WHERE date = ?", ("2026-03-02",))
+    assert "USING INDEX" in plan
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.data_validator import DataValidator
+
+
+def _bars(n=2_000):
+    rng = np.random.default_rng(7)
+    times = pd.date_range("2026-01-05", periods=n, freq="min")
+    close = 2000 + np.cumsum(rng.normal(0, 0.2, n))
+    open_ = close + rng.normal(0, 0.05, n)
+    return pd.DataFrame(
+        {
+            "time": times,
+            "open": open_,
+            "high": np.maximum(open_, close) + 0.1,
+            "low": np.minimum(open_, close) - 0.1,
+            "close": close,
+        }
+    )
+
+
+def test_clean_series_has_no_ranges():
+    index = DataValidator().validate_frame(_bars())
+    assert len(index) == 0
+    assert index.is_clean(0, 1_999)
+
+
+def test_each_problem_type_is_indexed():
+    df = _bars()
+    df = df.drop(index=range(500, 505)).reset_index(drop=True)  # 5 missing minutes -> bar 500
+    df.loc[800, "high"] = df.loc[800, "low"] - 1  # inverted bar
+    df.loc[1200:1214, ["open", "high", "low", "close"]] = 2000.0  # frozen feed
+    df.loc[1600, ["close", "high"]] = df.loc[1600, "close"] * 1.05  # +5% spike in one minute
+
+    index = DataValidator().validate_frame(df)
+    flags = {p["start"]: p["flags"] for p in index.problems()}
+
+    assert flags[500] == ["GAP"]
+    assert "OHLC" in flags[800]
+    assert "STALE" in flags[1200]
+    assert "SPIKE" in flags[1600]
+
+    assert not index.is_clean(450, 550)
+    assert index.is_clean(501, 799)
+    assert index.is_clean(df.loc[1300, "time"], df.loc[1500, "time"])
+    assert not index.is_clean(df.loc[1590, "time"], df.loc[1610, "time"])
+
+
+def test_session_breaks_are_not_gaps():
+    df = _bars(120)
+    df.loc[60:, "time"] += pd.Timedelta(hours=48)  # weekend
+    assert len(DataValidator().validate_frame(df)) == 0
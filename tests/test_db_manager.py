@@ -0,0 +1,75 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution.db_manager import DBManager
+
+
+def test_connection_is_reused_per_thread(tmp_path):
+    db = DBManager(str(tmp_path / "state.db"))
+    conn = db._get_conn()
+    db.get_account()
+    db.get_open_position("XAUUSD")
+    assert db._get_conn() is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    other = []
+    t = threading.Thread(target=lambda: other.append(db._get_conn()))
+    t.start()
+    t.join()
+    assert other[0] is not conn
+    db.close()
+
+
+def test_transaction_commits_or_rolls_back_together(tmp_path):
+    db = DBManager(str(tmp_path / "state.db"))
+    db.add_trade(1, "XAUUSD", "LONG", 1, 2000.0, 1990.0, 2030.0)
+
+    with pytest.raises(RuntimeError), db.transaction():
+        db.close_trade("XAUUSD", 2010.0, 1000.0)
+        db.update_equity(501000.0)
+        raise RuntimeError("crash between the two writes")
+
+    assert db.get_open_position("XAUUSD") != "FLAT"
+    assert db.get_account()["equity"] == 500000.0
+
+    with db.transaction():
+        db.close_trade("XAUUSD", 2010.0, 1000.0)
+        with db.transaction():  # nested block joins the outer one
+            db.update_equity(501000.0)
+
+    assert db.get_open_position("XAUUSD") == "FLAT"
+    assert db.get_account()["equity"] == 501000.0
+    assert db.get_last_exit_time("XAUUSD") is not None
+    db.close()
+
+
+def test_state_reads_are_sub_millisecond(tmp_path):
+    db = DBManager(str(tmp_path / "state.db"))
+    db.add_order(
+        {
+            "symbol": "XAUUSD",
+            "action": 1,
+            "limit_price": 1995.0,
+            "qty": 1,
+            "sl": 1985.0,
+            "tp": 2025.0,
+            "type": "LIMIT",
+            "date": "2026-01-01",
+        }
+    )
+    n = 1000
+    start = time.perf_counter()
+    for _ in range(n):
+        db.get_account()
+        db.get_open_position("XAUUSD")
+        db.get_orders("XAUUSD")
+    per_call = (time.perf_counter() - start) / (3 * n)
+    assert per_call < 0.001
+    assert db.get_orders("XAUUSD")[0]["limit_price"] == 1995.0
+    db.close()
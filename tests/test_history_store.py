@@ -0,0 +1,78 @@
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.history_store import HistoryStore
+
+
+def _bars(start, n):
+    times = pd.date_range(start, periods=n, freq="h")
+    close = 2000 + np.cumsum(np.random.default_rng(0).normal(0, 1, n))
+    return pd.DataFrame(
+        {
+            "time": times,
+            "open": close,
+            "high": close + 1,
+            "low": close - 1,
+            "close": close,
+            "tick_volume": 100,
+            "spread": 2,
+            "real_volume": 0,
+        }
+    )
+
+
+def test_upsert_is_idempotent_and_indexed(tmp_path):
+    db = str(tmp_path / "history.db")
+    store = HistoryStore(db, "XAUUSD")
+
+    store.upsert_bars(_bars("2026-01-01", 50))
+    store.upsert_bars(_bars("2026-01-02", 50))  # 26 bars overlap with the first batch
+    assert store.count() == 74
+
+    conn = sqlite3.connect(db)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    plan = " ".join(
+        r[-1] for r in conn.execute("EXPLAIN QUERY PLAN SELECT * FROM XAUUSD_history ORDER BY time")
+    )
+    conn.close()
+    assert "USE TEMP B-TREE" not in plan
+
+
+def test_legacy_table_is_deduplicated_on_open(tmp_path):
+    db = str(tmp_path / "history.db")
+    legacy = _bars("2026-01-01", 10)
+    conn = sqlite3.connect(db)
+    pd.concat([legacy, legacy]).to_sql("XAUUSD_history", conn, index=False)
+    conn.close()
+
+    assert HistoryStore(db, "XAUUSD").count() == 10
+
+
+def test_enrich_only_touches_new_rows(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"), "XAUUSD")
+    store.upsert_bars(_bars("2026-01-01", 100))
+    assert store.enrich_new_rows() == 100
+    first = store.read_range(end="2026-01-02")
+
+    store.upsert_bars(_bars("2026-01-05 04:00", 24))
+    assert store.enrich_new_rows() == 24
+    assert store.enrich_new_rows() == 0
+
+    again = store.read_range(end="2026-01-02")
+    pd.testing.assert_frame_equal(first, again)
+    assert store.read_range()["adx"].notna().all()
+
+
+def test_chunked_reader_covers_range(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"), "XAUUSD")
+    store.upsert_bars(_bars("2026-01-01", 100))
+
+    chunks = list(store.iter_chunks(chunksize=30, start="2026-01-02"))
+    assert [len(c) for c in chunks] == [30, 30, 16]
+    assert pd.concat(chunks)["time"].is_monotonic_increasing
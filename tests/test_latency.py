@@ -0,0 +1,73 @@
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import latency
+from utils.latency import LatencyRecorder, Trace, bucket_of, bucket_value
+
+
+def test_buckets_keep_relative_error_small():
+    for ns in (1_000, 37_519, 2_500_000, 999_999_999, 12 * 10**9):
+        assert abs(bucket_value(bucket_of(ns)) - ns) / ns <= 0.0625
+    assert bucket_of(10**20) == latency.N_BUCKETS - 1
+
+
+def test_percentiles_merge_every_threads_shard():
+    recorder = LatencyRecorder(enabled=True)
+
+    def worker(offset):
+        for i in range(1, 1001):
+            recorder.record("risk", (i + offset) * 1_000)  # 1..1000 us (+ offset)
+
+    threads = [threading.Thread(target=worker, args=(0,)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    summary = recorder.summary()
+    assert list(summary) == ["risk"]
+    stats = summary["risk"]
+    assert stats["count"] == 4000
+    assert abs(stats["p50_ms"] - 0.5) <= 0.5 * 0.0625
+    assert abs(stats["p99_ms"] - 0.99) <= 0.99 * 0.0625
+    assert stats["max_ms"] == 1.0
+    assert abs(recorder.percentile("risk", 0.95) - 0.95) <= 0.95 * 0.0625
+    assert recorder.percentile("fill", 0.5) is None
+
+
+def test_trace_marks_stages_and_end_to_end_from_origin():
+    recorder = LatencyRecorder(enabled=True)
+    landed = time.perf_counter_ns() - 50_000_000  # bar landed 50 ms ago
+    active = Trace(recorder, origin_ns=landed)
+    time.sleep(0.01)
+    active.mark("indicators")
+    active.mark("risk")
+    active.finish()
+
+    summary = recorder.summary()
+    assert summary["indicators"]["p50_ms"] >= 9
+    assert summary["risk"]["p50_ms"] < 5
+    assert summary["end_to_end"]["p50_ms"] >= 55
+
+
+def test_module_trace_is_scoped_and_export_writes_json(tmp_path):
+    recorder = latency.get_recorder()
+    recorder.reset()
+    latency.mark("ingest")  # no active trace: ignored
+    with latency.trace() as active:
+        assert latency.current() is active
+        latency.mark("ingest")
+        with latency.timer("journal"):
+            pass
+    assert latency.current() is None
+
+    path = tmp_path / "latency.json"
+    recorder.export(str(path))
+    stages = json.loads(path.read_text())["stages"]
+    assert stages["ingest"]["count"] == 1 and stages["journal"]["count"] == 1
+    recorder.reset()
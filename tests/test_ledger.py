@@ -0,0 +1,69 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution.db_manager import DBManager
+from execution.ledger import POSITION_CLOSED
+from execution.state_cache import BrokerStateCache
+
+
+def round_trip(state, n, entry=2000.0):
+    """n open/close cycles, each realising +100."""
+    for i in range(n):
+        state.add_trade(i, "XAUUSD", "LONG", 1, entry, entry - 10, entry + 30)
+        with state.transaction():
+            state.close_trade("XAUUSD", entry + 1, 100.0, reason="TP_HIT")
+            state.update_equity(state.get_account()["equity"] + 100.0)
+
+
+def test_restart_replays_only_the_tail_after_the_last_snapshot(tmp_path):
+    path = str(tmp_path / "state.db")
+    state = BrokerStateCache(DBManager(path), snapshot_every=50)
+    round_trip(state, 100)  # 300 events
+    state.add_trade(999, "XAUUSD", "LONG", 2, 2100.0, 2090.0, 2130.0)
+
+    restarted = BrokerStateCache(DBManager(path), snapshot_every=50)
+    ledger = restarted.ledger
+    tail = list(ledger.events(after_seq=ledger.last_snapshot_seq))
+    assert len(tail) < 50
+    assert restarted.get_account()["equity"] == 510000.0
+    assert restarted.get_open_position("XAUUSD")["qty"] == 2
+    assert restarted.verify() == []
+
+
+def test_point_in_time_state_for_audit(tmp_path):
+    state = BrokerStateCache(DBManager(str(tmp_path / "state.db")), snapshot_every=7)
+    round_trip(state, 10)
+    ledger = state.ledger
+
+    closes = [(seq, ts) for seq, ts, kind, _ in ledger.events() if kind == POSITION_CLOSED]
+    seq, ts = closes[3]
+    # Right after the 4th close the PnL is not yet in equity (3 credited so far)
+    assert ledger.equity_at(seq) == 500300.0
+    assert ledger.state_at(seq)["positions"] == {}
+    open_before = ledger.state_at(seq - 1)["positions"].values()
+    assert [p["entry_price"] for p in open_before] == [2000.0]
+    assert ledger.equity_at(ts) == 500300.0
+    assert ledger.equity_at(ledger.last_seq) == 501000.0
+    assert ledger.state_at(seq)["last_exit"]["XAUUSD"] == ts
+
+
+def test_rolled_back_events_leave_no_trace(tmp_path):
+    path = str(tmp_path / "state.db")
+    state = BrokerStateCache(DBManager(path), snapshot_every=2)
+    state.add_trade(1, "XAUUSD", "LONG", 1, 2000.0, 1990.0, 2030.0)
+    before = state.ledger.last_seq
+
+    try:
+        with state.transaction():
+            state.close_trade("XAUUSD", 1990.0, -1000.0, reason="SL_HIT")
+            state.update_equity(499000.0)  # also triggers a snapshot
+            raise RuntimeError("crash")
+    except RuntimeError:
+        pass
+
+    assert state.ledger.last_seq == before
+    restarted = BrokerStateCache(DBManager(path), snapshot_every=2)
+    assert restarted.get_open_position("XAUUSD") != "FLAT"
+    assert restarted.get_account()["equity"] == 500000.0
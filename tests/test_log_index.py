@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution.journal_manager import JournalManager
+from src.gold_trading_bot.performance_tracker import load_trade_journal
+from utils.log_index import LogIndex, parse_money, parse_timestamp, tail_rows
+from utils.write_behind import WriteBehindLog
+
+START = datetime(2026, 3, 1, 9, 0, 0)
+
+
+def key(row):
+    ts = parse_timestamp(row[0])
+    return None if ts is None else (ts, parse_money(row[1]))
+
+
+def test_tail_reads_only_the_end_of_the_file(tmp_path):
+    path = str(tmp_path / "audit.csv")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write("Timestamp,Details\r\n")
+        for i in range(50_000):
+            f.write(f"{START + timedelta(seconds=i)},row {i}\r\n")
+        f.write(f'{START},"multi\nline, quoted"\r\n')
+
+    rows = tail_rows(path, 3, block_size=64)
+    assert [r[1] for r in rows] == ["row 49998", "row 49999", "multi\nline, quoted"]
+    assert tail_rows(path, 2)[0][1] == "row 49999"
+
+    small = str(tmp_path / "small.csv")
+    with open(small, "w", encoding="utf-8") as f:
+        f.write("Timestamp,Details\n2026-03-01,a\n")
+    assert tail_rows(small, 10) == [["2026-03-01", "a"]]
+
+
+def test_writer_keeps_index_in_step(tmp_path):
+    path = str(tmp_path / "journal.csv")
+    log = WriteBehindLog(path, header=["Exit Time", "PnL", "Note"], index=key)
+    for i in range(100):
+        log.write_row([START + timedelta(hours=i), f"${i - 50}.00", "a,b\nc" if i == 7 else ""])
+    log.write_text("\n!!! KILL SWITCH !!!\n")
+    log.flush()
+
+    index = log.index
+    assert len(index.entries()) == 100
+    day = index.between(START.date(), START.date() + timedelta(days=1))
+    assert len(day) == 15  # 09:00-23:00
+    assert day["pnl"].sum() == sum(range(-50, -35))
+    assert index.read_rows(day)[7] == [str(START + timedelta(hours=7)), "$-43.00", "a,b\nc"]
+    assert [r[1] for r in index.read_rows(index.tail(2))] == ["$48.00", "$49.00"]
+    log.close()
+
+
+def test_index_catches_up_and_recovers(tmp_path):
+    path = str(tmp_path / "journal.csv")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Exit Time,PnL\n")
+        for i in range(10):
+            f.write(f"{START + timedelta(days=i)},${i}\n")
+        f.write("2026-03-20 10:00,$1")  # partial record, still being written
+
+    index = LogIndex(path, key)
+    assert index.refresh() == 11  # header + 10 rows
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(".50\n")
+    assert index.refresh() == 1
+    assert index.tail(1)["pnl"][0] == 1.5
+
+    with open(index.index_path, "ab") as f:
+        f.write(b"torn")
+    assert index.refresh() == 0 and len(index.entries()) == 11
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Exit Time,PnL\n2026-04-01,$3\n")
+    assert index.refresh() == 2  # log replaced: rebuilt
+    assert index.entries()["pnl"].tolist() == [3.0]
+
+
+def test_journal_reports_read_through_the_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(JournalManager, "FILE_PATH", str(tmp_path / "trade_journal.csv"))
+    for i, pnl in enumerate([120.0, -40.0, 15.5]):
+        JournalManager.log_trade(
+            {"ticket": i, "symbol": "XAUUSD", "pnl": pnl, "exit_time": START + timedelta(days=i)}
+        )
+
+    day = JournalManager.read_trades(START.date(), START.date() + timedelta(days=2))
+    assert [t["PnL"] for t in day] == ["$120.00", "$-40.00"]
+    assert JournalManager.read_trades(limit=1)[0]["Ticket"] == "2"
+    assert JournalManager.get_index().entries()["pnl"].sum() == 95.5
+    JournalManager.get_log().close()
+
+
+def test_tracker_timestamps_stay_in_local_time(tmp_path, monkeypatch):
+    monkeypatch.setattr(JournalManager, "FILE_PATH", str(tmp_path / "trade_journal.csv"))
+    monkeypatch.setenv("TZ", "Asia/Kolkata")
+    time.tzset()
+    try:
+        JournalManager.log_trade({"ticket": 1, "symbol": "XAUUSD", "pnl": 5.0, "exit_time": START})
+        JournalManager.flush()
+        trades = load_trade_journal(START.date(), START.date() + timedelta(days=1))
+        assert trades["timestamp"].tolist() == [START]  # not shifted by the UTC offset
+        assert trades["timestamp"].dt.tz is None
+        JournalManager.get_log().close()
+    finally:
+        monkeypatch.undo()
+        time.tzset()
@@ -0,0 +1,105 @@
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.currency_monitor import CurrencyMonitor
+from src.global_cues_monitor import GlobalCuesMonitor
+from utils.market_data import MarketDataCache, OfflineProvider
+
+
+def _frame(last, prev=100.0):
+    return pd.DataFrame({"Close": [prev, last]}, index=pd.date_range("2026-01-01", periods=2))
+
+
+def _cache(tmp_path, frames, **kwargs):
+    provider = OfflineProvider(frames, delay=kwargs.pop("delay", 0.0))
+    return MarketDataCache(provider, cache_dir=str(tmp_path), **kwargs), provider
+
+
+def test_missing_tickers_share_one_download(tmp_path):
+    cache, provider = _cache(tmp_path, {"A": _frame(101), "B": _frame(99)})
+    quotes = cache.change_pct(["A", "B"], period="2d")
+    cache.change_pct(["A", "B"], period="2d")
+
+    assert len(provider.calls) == 1
+    assert provider.calls[0][0] == ("A", "B")
+    assert round(quotes["A"][1], 6) == 1.0
+
+
+def test_disk_cache_survives_restart(tmp_path):
+    cache, provider = _cache(tmp_path, {"A": _frame(101)})
+    cache.get_history("A", period="2d")
+
+    restarted, provider2 = _cache(tmp_path, {"A": _frame(555)})
+    assert restarted.get_history("A", period="2d")["Close"].iloc[-1] == 101
+    assert provider2.calls == []
+
+
+def test_disk_io_runs_outside_the_lock(tmp_path):
+    cache, _ = _cache(tmp_path, {"A": _frame(101)})
+    held = []
+    for name in ("_load_disk", "_write_disk"):
+        io = getattr(cache, name)
+
+        def spy(*args, io=io):
+            held.append(cache._lock.locked())
+            return io(*args)
+
+        setattr(cache, name, spy)
+    cache.get_history("A", period="2d")
+    assert held == [False, False]  # one cold read, one write
+
+
+def test_stale_entry_is_served_then_revalidated(tmp_path):
+    cache, provider = _cache(tmp_path, {"A": _frame(101)}, ttl=0.05, stale_ttl=60)
+    cache.get_history("A", period="2d")
+    provider.frames["A"] = _frame(102)
+    time.sleep(0.06)
+
+    assert cache.get_history("A", period="2d")["Close"].iloc[-1] == 101  # no wait
+    deadline = time.time() + 2
+    while cache.get_history("A", period="2d")["Close"].iloc[-1] != 102:
+        assert time.time() < deadline
+        time.sleep(0.01)
+    assert cache.stats["stale_hits"] >= 1
+
+
+def test_concurrent_callers_single_flight(tmp_path):
+    cache, provider = _cache(tmp_path, {"A": _frame(101)}, delay=0.2)
+    results = []
+
+    def worker():
+        results.append(cache.get_history("A", period="2d")["Close"].iloc[-1])
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == [101] * 8
+    assert len(provider.calls) == 1
+
+
+def test_monitors_use_the_shared_cache(tmp_path):
+    symbols = ["USDINR=X", "^DXY", "^NSEI", "^DJI", "^GSPC", "^IXIC", "^N225", "^HSI"]
+    cache, provider = _cache(tmp_path, {s: _frame(101) for s in symbols})
+
+    cues = GlobalCuesMonitor(market_data=cache)
+    cues.prefetch()
+    cues.fetch_sgx_nifty()
+    cues.fetch_us_futures()
+    cues.fetch_asia_indices()
+    assert cues.determine_session_bias() == "BULLISH"
+
+    currency = CurrencyMonitor(market_data=cache)
+    currency.fetch_currencies()
+    assert currency.get_currency_impact_on_gold()["mcx_impact"] == "UP"
+
+    # One batched call for the six cues, one for the two currency pairs
+    assert len(provider.calls) == 2
@@ -0,0 +1,89 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution.db_manager import DBManager
+from src.database import Database
+from utils.history_store import HistoryStore
+from utils.migrations import Migration, current_version, full_scans, migrate
+
+STEPS = [
+    Migration(1, "table", ["CREATE TABLE t (a INTEGER, b TEXT)"], ["DROP TABLE t"]),
+    Migration(2, "index", ["CREATE INDEX idx_t_a ON t(a)"], ["DROP INDEX idx_t_a"]),
+]
+
+
+def indexes(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+
+
+def test_upgrade_rollback_and_reapply(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "m.db"))
+    assert migrate(conn, "demo", STEPS) == [(1, "up"), (2, "up")]
+    assert migrate(conn, "demo", STEPS) == []  # already current
+    assert current_version(conn, "demo") == 2 and "idx_t_a" in indexes(conn)
+
+    assert migrate(conn, "demo", STEPS, target=1) == [(2, "down")]
+    assert "idx_t_a" not in indexes(conn)
+    assert current_version(conn, "other") == 0  # versions are tracked per store
+
+    broken = [*STEPS, Migration(3, "bad", ["CREATE INDEX idx_t_b ON t(b)", "NOT SQL"], [])]
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(conn, "demo", broken)
+    # v2 committed on its own; the failed v3 left nothing behind
+    assert current_version(conn, "demo") == 2
+    assert "idx_t_b" not in indexes(conn)
+    conn.close()
+
+
+def test_processes_starting_together_apply_each_step_once(tmp_path):
+    path = str(tmp_path / "m.db")
+
+    def add_column(conn):
+        time.sleep(0.1)  # widen the race
+        conn.execute("ALTER TABLE t ADD COLUMN c REAL")
+
+    steps = [STEPS[0], Migration(2, "column", add_column, ["ALTER TABLE t DROP COLUMN c"])]
+    migrate(sqlite3.connect(path), "demo", steps, target=1)
+    start, results = threading.Barrier(2), []
+
+    def boot():
+        conn = sqlite3.connect(path, timeout=5)
+        start.wait()
+        results.append(migrate(conn, "demo", steps))
+        conn.close()
+
+    threads = [threading.Thread(target=boot) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(results) == [[], [(2, "up")]]  # no "duplicate column name"
+
+
+def test_hot_queries_use_indexes_in_every_store(tmp_path):
+    db = Database(str(tmp_path / "goldbot.db"))
+    state = DBManager(str(tmp_path / "bot_state.db"))
+    history = HistoryStore(str(tmp_path / "trading_history.db"))
+
+    for plans in (db.query_plans(), state.query_plans(), history.query_plans()):
+        assert plans and full_scans(plans) == []
+    assert "COVERING INDEX" in " ".join(state.query_plans()["last_exit"])
+    assert "idx_XAUUSD_history_pending" in " ".join(history.query_plans()["first_pending"])
+    db.close()
+    state.close()
+
+
+def test_store_connections_are_tuned(tmp_path):
+    state = DBManager(str(tmp_path / "bot_state.db"))
+    conn = state._get_conn()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -65536
+    assert conn.execute("PRAGMA mmap_size").fetchone()[0] > 0
+    state.close()
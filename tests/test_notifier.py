@@ -0,0 +1,143 @@
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.notifier import MAX_MESSAGE_LEN, NotificationDispatcher
+
+
+class _StubTelegram(BaseHTTPRequestHandler):
+    """
+    Local sendMessage endpoint: records every call, answers 429 while `busy` > 0
+    and 400 to Markdown with an unbalanced `*`.
+    """
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.calls.append((time.monotonic(), self.path, body))
+            busy = server.busy > 0
+            server.busy -= busy
+        if busy:
+            payload = {"ok": False, "parameters": {"retry_after": 0.05}}
+            self.send_response(429)
+        elif "parse_mode" in body and body["text"].count("*") % 2:
+            payload = {"ok": False, "description": "can't parse entities"}
+            self.send_response(400)
+        else:
+            payload = {"ok": True}
+            self.send_response(200)
+        data = json.dumps(payload).encode()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubTelegram)
+    server.calls, server.busy, server.lock = [], 0, threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _dispatcher(server, **kwargs):
+    return NotificationDispatcher(
+        api_url=f"http://127.0.0.1:{server.server_address[1]}",
+        token="TEST",
+        chat_id="42",
+        **kwargs,
+    )
+
+
+def test_burst_of_fills_goes_out_as_one_digest(stub):
+    dispatcher = _dispatcher(stub, window=0.2, min_interval=0.0)
+    start = time.monotonic()
+    for i in range(5):
+        dispatcher.post(f"fill {i}")
+    assert time.monotonic() - start < 0.1  # post never waits on the network
+    assert dispatcher.flush(5)
+    dispatcher.stop()
+
+    assert len(stub.calls) == 1
+    _, path, body = stub.calls[0]
+    assert path == "/botTEST/sendMessage"
+    assert body["chat_id"] == "42" and body["parse_mode"] == "Markdown"
+    assert body["text"].startswith("🧾 *5 updates*")
+    assert body["text"].split("\n\n")[1:] == [f"fill {i}" for i in range(5)]
+    assert dispatcher.stats["sent"] == 5 and dispatcher.stats["digests"] == 1
+
+
+def test_urgent_alert_skips_the_window_and_the_rate_limit_spaces_sends(stub):
+    dispatcher = _dispatcher(stub, window=1.0, min_interval=0.3)
+    dispatcher.post("fill")
+    dispatcher.post("KILL SWITCH", urgent=True)
+    assert dispatcher.flush(5)
+    dispatcher.stop()
+
+    texts = [body["text"] for _, _, body in stub.calls]
+    assert texts == ["KILL SWITCH", "fill"]
+    assert stub.calls[1][0] - stub.calls[0][0] >= 0.3
+
+
+def test_429_is_retried_after_the_advertised_delay(stub):
+    stub.busy = 2
+    dispatcher = _dispatcher(stub, window=0.0, min_interval=0.0)
+    dispatcher.post("fill")
+    assert dispatcher.flush(5)
+    dispatcher.stop()
+
+    assert len(stub.calls) == 3
+    assert dispatcher.stats["sent"] == 1 and dispatcher.stats["failed"] == 0
+
+
+def test_digests_fit_the_limit_and_bad_markdown_goes_out_plain(stub):
+    dispatcher = _dispatcher(stub, window=0.2, min_interval=0.0)
+    fills = [f"fill {i} " + "x" * 1000 for i in range(6)] + ["SL moved to 2045 *trail"]
+    for text in fills:
+        dispatcher.post(text)
+    assert dispatcher.flush(5)
+    dispatcher.stop()
+
+    bodies = [body for _, _, body in stub.calls]
+    assert all(len(body["text"]) <= MAX_MESSAGE_LEN for body in bodies)
+    assert [("parse_mode" in body) for body in bodies] == [True, True, False]  # 400 resent plain
+    delivered = [part for body in bodies[::2] for part in body["text"].split("\n\n")[1:]]
+    assert delivered == fills  # nothing cut, nothing dropped
+    assert dispatcher.stats["sent"] == 7 and dispatcher.stats["failed"] == 0
+
+
+def test_full_queue_drops_oldest_routine_alert_without_blocking():
+    release = threading.Event()
+    sent = []
+
+    def slow_send(text):
+        release.wait(5)
+        sent.append(text)
+
+    dispatcher = NotificationDispatcher(send=slow_send, max_queue=3, window=0.0, min_interval=0.0)
+    dispatcher.post("first")  # taken by the delivery thread, stuck in slow_send
+    time.sleep(0.1)
+    for i in range(5):
+        dispatcher.post(f"fill {i}")
+    assert dispatcher.stats["dropped"] == 2
+
+    release.set()
+    assert dispatcher.flush(5)
+    dispatcher.stop()
+    assert sent[0] == "first"
+    assert sent[1].split("\n\n")[1:] == ["fill 2", "fill 3", "fill 4"]
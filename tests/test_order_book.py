@@ -0,0 +1,97 @@
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution.db_manager import DBManager
+from execution.order_book import BUY, SELL, OrderBook
+from execution.state_cache import BrokerStateCache
+
+
+def order(symbol, action, price, kind="LIMIT", qty=1.0):
+    return {
+        "symbol": symbol,
+        "action": action,
+        "limit_price": price,
+        "qty": qty,
+        "sl": price - 10,
+        "tp": price + 20,
+        "type": kind,
+        "date": "2026-03-02",
+    }
+
+
+def test_tick_pops_only_crossed_orders_nearest_first():
+    book = OrderBook()
+    book.add("buy-1990", "XAUUSD", BUY, "LIMIT", 1990.0)
+    book.add("buy-1995", "XAUUSD", BUY, "LIMIT", 1995.0)
+    book.add("sell-stop-1980", "XAUUSD", SELL, "STOP", 1980.0)
+    book.add("buy-stop-2010", "XAUUSD", BUY, "STOP", 2010.0)
+    book.add("sell-2020", "XAUUSD", SELL, "LIMIT", 2020.0)
+    book.add("other", "MCX:GOLD", BUY, "LIMIT", 99999.0)
+
+    assert book.crossed("XAUUSD", 2000.0) == []
+    assert book.crossed("XAUUSD", 1992.0) == [("buy-1995", 1995.0)]
+    assert book.crossed("XAUUSD", 1979.0) == [("buy-1990", 1990.0), ("sell-stop-1980", 1980.0)]
+    assert book.crossed("XAUUSD", 2015.0) == [("buy-stop-2010", 2010.0)]
+    assert len(book) == 2 and "other" in book
+
+
+def test_oco_and_cancel_replace():
+    book = OrderBook()
+    book.add("sl", "XAUUSD", SELL, "STOP", 1990.0)
+    book.add("tp", "XAUUSD", SELL, "LIMIT", 2030.0, oco="sl")
+    assert book.replace("sl", 1995.0)  # trail the stop; link survives
+    assert book.crossed("XAUUSD", 1996.0) == []
+    assert book.crossed("XAUUSD", 1994.0) == [("sl", 1995.0)]
+    assert "tp" not in book  # cancelled by its OCO partner
+    assert book.crossed("XAUUSD", 2040.0) == []
+
+    book.add("a", "XAUUSD", BUY, "LIMIT", 1900.0)
+    assert book.cancel("a") and not book.cancel("a")
+    assert book.crossed("XAUUSD", 1800.0) == []
+
+
+def test_state_cache_books_resting_orders(tmp_path):
+    path = str(tmp_path / "state.db")
+    state = BrokerStateCache(DBManager(path))
+    first = state.add_order(order("XAUUSD", BUY, 1990.0))
+    second = state.add_order(order("XAUUSD", BUY, 2010.0, kind="STOP"))
+    state.add_order(order("XAUUSD", SELL, 2050.0))
+
+    assert state.replace_order(first, limit_price=1985.0, qty=2.0)
+    state.remove_order(second)
+    assert state.book.crossed("XAUUSD", 1986.0) == []
+
+    restarted = BrokerStateCache(DBManager(path))
+    assert restarted.get_order(first)["limit_price"] == 1985.0
+    assert restarted.get_order(first)["qty"] == 2.0
+    assert restarted.verify() == []
+    assert restarted.book.crossed("XAUUSD", 1979.0) == [(("order", first), 1985.0)]
+    assert len(restarted.book) == 1
+
+
+def test_thousands_of_resting_orders_at_tick_rate():
+    rng = random.Random(11)
+    book = OrderBook()
+    for i in range(5_000):
+        below = i % 2 == 0
+        price = 2000.0 - rng.uniform(1, 50) if below else 2000.0 + rng.uniform(1, 50)
+        book.add(i, "XAUUSD", BUY if below else SELL, "LIMIT", price)
+    for i in range(0, 5_000, 3):
+        book.replace(i, book.get(i)["price"] + (-1 if i % 2 == 0 else 1))
+    for i in range(1, 5_000, 7):
+        book.cancel(i)
+
+    start = time.perf_counter()
+    fired = []
+    for tick in range(20_000):
+        fired += book.crossed("XAUUSD", 2000.0 + (tick % 200 - 100) * 0.001)
+    assert time.perf_counter() - start < 0.5
+    assert fired == []
+
+    fired = book.crossed("XAUUSD", 1975.0)
+    assert fired and all(price >= 1975.0 for _, price in fired)
+    assert [p for _, p in fired] == sorted((p for _, p in fired), reverse=True)
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution.fake_broker import FakeBroker
+from execution.order_router import ACCEPTED, FAILED, REJECTED, UNKNOWN, OrderRouter
+
+
+@pytest.mark.asyncio
+async def test_same_key_trades_once():
+    broker = FakeBroker()
+    async with OrderRouter({"fake": broker}, seed=1) as router:
+        first = await router.submit("fake", 1, "XAUUSD", 2000.0, 1.0, key="sig-42", sl=1990.0)
+        again = await router.submit("fake", 1, "XAUUSD", 2000.0, 1.0, key="sig-42", sl=1990.0)
+        assert again is first
+        done = await router.wait("sig-42", timeout=1)
+
+    assert done["state"] == ACCEPTED and done["attempts"] == 1
+    assert done["result"]["client_order_id"] == "sig-42"
+    assert len(broker.fills) == 1 and broker.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_bounded_retries_and_final_states():
+    broker = FakeBroker()
+    async with OrderRouter({"fake": broker}, max_retries=2, backoff=(0.001, 0.005)) as router:
+        broker.fail_next = 2  # two dropped attempts, the third gets through
+        retried = await router.submit("fake", 1, "XAUUSD", 2000.0, 1.0)
+        assert (await router.wait(retried["key"]))["state"] == ACCEPTED
+        assert retried["attempts"] == 3
+
+        broker.fail_next = 5
+        exhausted = await router.submit("fake", 1, "XAUUSD", 2000.0, 1.0)
+        assert (await router.wait(exhausted["key"]))["state"] == FAILED
+        assert exhausted["attempts"] == 3 and "BrokerConnectionError" in exhausted["error"]
+
+        broker.fail_next = 0
+        rejected = await router.submit("fake", 1, "XAUUSD", 2000.0, 0.0)
+        assert (await router.wait(rejected["key"]))["state"] == REJECTED
+        assert rejected["attempts"] == 1  # a broker "no" is never retried
+        assert router.pending() == []
+
+
+@pytest.mark.asyncio
+async def test_slow_broker_does_not_stall_the_others():
+    slow, fast = FakeBroker(latency=0.3), FakeBroker(latency=0.001)
+    async with OrderRouter({"slow": slow, "fast": fast}, workers=1) as router:
+        start = time.perf_counter()
+        slow_orders = [await router.submit("slow", 1, "MCX:GOLD", 68000.0, 1.0) for _ in range(3)]
+        submit_ms = (time.perf_counter() - start) * 1000
+        fast_orders = [await router.submit("fast", 1, "XAUUSD", 2000.0, 1.0) for _ in range(20)]
+        await asyncio.gather(*(router.wait(o["key"]) for o in fast_orders))
+        fast_done = time.perf_counter() - start
+
+        assert submit_ms < 50  # submission never waits on the broker
+        assert fast_done < 0.25 and all(o["state"] == ACCEPTED for o in fast_orders)
+        assert all(o["state"] != ACCEPTED for o in slow_orders)  # still working through them
+
+
+@pytest.mark.asyncio
+async def test_throughput_and_latency_with_concurrent_workers():
+    broker = FakeBroker(latency=(0.005, 0.015), seed=3)
+    async with OrderRouter({"fake": broker}, workers=8) as router:
+        start = time.perf_counter()
+        orders = [await router.submit("fake", 1, "XAUUSD", 2000.0, 0.01) for _ in range(200)]
+        await asyncio.gather(*(router.wait(o["key"]) for o in orders))
+        elapsed = time.perf_counter() - start
+
+    assert len(broker.fills) == 200
+    assert elapsed < 200 * 0.005 / 2  # well under the serial cost
+    assert all(o["latency_ms"] > 0 for o in orders)
+
+
+class SlowPaper:
+    """Takes client_order_id through **kwargs but ignores it, like PaperBroker."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.fills = []
+
+    def place_order(self, action, symbol, price, qty, **kwargs):
+        time.sleep(self.delay)
+        self.fills.append(qty)
+        return True
+
+
+@pytest.mark.asyncio
+async def test_timeouts_are_only_retried_where_the_broker_dedupes():
+    paper = SlowPaper(0.3)
+    deduping = FakeBroker(latency=0.3)
+    async with OrderRouter(
+        {"paper": paper, "fake": deduping}, timeout=0.2, max_retries=2, backoff=(0.001, 0.005)
+    ) as router:
+        unknown = await router.submit("paper", 1, "XAUUSD", 2000.0, 1.0)
+        retried = await router.submit("fake", 1, "XAUUSD", 2000.0, 1.0)
+        assert (await router.wait(unknown["key"]))["state"] == UNKNOWN
+        assert (await router.wait(retried["key"]))["state"] == FAILED
+        await asyncio.sleep(0.4)  # let the abandoned threads finish
+
+    assert unknown["attempts"] == 1 and "TimeoutError" in unknown["error"]
+    assert paper.fills == [1.0]  # sent once: the stray fill is left to reconcile
+    assert retried["attempts"] == 3 and len(deduping.fills) == 1  # the venue deduped
@@ -0,0 +1,91 @@
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution.db_manager import DBManager
+from execution.journal_manager import JournalManager
+from execution.ledger import _decode_state
+from execution.paper_broker import PaperBroker
+from execution.state_cache import BrokerStateCache
+from utils.notifier import TelegramNotifier
+
+
+def test_pyramiding_and_partial_closes_survive_restart(tmp_path):
+    path = str(tmp_path / "state.db")
+    state = BrokerStateCache(DBManager(path))
+    first = state.add_trade(1, "XAUUSD", "LONG", 1.0, 2000.0, 1990.0, 2030.0, strategy="wyckoff")
+    second = state.add_trade(2, "XAUUSD", "LONG", 0.5, 2010.0, 2000.0, 2040.0, strategy="wyckoff")
+    state.add_trade(3, "MCX:GOLD", "LONG", 2.0, 68000.0, 67800.0, 68600.0, strategy="mcx")
+
+    assert [p["id"] for p in state.get_positions("XAUUSD")] == [first, second]
+    state.close_position(first, 2020.0, 600.0, qty=0.3, reason="TP_HIT")
+    assert state.get_position(first)["qty"] == 0.7
+    assert state.get_exposure("XAUUSD")["long_qty"] == 1.2
+
+    state.close_position(second, 2005.0, -250.0)
+    assert state.get_open_position("XAUUSD")["id"] == first
+    assert state.get_positions(strategy="mcx")[0]["symbol"] == "MCX:GOLD"
+    assert state.verify() == []
+
+    restarted = BrokerStateCache(DBManager(path))
+    assert restarted.get_positions() == state.get_positions()
+    assert restarted.get_exposure() == state.get_exposure()
+    assert restarted.verify() == []
+
+    conn = restarted.db._get_conn()
+    closed = conn.execute(
+        "SELECT parent_id, size, pnl FROM trades WHERE status='CLOSED' ORDER BY trade_id"
+    ).fetchall()
+    # The partial close split off a child row; the full close closed `second` in place
+    assert [tuple(row) for row in closed] == [(None, 0.5, -250.0), (first, 0.3, 600.0)]
+
+
+def test_exposure_is_per_symbol_at_hundreds_of_positions(tmp_path):
+    state = BrokerStateCache(DBManager(str(tmp_path / "state.db")))
+    symbols = ["XAUUSD", "MCX:GOLD", "XAGUSD"]
+    with state.transaction():
+        for i in range(300):
+            state.add_trade(i, symbols[i % 3], "LONG", 1.0, 2000.0, 1995.0, 2020.0)
+
+    exposure = state.get_exposure()
+    assert set(exposure) == set(symbols)
+    assert exposure["XAUUSD"]["positions"] == 100 and exposure["XAUUSD"]["risk"] == 500.0
+
+    start = time.perf_counter()
+    for _ in range(10_000):
+        state.get_exposure()
+    assert time.perf_counter() - start < 0.5  # 3 symbols, not 300 positions
+
+    state.close_trade("XAGUSD", 2001.0, 100.0)
+    assert state.get_exposure("XAGUSD") is None
+    assert state.get_last_exit_time("XAGUSD") is not None
+    assert len(state.get_positions()) == 200
+
+
+def test_snapshots_keyed_by_symbol_still_load():
+    legacy = {
+        "account": {"equity": 1.0, "balance": 1.0},
+        "positions": {"XAUUSD": {"id": 7, "symbol": "XAUUSD", "qty": 1}},
+        "orders": {"3": {"order_id": 3}},
+        "last_exit": {},
+    }
+    state = _decode_state(json.dumps(legacy))
+    assert state["positions"] == {
+        7: {"id": 7, "symbol": "XAUUSD", "qty": 1, "strategy": None, "trail": 0.0, "atr_mult": 0.0}
+    }
+    assert list(state["orders"]) == [3]
+
+
+def test_close_alert_names_the_closed_side(tmp_path, monkeypatch):
+    monkeypatch.setattr(JournalManager, "FILE_PATH", str(tmp_path / "journal.csv"))
+    alerts = []
+    monkeypatch.setattr(TelegramNotifier, "notify", lambda text, urgent=False: alerts.append(text))
+    broker = PaperBroker(seed=7, latency=(0.0, 0.0), db_path=str(tmp_path / "state.db"))
+    broker.state.add_trade(1, "XAUUSD", "SHORT", 1.0, 2000.0, 2010.0, 1980.0)
+
+    assert broker._close_positions("XAUUSD", 1990.0, None)
+    assert "*CLOSE SHORT*" in alerts[-1]
+    JournalManager.get_log().close()
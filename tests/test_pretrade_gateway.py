@@ -0,0 +1,147 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pretrade_gateway import PreTradeGateway
+
+
+class Fiscal:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = 0
+
+    def validate_duty_before_trading(self):
+        self.calls += 1
+        if self.fail:
+            raise ValueError("duty not confirmed")
+        return 0.06
+
+
+class SlowCues:
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+
+    def get_bias(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return "BULLISH"
+
+
+class Calendar:
+    def is_safe_to_trade(self):
+        time.sleep(0.2)
+        return True
+
+
+class Currency:
+    def __init__(self):
+        self.calls = 0
+
+    def is_currency_stable(self):
+        self.calls += 1
+        time.sleep(0.2)
+        return True
+
+    def get_usdinr_volatility(self):
+        return 0.1
+
+
+class Geo:
+    def get_risk_level(self):
+        time.sleep(0.2)
+        return "LOW"
+
+
+class Pivots:
+    def calculate_levels(self, high, low, close):
+        return {k: close for k in ["S2", "S1", "Pivot", "R1", "R2"]}
+
+
+class Signals:
+    def check_confluence(self, **kwargs):
+        return {"strength": "BUY"}
+
+
+class Risk:
+    def calculate_position_size(self, entry, stop):
+        return 1
+
+
+def make_gateway(fiscal=None, cues=None, **kwargs):
+    return PreTradeGateway(
+        fiscal_loader=fiscal or Fiscal(),
+        global_cues=cues or SlowCues(0.2),
+        econ_calendar=Calendar(),
+        currency_monitor=Currency(),
+        pivot_calc=Pivots(),
+        signal_filter=Signals(),
+        geo_risk=Geo(),
+        risk_manager=Risk(),
+        **kwargs,
+    )
+
+
+def test_concurrent_latency_is_bounded_by_slowest_check():
+    gateway = make_gateway()
+    start = time.perf_counter()
+    go, ctx = gateway.run_all_checks()
+    elapsed = time.perf_counter() - start
+
+    assert go and ctx["gateway_status"] == "GO"
+    assert len(ctx["checks_passed"]) == 8
+    # Four 0.2s checks: ~0.2s in parallel, ~0.8s if run one after another
+    assert elapsed < 0.6
+    gateway.shutdown()
+
+
+def test_verdicts_are_cached_per_check_window():
+    fiscal, cues = Fiscal(), SlowCues(0.0)
+    gateway = make_gateway(fiscal, cues)
+    gateway.run_all_checks()
+    _, ctx = gateway.run_all_checks()
+
+    assert fiscal.calls == 1  # daily
+    assert ctx["checks"]["fiscal_policy"]["cached"] is True
+    assert gateway.currency_monitor.calls == 1  # per minute
+    assert "cached" not in ctx["checks"]["risk_manager"]  # never cached
+
+    gateway.invalidate("CURRENCY_MONITOR")
+    gateway.run_all_checks()
+    assert gateway.currency_monitor.calls == 2
+    gateway.shutdown()
+
+
+def test_timeout_falls_back_to_last_known_value():
+    cues = SlowCues(0.0)
+    gateway = make_gateway(cues=cues, timeouts={"GLOBAL_CUES": 0.1}, validity={"GLOBAL_CUES": 0})
+    gateway.run_all_checks()
+
+    cues.delay = 1.0
+    start = time.perf_counter()
+    go, ctx = gateway.run_all_checks()
+
+    assert time.perf_counter() - start < 0.6
+    assert go
+    assert ctx["checks"]["global_cues"]["stale"] is True
+    assert ctx["checks"]["global_cues"]["bias"] == "BULLISH"
+    gateway.shutdown()
+
+
+def test_fiscal_failure_short_circuits():
+    cues = SlowCues(1.0)
+    gateway = make_gateway(Fiscal(fail=True), cues)
+    start = time.perf_counter()
+    go, ctx = gateway.run_all_checks()
+
+    assert not go
+    assert ctx["gateway_status"] == "BLOCKED_CRITICAL"
+    assert ctx["checks_failed"] == ["DUTY_CONFIRMATION"]
+    assert time.perf_counter() - start < 0.5
+    assert cues.calls == 0  # no network check was launched
+
+    _, seq_ctx = gateway.run_all_checks(concurrent=False)
+    assert list(seq_ctx["checks"]) == ["fiscal_policy"]
+    gateway.shutdown()
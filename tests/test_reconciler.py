@@ -0,0 +1,120 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution.db_manager import DBManager
+from execution.fake_broker import FakeBroker
+from execution.reconciler import (
+    MISSING,
+    ORPHANED,
+    PRICE_DRIFT,
+    RECONCILED,
+    RESOLVED,
+    SIZE_DRIFT,
+    Reconciler,
+)
+from execution.state_cache import BrokerStateCache
+
+ORDER = {
+    "symbol": "XAUUSD",
+    "action": 1,
+    "limit_price": 1995.0,
+    "qty": 1,
+    "sl": 1985.0,
+    "tp": 2025.0,
+    "type": "LIMIT",
+    "date": "2026-01-01",
+}
+
+
+def _mirror(tmp_path, name="state.db", **kwargs):
+    """A broker and a ledger that agree: one XAUUSD long, one resting buy limit."""
+    broker = FakeBroker(**kwargs)
+    broker.place_order(1, "XAUUSD", 2000.0, 2.0)
+    broker.orders.append(dict(ORDER))
+    ledger = BrokerStateCache(DBManager(str(tmp_path / name)))
+    ledger.add_trade(1, "XAUUSD", "LONG", 2.0, 2000.0, 1990.0, 2030.0)
+    ledger.add_order(ORDER)
+    return broker, ledger
+
+
+@pytest.mark.asyncio
+async def test_only_deltas_are_emitted(tmp_path):
+    broker, ledger = _mirror(tmp_path)
+    reconciler = Reconciler({"mt5": broker}, {"mt5": ledger}, auto_heal=False)
+    assert await reconciler.reconcile() == []
+
+    broker.fills[0]["qty"] = 1.5  # partially closed at the venue
+    broker.place_order(2, "EURUSD", 1.1, 3.0)  # opened outside the bot
+    broker.orders.clear()  # limit cancelled at the venue
+    deltas = await reconciler.reconcile()
+    issues = {(d["kind"], d["key"]): d["issue"] for d in deltas}
+    assert issues == {
+        ("position", ("XAUUSD", "LONG")): SIZE_DRIFT,
+        ("position", ("EURUSD", "SHORT")): ORPHANED,
+        ("order", ("XAUUSD", "LONG", "LIMIT", 1995.0)): MISSING,
+    }
+    assert await reconciler.reconcile() == []  # unchanged: nothing new to say
+
+    broker.fills[0]["qty"] = 2.0
+    deltas = await reconciler.reconcile()
+    assert [(d["key"], d["issue"]) for d in deltas] == [(("XAUUSD", "LONG"), RESOLVED)]
+
+
+@pytest.mark.asyncio
+async def test_auto_heal_brings_the_ledger_in_line(tmp_path):
+    broker, ledger = _mirror(tmp_path)
+    reconciler = Reconciler({"mt5": broker}, {"mt5": ledger}, auto_heal=True)
+
+    ledger.add_trade(2, "EURUSD", "SHORT", 3.0, 1.1, 1.2, 1.0)  # already closed at the venue
+    broker.fills[0].update(qty=3.0, price=2002.0)  # added to at the venue
+    broker.place_order(1, "GBPUSD", 1.3, 1.0)  # opened outside the bot
+    broker.orders[0]["qty"] = 2
+    broker.orders.append({**ORDER, "action": 2, "limit_price": 2040.0})
+    await reconciler.reconcile()
+
+    assert ledger.get_exposure("XAUUSD")["long_qty"] == pytest.approx(3.0)
+    assert ledger.get_exposure("XAUUSD")["avg_entry"] == pytest.approx(2002.0)
+    assert ledger.get_positions("EURUSD") == []
+    [gbpusd] = ledger.get_positions("GBPUSD")
+    assert gbpusd["type"] == "LONG" and gbpusd["qty"] == 1.0
+    assert gbpusd["strategy"] == RECONCILED
+    orders = sorted((o["action"], o["limit_price"], o["qty"]) for o in ledger.get_orders())
+    assert orders == [(1, 1995.0, 2), (2, 2040.0, 1)]
+    assert ledger.verify() == []
+
+    deltas = await reconciler.reconcile()
+    assert deltas and {d["issue"] for d in deltas} == {RESOLVED}
+    assert await reconciler.reconcile() == []
+
+
+@pytest.mark.asyncio
+async def test_price_drift_is_reported_but_never_rewritten(tmp_path):
+    broker, ledger = _mirror(tmp_path)
+    reconciler = Reconciler({"mt5": broker}, {"mt5": ledger}, auto_heal=True)
+    broker.fills[0]["price"] = 2004.0
+    [delta] = await reconciler.reconcile()
+    assert delta["issue"] == PRICE_DRIFT
+    assert delta["ledger"]["avg_entry"] == 2000.0 and delta["remote"]["avg_entry"] == 2004.0
+    assert ledger.get_positions("XAUUSD")[0]["entry_price"] == 2000.0
+
+
+@pytest.mark.asyncio
+async def test_brokers_are_snapshotted_concurrently_and_a_hung_one_is_skipped(tmp_path):
+    brokers, ledgers = {}, {}
+    for i in range(4):
+        name = f"b{i}"
+        brokers[name], ledgers[name] = _mirror(tmp_path, f"{name}.db", latency=0.2)
+    hung, _ = _mirror(tmp_path, "hung.db", latency=1.0)
+    brokers["hung"] = hung
+    ledgers["hung"] = ledgers["b0"]
+    reconciler = Reconciler(brokers, ledgers, timeout=0.5)
+
+    start = time.perf_counter()
+    snapshots = await reconciler.snapshot()
+    assert time.perf_counter() - start < 0.8  # not 4 x 0.2 + 1.0 in series
+    assert sorted(snapshots) == ["b0", "b1", "b2", "b3"]
@@ -0,0 +1,108 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution.slippage_model import BUY, SELL, SlippageModel, bar_hours, relative_volatility
+
+
+def test_default_prior_matches_the_former_paper_costs():
+    model = SlippageModel.default()
+    prices = model.execution_prices([2000.0, 2000.0], [BUY, SELL], [9, 9], [0.0005] * 2, [1, 1])
+    assert prices[0] == pytest.approx(2000.0 + 0.20 + 0.08)
+    assert prices[1] == pytest.approx(2000.0 - 0.08)
+
+
+def _history():
+    """A day of 1-minute quotes: spread $0.30 in the 08:00 hour, $0.10 otherwise."""
+    times = pd.date_range("2026-03-02", periods=24 * 60, freq="min")
+    bid = 2000.0 + np.sin(np.arange(len(times)) / 50.0)
+    spread = np.where(times.hour == 8, 0.30, 0.10)
+    ticks = pd.DataFrame(
+        {
+            "timestamp": times,
+            "bid": bid,
+            "ask": bid + spread,
+            "high": bid + 0.5,
+            "low": bid - 0.5,
+            "close": bid,
+        }
+    )
+    return times, bid, ticks
+
+
+def test_calibrate_recovers_spread_and_size_dependent_slippage():
+    times, bid, ticks = _history()
+    rng = np.random.default_rng(0)
+    fills = []
+    for k in rng.integers(0, len(times), 4000):
+        qty = float(rng.choice([0.5, 10.0]))
+        slip = 1e-4 if qty > 5 else 2e-5  # big orders slip 5x more
+        side = BUY if k % 2 else SELL
+        ask = bid[k] + (0.30 if times[k].hour == 8 else 0.10)
+        price = ask * (1 + slip) if side == BUY else bid[k] * (1 - slip)
+        fills.append({"time": times[k], "side": side, "qty": qty, "price": price})
+
+    model = SlippageModel.calibrate(fills, ticks, vol_edges=[0.001])  # one calm regime
+    spread, slip, sd = model.costs([8, 14, 14], [0.0005] * 3, [0.5, 0.5, 10.0])
+    assert spread[0] == pytest.approx(0.30 / 2000, rel=0.01)
+    assert spread[1] == pytest.approx(0.10 / 2000, rel=0.01)
+    assert slip[1] == pytest.approx(2e-5, rel=0.05)
+    assert slip[2] == pytest.approx(1e-4, rel=0.05)
+    assert model.spread.dtype == np.float32 and model.slip_mean.shape == (24, 2, 4)
+
+
+def test_thin_cells_fall_back_to_their_size_bin():
+    model = SlippageModel.fit(
+        hours=[3] * 10 + [15],
+        vol=[0.001] * 11,
+        size=[1.0] * 11,
+        slippage=[5e-5] * 10 + [9e-4],  # one outlier alone in the 15:00 cell
+        spread_hours=[3],
+        spread_vol=[0.001],
+        spread=[1e-4],
+        vol_edges=[0.0005],
+        min_samples=5,
+    )
+    _, slip, _ = model.costs([3, 15, 20], [0.001] * 3, [1.0] * 3)
+    assert slip[0] == pytest.approx(5e-5)
+    assert slip[1] == slip[2] == pytest.approx((10 * 5e-5 + 9e-4) / 11)
+    assert model.spread[20, 1] == pytest.approx(1e-4)
+
+
+def test_batch_pricing_and_round_trip(tmp_path):
+    _, _, ticks = _history()
+    hours, vol = bar_hours(ticks), relative_volatility(ticks)
+    assert hours[8 * 60] == 8 and vol.shape == (len(ticks),)
+
+    model = SlippageModel.default()
+    path = str(tmp_path / "slippage.npz")
+    model.save(path)
+    loaded = SlippageModel.load(path)
+    closes = ticks["close"].to_numpy()
+    n = len(closes)
+    expected = model.execution_prices(closes, np.full(n, BUY), hours, vol, np.ones(n))
+    assert np.array_equal(loaded.execution_prices(closes, BUY, hours, vol, 1.0), expected)
+
+    drawn = model.execution_prices(closes, BUY, hours, vol, 1.0, rng=np.random.default_rng(1))
+    assert np.mean(drawn - expected) == pytest.approx(0.0, abs=0.01)
+    assert np.std(drawn - expected) > 0
+
+
+def test_price_table_prices_each_size_bin():
+    _, _, ticks = _history()
+    hours, vol = bar_hours(ticks), relative_volatility(ticks)
+    closes = ticks["close"].to_numpy()
+    model = SlippageModel.default()
+    model.slip_mean[:, :, 3] *= 5  # orders of 20+ lots slip 5x more
+
+    table = model.price_table(closes, SELL, hours, vol)
+    assert table.shape == (4, len(closes))
+    for qty in (0.5, 1.0, 10.0, 50.0):
+        row = table[model.size_bin(qty)]
+        np.testing.assert_allclose(row, model.execution_prices(closes, SELL, hours, vol, qty))
+    assert np.all(table[model.size_bin(50.0)] < table[model.size_bin(1.0)])
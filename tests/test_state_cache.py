@@ -0,0 +1,128 @@
+import copy
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution.db_manager import DBManager
+from execution.state_cache import BrokerStateCache
+
+ORDER = {
+    "symbol": "XAUUSD",
+    "action": 1,
+    "limit_price": 1995.0,
+    "qty": 1,
+    "sl": 1985.0,
+    "tp": 2025.0,
+    "type": "LIMIT",
+    "date": "2026-01-01",
+}
+
+
+def test_writes_go_through_and_warm_load_restores_them(tmp_path):
+    path = str(tmp_path / "state.db")
+    state = BrokerStateCache(DBManager(path))
+    state.add_trade(1, "XAUUSD", "LONG", 1, 2000.0, 1990.0, 2030.0)
+    order_id = state.add_order(ORDER)
+    state.update_equity(499000.0)
+
+    fresh = BrokerStateCache(DBManager(path))
+    assert fresh.get_open_position("XAUUSD") == state.get_open_position("XAUUSD")
+    assert fresh.get_orders("XAUUSD")[0]["order_id"] == order_id
+    assert fresh.get_account()["equity"] == 499000.0
+    assert fresh.verify() == []
+
+    fresh.remove_order(order_id)
+    fresh.close_trade("XAUUSD", 2010.0, 1000.0)
+    assert fresh.get_orders("XAUUSD") == []
+    assert fresh.get_open_position("XAUUSD") == "FLAT"
+    assert fresh.get_last_exit_time("XAUUSD") is not None
+    assert BrokerStateCache(DBManager(path)).verify() == []
+
+
+def test_reads_never_touch_the_database(tmp_path):
+    state = BrokerStateCache(DBManager(str(tmp_path / "state.db")))
+    state.add_trade(1, "XAUUSD", "LONG", 1, 2000.0, 1990.0, 2030.0)
+    state.add_order(ORDER)
+
+    def no_disk(*args, **kwargs):
+        raise AssertionError("per-tick read hit SQLite")
+
+    state.db._get_conn = no_disk
+    for _ in range(1000):
+        state.get_account()
+        state.get_open_position("XAUUSD")
+        state.get_orders("XAUUSD")
+        state.get_last_exit_time("XAUUSD")
+
+
+def test_rollback_restores_memory_and_verify_spots_drift(tmp_path):
+    db = DBManager(str(tmp_path / "state.db"))
+    state = BrokerStateCache(db)
+    state.add_trade(1, "XAUUSD", "LONG", 1, 2000.0, 1990.0, 2030.0)
+
+    with pytest.raises(RuntimeError), state.transaction():
+        state.close_trade("XAUUSD", 2010.0, 1000.0)
+        state.update_equity(501000.0)
+        raise RuntimeError("crash mid-close")
+
+    assert state.get_open_position("XAUUSD")["entry_price"] == 2000.0
+    assert state.get_account()["equity"] == 500000.0
+    assert state.verify() == []
+
+    # Someone edits the DB behind the cache's back
+    db.update_equity(123.0)
+    assert any("equity" in p for p in state.verify())
+    state.load(from_tables=True)
+    assert state.verify() == []
+    assert BrokerStateCache(db).get_account()["equity"] == 123.0
+
+
+def test_rollback_keeps_ratcheted_trailing_stops(tmp_path):
+    state = BrokerStateCache(DBManager(str(tmp_path / "state.db")))
+    kept = state.add_trade(1, "XAUUSD", "LONG", 1, 2000.0, 1990.0, 2100.0, trail=5.0)
+    closed = state.add_trade(2, "XAUUSD", "LONG", 1, 2000.0, 1990.0, 2100.0, trail=5.0)
+    state.stops.update("XAUUSD", 2050.0)  # both stops ratchet to 2045
+
+    with pytest.raises(RuntimeError), state.transaction():
+        state.close_position(closed, 2050.0, 50.0)
+        opened = state.add_trade(3, "XAUUSD", "LONG", 1, 2050.0, 2040.0, 2100.0)
+        raise RuntimeError("unrelated failure")
+
+    assert state.stops.levels(kept)["sl"] == state.stops.levels(closed)["sl"] == 2045.0
+    assert opened not in state.stops and len(state.stops) == 2
+    assert state.stops.update("XAUUSD", 2049.0) == []  # best price still 2050, not entry
+    assert [e["reason"] for e in state.stops.update("XAUUSD", 2044.0)] == ["TRAIL_HIT"] * 2
+
+
+def test_rollback_undoes_only_what_the_transaction_touched(tmp_path, monkeypatch):
+    state = BrokerStateCache(DBManager(str(tmp_path / "state.db")))
+    with state.transaction():
+        ids = [state.add_order({**ORDER, "limit_price": 1900.0 + i}) for i in range(200)]
+    position = state.add_trade(1, "XAUUSD", "LONG", 2, 2000.0, 1990.0, 2030.0)
+    before = (state.get_orders("XAUUSD"), state.get_positions(), state.get_exposure("XAUUSD"))
+
+    def no_copy(*args, **kwargs):
+        raise AssertionError("transaction copied the whole state")
+
+    monkeypatch.setattr(copy, "deepcopy", no_copy)
+    with pytest.raises(RuntimeError), state.transaction():
+        state.replace_order(ids[0], limit_price=1850.0)
+        state.remove_order(ids[1])
+        state.add_order({**ORDER, "limit_price": 1800.0})
+        state.close_position(position, 2010.0, 10.0, qty=1)
+        state.update_equity(1.0)
+        raise RuntimeError("rejected downstream")
+
+    assert (
+        state.get_orders("XAUUSD"),
+        state.get_positions(),
+        state.get_exposure("XAUUSD"),
+    ) == before
+    assert state.get_account()["equity"] == 500000.0 and state.verify() == []
+    assert len(state.book) == 200
+    assert [state.book.get(("order", i))["price"] for i in ids[:2]] == [1900.0, 1901.0]
+    crossed = state.book.crossed("XAUUSD", 1800.0)  # the rolled-back order is not resting
+    assert sorted(ref for (_, ref), _ in crossed) == ids
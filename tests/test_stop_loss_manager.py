@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution.db_manager import DBManager
+from execution.state_cache import BrokerStateCache
+from src.gold_trading_bot.risk_management.stop_loss_manager import StopLossManager
+
+
+def reasons(events):
+    return {e["position_id"]: (e["reason"], e["price"]) for e in events}
+
+
+def test_fixed_levels_long_and_short():
+    stops = StopLossManager()
+    stops.add(1, "XAUUSD", "LONG", entry=2000.0, sl=1990.0, tp=2030.0)
+    stops.add(2, "XAUUSD", "SHORT", entry=2000.0, sl=2010.0, tp=1970.0)
+    stops.add(3, "MCX:GOLD", "LONG", entry=68000.0, sl=67000.0)
+
+    assert stops.update("XAUUSD", 2000.0) == []
+    assert reasons(stops.update("XAUUSD", 2012.0)) == {2: ("SL_HIT", 2010.0)}
+    assert reasons(stops.update("XAUUSD", 1965.0)) == {
+        1: ("SL_HIT", 1990.0),
+        2: ("TP_HIT", 1970.0),
+    }
+    # Still armed until removed (an exit that failed to fill fires again)
+    assert stops.remove(1) and stops.remove(2) and not stops.remove(2)
+    assert stops.update("XAUUSD", 1900.0) == [] and len(stops) == 1
+    assert stops.calculate_stop(2000.0, 5.0, multiple=2.0, direction="SHORT") == 2010.0
+
+
+def test_trailing_stops_ratchet_and_never_loosen():
+    stops = StopLossManager()
+    stops.add(1, "XAUUSD", "LONG", entry=2000.0, sl=1990.0, trail=5.0)
+    stops.add(2, "XAUUSD", "SHORT", entry=2000.0, trail=5.0)
+    stops.add(3, "XAUUSD", "LONG", entry=2000.0, sl=1980.0, atr_mult=2.0)
+
+    assert stops.update("XAUUSD", 2000.0) == []  # no ATR yet: #3 keeps its fixed stop
+    assert stops.levels(1) == {"sl": 1995.0, "tp": 0.0, "trailed": True}
+    assert stops.levels(3)["sl"] == 1980.0
+
+    stops.update("XAUUSD", 2020.0, atr=3.0)
+    assert stops.levels(1)["sl"] == 2015.0 and stops.levels(3)["sl"] == 2014.0
+    stops.update("XAUUSD", 2018.0, atr=10.0)  # wider ATR never loosens the stop
+    assert stops.levels(3)["sl"] == 2014.0
+
+    assert reasons(stops.update("XAUUSD", 2014.0)) == {
+        1: ("TRAIL_HIT", 2015.0),
+        2: ("TRAIL_HIT", 2005.0),  # short trailed from 2000: stop above at 2005
+        3: ("TRAIL_HIT", 2014.0),
+    }
+
+
+def test_hundreds_of_positions_in_a_few_array_ops():
+    rng = np.random.default_rng(5)
+    stops = StopLossManager()
+    for pid in range(600):
+        entry = 2000.0 + rng.uniform(-5, 5)
+        stops.add(pid, "XAUUSD", "LONG", entry=entry, sl=entry - 50, tp=entry + 50, trail=20.0)
+    for pid in range(0, 600, 4):
+        stops.remove(pid)  # swap-removes keep the rows dense
+    assert len(stops) == 450
+
+    start = time.perf_counter()
+    for tick in range(5_000):
+        assert stops.update("XAUUSD", 2000.0 + 5 * np.sin(tick / 50)) == []
+    assert time.perf_counter() - start < 1.0
+
+    hit = stops.update("XAUUSD", 1900.0)
+    assert sorted(e["position_id"] for e in hit) == [p for p in range(600) if p % 4]
+
+
+def test_state_cache_arms_positions_and_persists_trails(tmp_path):
+    path = str(tmp_path / "state.db")
+    state = BrokerStateCache(DBManager(path))
+    pid = state.add_trade(1, "XAUUSD", "LONG", 1.0, 2000.0, 1990.0, 2050.0, trail=4.0)
+    other = state.add_trade(2, "XAUUSD", "LONG", 1.0, 2000.0, 1990.0, 2050.0)
+    state.close_position(other, 2001.0, 100.0)
+    assert pid in state.stops and other not in state.stops
+
+    restarted = BrokerStateCache(DBManager(path))
+    assert restarted.verify() == []
+    assert restarted.get_position(pid)["trail"] == 4.0
+    restarted.stops.update("XAUUSD", 2010.0)
+    assert reasons(restarted.stops.update("XAUUSD", 2005.0)) == {pid: ("TRAIL_HIT", 2006.0)}
@@ -0,0 +1,116 @@
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tick_store import TickStore
+
+NOW = datetime(2026, 3, 20, 12, 0, 0)
+
+
+def load_ticks(store, start, n, step_seconds=15, symbol="XAUUSD"):
+    """n ticks from `start`, price rising 0.1 per tick."""
+    conn = sqlite3.connect(store.db_path)
+    for i in range(n):
+        ts = start + timedelta(seconds=i * step_seconds)
+        price = 2000 + i * 0.1
+        conn.execute(
+            store.insert_sql(ts),
+            (ts.isoformat(" "), symbol, price, price + 0.05, price - 0.05, price, 1, None, None),
+        )
+    conn.commit()
+    conn.close()
+
+
+def test_latest_ticks_walk_partitions_newest_first(tmp_path):
+    store = TickStore(str(tmp_path / "gold.db"))
+    load_ticks(store, NOW - timedelta(days=1, hours=1), 40)
+    load_ticks(store, NOW - timedelta(minutes=5), 10)
+
+    assert len(store.partitions()) == 2
+    ticks = store.latest_ticks("XAUUSD", limit=25)
+    assert len(ticks) == 25
+    assert ticks[-1]["timestamp"] > ticks[0]["timestamp"]
+    assert sum(t["timestamp"] >= str(NOW.date()) for t in ticks) == 10
+
+    conn = sqlite3.connect(store.db_path)
+    plan = conn.execute(
+        f"EXPLAIN QUERY PLAN SELECT * FROM {store.partition_name(NOW)} "
+        "WHERE symbol = 'XAUUSD' ORDER BY timestamp DESC LIMIT 5"
+    ).fetchall()
+    conn.close()
+    assert "USING INDEX" in str(plan)
+
+
+def test_rollup_builds_ohlc_bars_and_retention_drops_partitions(tmp_path):
+    store = TickStore(str(tmp_path / "gold.db"), tick_retention_days=2, m1_retention_days=5)
+    old_day = datetime(2026, 3, 10, 9, 0, 0)
+    load_ticks(store, old_day, 8)  # 2 minutes of 15s ticks
+    load_ticks(store, NOW - timedelta(days=1), 4)
+
+    summary = store.maintain(now=NOW)
+    assert "2026-03-10" in summary["dropped"]
+    assert "2026-03-10" in summary["rolled_up"]
+    assert summary["bars_pruned"] > 0  # M1 bars of 03-10 are older than 5 days
+    assert store.partition_name(old_day) not in str(store.partitions())
+
+    res, bars = store.query("XAUUSD", old_day, old_day + timedelta(minutes=5), "M1")
+    assert res == "M5"  # ticks and M1 both aged out
+    assert len(bars) == 1
+    bar = bars[0]
+    assert bar["open"] == 2000.0 and bar["close"] == 2000.7 and bar["ticks"] == 8
+    assert abs(bar["high"] - 2000.75) < 1e-9 and abs(bar["low"] - 1999.95) < 1e-9
+
+
+def test_query_picks_coarsest_adequate_resolution(tmp_path):
+    store = TickStore(str(tmp_path / "gold.db"))
+    start = NOW - timedelta(hours=1)
+    load_ticks(store, start, 240)
+
+    res, rows = store.query("XAUUSD", start, NOW)
+    assert res == "TICK" and len(rows) == 240
+
+    res, rows = store.query("XAUUSD", NOW - timedelta(days=1), NOW)
+    assert res == "M1" and len(rows) == 60
+    assert rows[0]["open"] == 2000.0 and rows[0]["ticks"] == 4
+
+    res, rows = store.query("XAUUSD", NOW - timedelta(days=10), NOW)
+    assert res == "M5" and len(rows) == 12
+
+
+def test_legacy_market_ticks_are_migrated(tmp_path):
+    path = str(tmp_path / "gold.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE market_ticks (id INTEGER PRIMARY KEY, timestamp DATETIME, symbol TEXT, "
+        "open REAL, high REAL, low REAL, close REAL, volume INTEGER, bid REAL, ask REAL)"
+    )
+    conn.executemany(
+        "INSERT INTO market_ticks (timestamp, symbol, open, high, low, close, volume) "
+        "VALUES (?, 'XAUUSD', 1, 1, 1, 1, 1)",
+        [("2026-03-01 10:00:00",), ("2026-03-02 10:00:00",), ("2026-03-02 11:00:00",)],
+    )
+    conn.commit()
+    conn.close()
+
+    store = TickStore(path)
+    assert store.migrate_legacy() == 3
+    assert store.count() == 3
+    assert len(store.partitions()) == 2
+
+
+def test_closed_days_are_rolled_up_once_by_queries(tmp_path):
+    store = TickStore(str(tmp_path / "gold.db"))
+    load_ticks(store, NOW - timedelta(days=2), 8)
+    load_ticks(store, datetime.now().replace(hour=0, minute=0, second=0, microsecond=0), 4)
+    rolled = []
+    rollup = store.rollup
+    store.rollup = lambda day, conn=None: rolled.append(day) or rollup(day, conn)
+
+    for _ in range(3):
+        store.query("XAUUSD", NOW - timedelta(days=3), datetime.now(), "M1")
+    closed, today = (NOW - timedelta(days=2)).date(), datetime.now().date()
+    assert rolled.count(closed) == 1  # marked after the first query
+    assert rolled.count(today) == 3  # still taking ticks
@@ -0,0 +1,123 @@
+import csv
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.write_behind import WriteBehindLog, get_log, shutdown_all
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_rows_are_batched_in_order_with_header(tmp_path):
+    path = str(tmp_path / "journal.csv")
+    log = WriteBehindLog(path, header=["Ticket", "PnL"])
+    for i in range(1000):
+        log.write_row([i, f"${i}.00"])
+    assert log.flush(durable=True)
+
+    rows = read_rows(path)
+    assert rows[0] == ["Ticket", "PnL"]
+    assert [int(r[0]) for r in rows[1:]] == list(range(1000))
+    assert log.get_stats()["batches"] < 1000
+    log.close()
+
+    # Reopening an existing file does not repeat the header
+    log = WriteBehindLog(path, header=["Ticket", "PnL"])
+    log.write_row([1000, "$1000.00"])
+    log.close()
+    assert read_rows(path)[0] == ["Ticket", "PnL"] and len(read_rows(path)) == 1002
+
+
+class StalledFile:
+    """Wraps the log's file so the writer thread blocks on its first write."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, data):
+        self.started.set()
+        self.release.wait(5)
+        return self.inner.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+
+def stall(log):
+    """Blocks the writer thread until the returned event is set."""
+    log._file = StalledFile(log._file)
+    log.write_row(["stall"])
+    log._file.started.wait(5)
+    return log._file.release
+
+
+def test_drop_and_spill_policies(tmp_path):
+    drop = WriteBehindLog(str(tmp_path / "drop.csv"), policy="drop", maxsize=5)
+    release = stall(drop)
+    for i in range(20):
+        drop.write_row([i])
+    assert drop.stats["dropped"] == 15
+    release.set()
+    drop.close()
+    assert len(read_rows(drop.path)) == 6
+
+    spill = WriteBehindLog(str(tmp_path / "spill.csv"), policy="spill", maxsize=5)
+    release = stall(spill)
+    for i in range(20):
+        spill.write_row([i])
+    assert spill.stats["spilled"] == 15
+    assert os.path.exists(spill.spill_path)
+    release.set()
+    for i in range(20, 30):  # until the spill is merged these follow it there
+        spill.write_row([i])
+    spill.flush(durable=True)
+    rows = read_rows(spill.path)
+    assert [int(r[0]) for r in rows[1:]] == list(range(30))  # enqueue order kept
+    assert not os.path.exists(spill.spill_path)
+    spill.close()
+
+
+class FailingFile(StalledFile):
+    """Raises on the first write, then behaves."""
+
+    def write(self, data):
+        if not self.started.is_set():
+            self.started.set()
+            raise OSError("disk full")
+        return self.inner.write(data)
+
+
+def test_io_error_fails_the_batch_not_the_writer(tmp_path):
+    log = WriteBehindLog(str(tmp_path / "audit.csv"))
+    log._file = FailingFile(log._file)
+    log.write_row(["lost"])
+    assert log.flush() is False
+    assert log.stats["errors"] == 1 and isinstance(log.last_error, OSError)
+
+    log.write_row(["kept"])
+    assert log.flush(durable=True)
+    log.close()
+    assert read_rows(log.path) == [["kept"]]
+
+
+def test_enqueue_does_not_wait_on_disk(tmp_path):
+    log = get_log(str(tmp_path / "audit.csv"), header=["Timestamp", "Details"])
+    assert get_log(str(tmp_path / "audit.csv")) is log
+    release = stall(log)
+
+    start = time.perf_counter()
+    for i in range(1000):
+        log.write_row([i, "order placed"])
+    assert time.perf_counter() - start < 0.5  # writer is stalled, producers are not
+
+    release.set()
+    shutdown_all()
+    assert len(read_rows(log.path)) == 1002
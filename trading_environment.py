@@ -8,6 +8,7 @@ import numpy as np
 import pandas as pd
 from gymnasium import spaces
 
+from execution.slippage_model import BUY, SELL, bar_hours, get_slippage_model, relative_volatility
 from indian_features import IndianMarketFeatures
 
 
@@ -30,7 +31,13 @@ class GoldTradingEnv(gym.Env):
     metadata = {"render_modes": ["human"]}
 
     def __init__(
-        self, df, lstm_model, initial_capital=100000, transaction_cost=0.0005, slippage=10
+        self,
+        df,
+        lstm_model,
+        initial_capital=100000,
+        transaction_cost=0.0005,
+        slippage=None,
+        lot_size=1.0,
     ):
         super().__init__()
 
@@ -47,7 +54,16 @@ class GoldTradingEnv(gym.Env):
         self.initial_capital = initial_capital
         self.capital = initial_capital
         self.transaction_cost_pct = transaction_cost
-        self.slippage = slippage
+        self.slippage = slippage  # fixed price offset; None = shared calibrated model
+        self.lot_size = lot_size  # quantity traded on each BUY / SELL
+
+        # Protocol 5.2.3: fill prices for every bar and size bin priced once, vectorized
+        if slippage is None:
+            self.cost_model = get_slippage_model()
+            close = self.df["close"].to_numpy(dtype=np.float64)
+            hours, vol = bar_hours(self.df), relative_volatility(self.df)
+            self.buy_prices = self.cost_model.price_table(close, BUY, hours, vol)
+            self.sell_prices = self.cost_model.price_table(close, SELL, hours, vol)
 
         # Position tracking
         self.position = 0  # 0: flat, 1: long
@@ -109,7 +125,7 @@ class GoldTradingEnv(gym.Env):
 
         # Calculate unrealized P&L for open positions
         if self.position == 1:
-            self.unrealized_pnl = (current_price - self.entry_price) * 1
+            self.unrealized_pnl = (current_price - self.entry_price) * self.lot_size
             # Reward/penalize based on unrealized P&L while holding
             if self.unrealized_pnl > 0:
                 reward += self.unrealized_pnl / self.initial_capital * 5
@@ -156,13 +172,17 @@ class GoldTradingEnv(gym.Env):
     def _execute_buy(self, price):
         """Execute buy order"""
         # Apply slippage and transaction costs
-        execution_price = price + self.slippage
+        if self.slippage is None:
+            size_bin = self.cost_model.size_bin(self.lot_size)
+            execution_price = self.buy_prices[size_bin, self.current_step]
+        else:
+            execution_price = price + self.slippage
         cost = execution_price * (1 + self.transaction_cost_pct)
 
-        if self.capital >= cost:
+        if self.capital >= cost * self.lot_size:
             self.position = 1
             self.entry_price = cost
-            self.capital -= cost
+            self.capital -= cost * self.lot_size
 
             self.trades.append(
                 {
@@ -180,11 +200,15 @@ class GoldTradingEnv(gym.Env):
     def _execute_sell(self, price):
         """Execute sell order"""
         # Apply slippage and transaction costs
-        execution_price = price - self.slippage
+        if self.slippage is None:
+            size_bin = self.cost_model.size_bin(self.lot_size)
+            execution_price = self.sell_prices[size_bin, self.current_step]
+        else:
+            execution_price = price - self.slippage
         proceeds = execution_price * (1 - self.transaction_cost_pct)
 
-        self.capital += proceeds
-        pnl = proceeds - self.entry_price
+        self.capital += proceeds * self.lot_size
+        pnl = (proceeds - self.entry_price) * self.lot_size
 
         # Update last trade
         self.trades[-1].update({"exit_step": self.current_step, "exit_price": proceeds, "pnl": pnl})
@@ -5,7 +5,16 @@ from datetime import datetime, timedelta
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
+
+from utils.cleaning_pipeline import (
+    CleaningPipeline,
+    CoerceTypes,
+    Deduplicate,
+    DropMissing,
+    HealPrices,
+    OHLCSanity,
+)
+from utils.market_data import get_market_data
 
 logging.basicConfig(
     filename="logs/update_gld_data.log",
@@ -22,7 +31,8 @@ def fetch_gld_data(symbol="GLD", days=365):
 
         print(f"[*] Fetching {symbol} data from {start_date} to {end_date}...")
 
-        df = yf.download(symbol, start=start_date, end=end_date, progress=False)
+        # Daily bars only change once a day; a 1h TTL avoids re-downloading on reruns
+        df = get_market_data().get_history(symbol, ttl=3600, start=start_date, end=end_date)
 
         # Handle case where yfinance returns a Series instead of DataFrame
         if isinstance(df, pd.Series):
@@ -75,23 +85,20 @@ def clean_gld_data(df):
             print(f"[-] Close column not found. Available columns: {list(df.columns)}")
             return None
 
-        # Remove duplicates
-        df = df.drop_duplicates(subset=["date"] if "date" in df.columns else [df.columns[0]])
-        print(f"[+] Removed duplicates: {len(df)} records remain")
-
-        # Remove rows with NaN in critical columns
-        df = df.dropna(subset=["close", "volume"])
-        print(f"[+] Removed NaN rows: {len(df)} records remain")
-
-        # Ensure data types
-        df["close"] = pd.to_numeric(df["close"], errors="coerce")
-        df["volume"] = pd.to_numeric(df["volume"], errors="coerce")
-        df["high"] = pd.to_numeric(df["high"], errors="coerce")
-        df["low"] = pd.to_numeric(df["low"], errors="coerce")
-        df["open"] = pd.to_numeric(df["open"], errors="coerce")
-
-        # Drop any rows where conversion failed
-        df = df.dropna(subset=["close", "volume"])
+        # Coercion, NaN volume filter, price healing, de-duplication and OHLC sanity in one pass
+        pipeline = CleaningPipeline(
+            [
+                CoerceTypes(numeric=["open", "high", "low", "close", "volume"]),
+                # A missing volume is dropped, not forward-filled into the indicators
+                DropMissing(["volume"]),
+                HealPrices(),
+                Deduplicate(subset=["date"] if "date" in df.columns else None),
+                OHLCSanity(),
+            ]
+        )
+        df, report = pipeline.run(df)
+        print(report)
+        print(f"[+] Cleaned base data: {len(df)} records remain")
 
         # Add technical indicators
         print("[*] Calculating technical indicators...")
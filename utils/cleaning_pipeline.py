@@ -0,0 +1,308 @@
+import os
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+PRICE_COLS = ["open", "high", "low", "close"]
+
+
+def convert_volume(vol_str):
+    """Converts volume strings like '21.65K' or '1.2M' to float."""
+    if isinstance(vol_str, (int, float)):
+        return float(vol_str)
+    vol_str = str(vol_str).strip().upper().replace(",", "")
+    if not vol_str or vol_str in ("-", "NAN"):
+        return 0.0
+
+    multipliers = {"K": 1_000, "M": 1_000_000, "B": 1_000_000_000}
+    if vol_str[-1] in multipliers:
+        return float(vol_str[:-1]) * multipliers[vol_str[-1]]
+    return float(vol_str)
+
+
+class Stage:
+    """
+    Protocol 4.1.3: One step of the cleaning pipeline.
+    Stages see one chunk at a time; anything that must survive a chunk
+    boundary (last good row, recent keys) lives on the stage and is cleared by `reset`.
+    """
+
+    name = "stage"
+
+    def reset(self):
+        pass
+
+    def process(self, df):
+        raise NotImplementedError
+
+
+class RenameColumns(Stage):
+    """Maps vendor headers (Investing.com, yfinance, Alpaca) onto ours and drops the rest."""
+
+    name = "rename"
+
+    def __init__(self, mapping=None, keep=None):
+        self.mapping = mapping or {}
+        self.keep = keep
+
+    def process(self, df):
+        df = df.rename(columns=self.mapping)
+        if self.keep:
+            df = df[[c for c in self.keep if c in df.columns]]
+        return df
+
+
+class CoerceTypes(Stage):
+    """Forces numeric prices/volume and parsed timestamps; unparseable cells become NaN/NaT."""
+
+    name = "coerce"
+
+    def __init__(self, numeric=None, volume=None, timestamp=None, timestamp_format=None):
+        self.numeric = numeric if numeric is not None else PRICE_COLS
+        self.volume = volume
+        self.timestamp = timestamp
+        self.timestamp_format = timestamp_format
+
+    def process(self, df):
+        df = df.copy()
+        for col in self.numeric:
+            if col not in df.columns:
+                continue
+            if not pd.api.types.is_numeric_dtype(df[col]):
+                df[col] = df[col].astype(str).str.replace(",", "", regex=False)
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+        vol = self.volume
+        if vol and vol in df.columns and not pd.api.types.is_numeric_dtype(df[vol]):
+            df[vol] = df[vol].map(convert_volume)
+
+        if self.timestamp and self.timestamp in df.columns:
+            # Aware stamps (offsets may differ across a DST change) become naive UTC;
+            # naive ones are taken as UTC already
+            df[self.timestamp] = pd.to_datetime(
+                df[self.timestamp], format=self.timestamp_format, utc=True, errors="coerce"
+            ).dt.tz_convert(None)
+            df = df.dropna(subset=[self.timestamp])
+        return df
+
+
+class DropMissing(Stage):
+    """Drops rows missing any of `subset`: columns that must be observed, never healed."""
+
+    name = "dropna"
+
+    def __init__(self, subset):
+        self.subset = list(subset)
+
+    def process(self, df):
+        return df.dropna(subset=[c for c in self.subset if c in df.columns])
+
+
+class HealPrices(Stage):
+    """
+    Same rules as AsyncDataHandler._sanitize_data: a 0.0 price is a missing
+    price, small gaps are forward-filled, unsalvageable rows are dropped.
+    The last good row is carried so a gap at a chunk boundary heals too.
+    """
+
+    name = "heal"
+
+    def __init__(self, price_cols=None):
+        self.price_cols = price_cols if price_cols is not None else PRICE_COLS
+        self._last_row = None
+
+    def reset(self):
+        self._last_row = None
+
+    def process(self, df):
+        if df.empty:
+            return df
+        cols = [c for c in self.price_cols if c in df.columns]
+        df = df.copy()
+        df[cols] = df[cols].replace(0.0, np.nan)
+
+        if self._last_row is not None:
+            df = pd.concat([self._last_row, df]).ffill().iloc[1:]
+        else:
+            df = df.ffill()
+        df = df.dropna(subset=cols)
+
+        if not df.empty:
+            self._last_row = df.iloc[[-1]]
+        return df
+
+
+class Deduplicate(Stage):
+    """
+    Drops repeated keys. Keys from earlier chunks are remembered in a bounded
+    window (`memory` keys), which covers the overlapping re-downloads we see
+    in practice without the key set growing with the file.
+    """
+
+    name = "dedupe"
+
+    def __init__(self, subset=None, memory=100_000):
+        self.subset = subset
+        self.memory = memory
+        self._recent = deque()
+        self._seen = set()
+
+    def reset(self):
+        self._recent.clear()
+        self._seen.clear()
+
+    def process(self, df):
+        if df.empty:
+            return df
+        subset = self.subset if self.subset else [df.columns[0]]
+        subset = [c for c in subset if c in df.columns]
+        df = df.drop_duplicates(subset=subset)
+
+        keys = list(df[subset].itertuples(index=False, name=None))
+        if self._seen:
+            mask = np.fromiter((k not in self._seen for k in keys), bool, len(keys))
+            df = df[mask]
+            keys = [k for k, m in zip(keys, mask, strict=True) if m]
+
+        for k in keys:
+            self._recent.append(k)
+            self._seen.add(k)
+        while len(self._recent) > self.memory:
+            self._seen.discard(self._recent.popleft())
+        return df
+
+
+class OHLCSanity(Stage):
+    """
+    Rejects bars that cannot exist: non-positive prices, high < low, or
+    open/close outside the high-low range. With `repair=True` the high/low
+    are widened to contain open/close instead of dropping the bar.
+    """
+
+    name = "ohlc"
+
+    def __init__(self, price_cols=None, repair=False):
+        self.price_cols = price_cols if price_cols is not None else PRICE_COLS
+        self.repair = repair
+
+    def process(self, df):
+        if df.empty:
+            return df
+        o, h, lo, c = (df[col].to_numpy(dtype=float) for col in self.price_cols)
+
+        if self.repair:
+            df = df.copy()
+            df[self.price_cols[1]] = np.maximum.reduce([o, h, c])
+            df[self.price_cols[2]] = np.minimum.reduce([o, lo, c])
+            h = df[self.price_cols[1]].to_numpy(dtype=float)
+            lo = df[self.price_cols[2]].to_numpy(dtype=float)
+
+        valid = (
+            (o > 0)
+            & (h > 0)
+            & (lo > 0)
+            & (c > 0)
+            & (h >= lo)
+            & (np.maximum(o, c) <= h)
+            & (np.minimum(o, c) >= lo)
+        )
+        return df[valid]
+
+
+class PipelineReport:
+    """Per-stage row counts and wall time, accumulated over every chunk."""
+
+    def __init__(self, stage_names):
+        self.chunks = 0
+        self.stages = {name: {"rows_in": 0, "rows_out": 0, "seconds": 0.0} for name in stage_names}
+
+    def record(self, name, rows_in, rows_out, seconds):
+        entry = self.stages[name]
+        entry["rows_in"] += rows_in
+        entry["rows_out"] += rows_out
+        entry["seconds"] += seconds
+
+    def as_dict(self):
+        return {"chunks": self.chunks, "stages": self.stages}
+
+    def __str__(self):
+        lines = [f"{'STAGE':<12}{'IN':>12}{'OUT':>12}{'DROPPED':>10}{'SECONDS':>10}"]
+        for name, e in self.stages.items():
+            lines.append(
+                f"{name:<12}{e['rows_in']:>12,}{e['rows_out']:>12,}"
+                f"{e['rows_in'] - e['rows_out']:>10,}{e['seconds']:>10.3f}"
+            )
+        return "\n".join(lines)
+
+
+class CleaningPipeline:
+    """
+    Protocol 4.1.3: Composable Data Cleaning.
+    The same stages run over a live batch (`run`) or stream a raw file of any
+    size chunk by chunk (`run_file`), so memory is bounded by `chunksize`.
+    """
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+        self._check_names()
+
+    def _check_names(self):
+        # Two stages of the same class get numbered names so the report stays unambiguous
+        seen = {}
+        for stage in self.stages:
+            count = seen.get(stage.name, 0)
+            seen[stage.name] = count + 1
+            if count:
+                stage.name = f"{stage.name}_{count + 1}"
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+
+    def _run_chunk(self, df, report):
+        report.chunks += 1
+        for stage in self.stages:
+            start = time.perf_counter()
+            rows_in = len(df)
+            df = stage.process(df)
+            report.record(stage.name, rows_in, len(df), time.perf_counter() - start)
+        return df
+
+    def run(self, df, carry_state=False):
+        """
+        Cleans one in-memory batch. By default every call is independent;
+        pass `carry_state=True` for consecutive live batches so healing and
+        de-duplication continue across them.
+        """
+        if not carry_state:
+            self.reset()
+        report = PipelineReport([s.name for s in self.stages])
+        return self._run_chunk(df, report), report
+
+    def run_file(self, src_path, dst_path, chunksize=100_000, **read_csv_kwargs):
+        """Streams `src_path` through the stages into `dst_path` (CSV, no index)."""
+        self.reset()
+        report = PipelineReport([s.name for s in self.stages])
+        if os.path.dirname(dst_path):
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+
+        tmp_path = f"{dst_path}.tmp"
+        header = True
+        with open(tmp_path, "w", newline="") as out:
+            for chunk in pd.read_csv(src_path, chunksize=chunksize, **read_csv_kwargs):
+                cleaned = self._run_chunk(chunk, report)
+                if cleaned.empty:
+                    continue
+                cleaned.to_csv(out, header=header, index=False)
+                header = False
+        # Atomic swap so in-place cleaning (src == dst) never leaves a half-written file
+        os.replace(tmp_path, dst_path)
+        return report
+
+
+def live_pipeline(price_cols=None):
+    """The AsyncDataHandler sanitization rules as a pipeline (capitalised MT5/Yahoo columns)."""
+    price_cols = price_cols if price_cols is not None else ["Open", "High", "Low", "Close"]
+    return CleaningPipeline([CoerceTypes(numeric=price_cols), HealPrices(price_cols)])
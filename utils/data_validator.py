@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+
+# Problem flags (bitmask, so one bar can carry several)
+GAP = 1
+OHLC = 2
+STALE = 4
+SPIKE = 8
+FLAG_NAMES = {GAP: "GAP", OHLC: "OHLC", STALE: "STALE", SPIKE: "SPIKE"}
+
+TIME_CANDIDATES = ("time", "Time", "timestamp", "Datetime", "datetime", "date", "Date")
+
+
+class DataQualityIndex:
+    """
+    Compact index of problem ranges over a bar array.
+    Ranges are sorted, non-overlapping and inclusive `[start, end]` bar positions,
+    so `is_clean` is two binary searches regardless of how much history is indexed.
+    """
+
+    def __init__(self, starts, ends, flags, times=None):
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.flags = np.asarray(flags, dtype=np.uint8)
+        self.times = times
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _to_position(self, value, side):
+        if isinstance(value, (int, np.integer)):
+            return int(value)
+        if self.times is None:
+            raise ValueError("Index was built without timestamps; query by bar position.")
+        pos = np.searchsorted(self.times, np.datetime64(pd.Timestamp(value)), side=side)
+        # `end` is inclusive: step back onto the last bar at or before it
+        return int(pos) if side == "left" else int(pos) - 1
+
+    def _first_overlap(self, start, end):
+        a = self._to_position(start, "left")
+        b = self._to_position(end, "right")
+        i = int(np.searchsorted(self.ends, a, side="left"))
+        if i < len(self.starts) and self.starts[i] <= b:
+            return i, a, b
+        return None, a, b
+
+    def is_clean(self, start, end):
+        """True if no problem range touches bars `start..end` (positions or timestamps)."""
+        i, _, _ = self._first_overlap(start, end)
+        return i is None
+
+    def problems(self, start=None, end=None):
+        """Problem ranges overlapping `start..end` as dicts (for logs and reports)."""
+        start = 0 if start is None else start
+        end = np.iinfo(np.int64).max if end is None else end
+        i, a, b = self._first_overlap(start, end)
+        out = []
+        while i is not None and i < len(self.starts) and self.starts[i] <= b:
+            flag = int(self.flags[i])
+            entry = {
+                "start": int(self.starts[i]),
+                "end": int(self.ends[i]),
+                "flags": [name for bit, name in FLAG_NAMES.items() if flag & bit],
+            }
+            if self.times is not None:
+                entry["start_time"] = pd.Timestamp(self.times[self.starts[i]])
+                entry["end_time"] = pd.Timestamp(self.times[self.ends[i]])
+            out.append(entry)
+            i += 1
+        return out
+
+    def summary(self):
+        counts = {name: int(np.count_nonzero(self.flags & bit)) for bit, name in FLAG_NAMES.items()}
+        return {"ranges": len(self), **counts}
+
+
+class DataValidator:
+    """
+    Protocol 1.1: Data Quality Gate.
+    Scans bar arrays in a handful of vectorized passes for missing bars,
+    OHLC inversions, frozen (stale) prices and price spikes, and folds the
+    result into a DataQualityIndex. Complements HeartbeatMonitor, which only
+    knows whether the feed file is still being written.
+    """
+
+    def __init__(
+        self,
+        freq_seconds=None,
+        gap_tolerance=1.5,
+        session_break_seconds=None,
+        stale_run=10,
+        spike_sigma=10.0,
+        spike_window=60,
+    ):
+        self.freq_seconds = freq_seconds
+        self.gap_tolerance = gap_tolerance
+        self.session_break_seconds = session_break_seconds
+        self.stale_run = stale_run
+        self.spike_sigma = spike_sigma
+        self.spike_window = spike_window
+
+    # --- INDIVIDUAL PASSES (each returns a boolean mask over bars) ---
+
+    def _gap_mask(self, times):
+        """Marks the first bar after missing bars. Session/weekend closures are not gaps."""
+        n = len(times)
+        mask = np.zeros(n, dtype=bool)
+        if n < 2:
+            return mask
+        dt = np.diff(times.astype("datetime64[s]").astype(np.int64))
+        freq = self.freq_seconds or float(np.median(dt))
+        if freq <= 0:
+            return mask
+        session_break = self.session_break_seconds
+        if session_break is None:
+            session_break = 4 * 3600 if freq < 86400 else 4 * 86400
+        mask[1:] = (dt > freq * self.gap_tolerance) & (dt < session_break)
+        # Out-of-order or duplicated timestamps are a feed fault as well
+        mask[1:] |= dt <= 0
+        return mask
+
+    @staticmethod
+    def _ohlc_mask(o, h, lo, c):
+        with np.errstate(invalid="ignore"):
+            bad = (h < lo) | (np.maximum(o, c) > h) | (np.minimum(o, c) < lo)
+            bad |= (o <= 0) | (h <= 0) | (lo <= 0) | (c <= 0)
+        bad |= np.isnan(o) | np.isnan(h) | np.isnan(lo) | np.isnan(c)
+        return bad
+
+    def _stale_mask(self, o, h, lo, c):
+        """Runs of >= stale_run identical bars (flat OHLC repeated) = frozen feed."""
+        n = len(c)
+        mask = np.zeros(n, dtype=bool)
+        if n < self.stale_run:
+            return mask
+        same = np.zeros(n, dtype=bool)
+        same[1:] = (o[1:] == o[:-1]) & (h[1:] == h[:-1]) & (lo[1:] == lo[:-1]) & (c[1:] == c[:-1])
+        # Run boundaries of `same`; a run of k repeats spans k+1 bars
+        edges = np.diff(np.concatenate(([0], same.astype(np.int8), [0])))
+        run_starts = np.flatnonzero(edges == 1)
+        run_ends = np.flatnonzero(edges == -1)
+        long_runs = (run_ends - run_starts + 1) >= self.stale_run
+        # Difference-array fill of [start - 1, end) for every long run
+        marks = np.zeros(n + 1, dtype=np.int64)
+        np.add.at(marks, run_starts[long_runs] - 1, 1)
+        np.add.at(marks, run_ends[long_runs], -1)
+        return np.cumsum(marks[:-1]) > 0
+
+    def _spike_mask(self, c):
+        """|log return| above spike_sigma x trailing std (cumsum rolling window, no Python loop)."""
+        n = len(c)
+        mask = np.zeros(n, dtype=bool)
+        w = self.spike_window
+        if n <= w + 1:
+            return mask
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = np.diff(np.log(c))
+        r = np.where(np.isfinite(r), r, 0.0)
+
+        cs = np.concatenate(([0.0], np.cumsum(r)))
+        cs2 = np.concatenate(([0.0], np.cumsum(r * r)))
+        # Trailing window ending just before return k (k >= w)
+        k = np.arange(w, len(r))
+        mean = (cs[k] - cs[k - w]) / w
+        var = (cs2[k] - cs2[k - w]) / w - mean * mean
+        std = np.sqrt(np.maximum(var, 0.0))
+        floor = np.median(std[std > 0]) * 0.1 if np.any(std > 0) else 0.0
+        std = np.maximum(std, floor)
+        with np.errstate(invalid="ignore"):
+            spikes = np.abs(r[k] - mean) > self.spike_sigma * std
+        mask[k[spikes] + 1] = True
+        return mask
+
+    # --- INDEX CONSTRUCTION ---
+
+    @staticmethod
+    def _compress(flags):
+        """Run-length encodes the per-bar flag array into [start, end, flags] ranges."""
+        n = len(flags)
+        if n == 0 or not flags.any():
+            return np.array([], np.int64), np.array([], np.int64), np.array([], np.uint8)
+        change = np.flatnonzero(np.diff(flags) != 0) + 1
+        starts = np.concatenate(([0], change))
+        ends = np.concatenate((change - 1, [n - 1]))
+        keep = flags[starts] != 0
+        return starts[keep], ends[keep], flags[starts[keep]]
+
+    def validate(self, o, h, lo, c, times=None):
+        o, h, lo, c = (np.asarray(x, dtype=np.float64) for x in (o, h, lo, c))
+        flags = np.zeros(len(c), dtype=np.uint8)
+        if times is not None:
+            times = np.asarray(times, dtype="datetime64[ns]")
+            flags[self._gap_mask(times)] |= GAP
+        flags[self._ohlc_mask(o, h, lo, c)] |= OHLC
+        flags[self._stale_mask(o, h, lo, c)] |= STALE
+        flags[self._spike_mask(c)] |= SPIKE
+        starts, ends, range_flags = self._compress(flags)
+        return DataQualityIndex(starts, ends, range_flags, times)
+
+    def validate_frame(self, df, time_col=None, price_cols=None):
+        """Convenience wrapper; detects MT5/Yahoo (capitalised) or lowercase columns."""
+        if price_cols is None:
+            price_cols = (
+                ["Open", "High", "Low", "Close"]
+                if "Close" in df.columns
+                else ["open", "high", "low", "close"]
+            )
+        if time_col is None:
+            time_col = next((col for col in TIME_CANDIDATES if col in df.columns), None)
+        times = pd.to_datetime(df[time_col]).to_numpy() if time_col else None
+        return self.validate(*(df[col].to_numpy() for col in price_cols), times=times)
@@ -1,9 +1,8 @@
-import os
-import sqlite3
-
 import MetaTrader5 as mt5
 import pandas as pd
 
+from utils.history_store import HistoryStore
+
 
 def fetch_and_save_history(symbol="XAUUSD", timeframe=mt5.TIMEFRAME_H1, bars=1000):
     # 1. Initialize MT5 Connection
@@ -27,20 +26,10 @@ def fetch_and_save_history(symbol="XAUUSD", timeframe=mt5.TIMEFRAME_H1, bars=100
     df["time"] = pd.to_datetime(df["time"], unit="s")  # Convert MT5 epoch to readable time
 
     # 4. Load into Local SQLite Database
+    # Upsert on the unique time index keeps a permanent archive without duplicates,
+    # so overlapping fetches cost O(len(df)) instead of a full-table de-dup pass.
     db_path = "data/trading_history.db"
-    os.makedirs("data", exist_ok=True)
-
-    conn = sqlite3.connect(db_path)
-    # 'append' ensures we don't overwrite old data, keeping a permanent archive
-    df.to_sql(f"{symbol}_history", conn, if_exists="append", index=False)
-
-    # Remove duplicates if we accidentally fetched overlapping data
-    conn.execute(f"""
-        DELETE FROM {symbol}_history
-        WHERE rowid NOT IN (SELECT MIN(rowid) FROM {symbol}_history GROUP BY time)
-    """)
-    conn.commit()
-    conn.close()
+    HistoryStore(db_path, symbol).upsert_bars(df)
 
     print(f"✅ Saved {len(df)} bars to {db_path}")
 
@@ -0,0 +1,235 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from utils.migrations import Migration, apply_pragmas, migrate, query_plans
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+BAR_COLUMNS = ["time", "open", "high", "low", "close", "tick_volume", "spread", "real_volume"]
+ENRICHED_COLUMNS = ["adx", "sentiment"]
+
+
+def history_migrations(table):
+    """Versioned schema changes for one symbol's bar table (store "history:<table>")."""
+
+    def unique_time_index(conn):
+        # One-off cleanup: a unique index cannot be built over duplicate bars
+        conn.execute(f"""
+            DELETE FROM {table}
+            WHERE rowid NOT IN (SELECT MIN(rowid) FROM {table} GROUP BY time)
+        """)
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_time ON {table}(time)")
+
+    return [
+        Migration(
+            1, "unique time index", unique_time_index, [f"DROP INDEX IF EXISTS idx_{table}_time"]
+        ),
+        Migration(
+            2,
+            "pending-enrichment index",
+            # Covers `MIN(time) WHERE adx IS NULL`; holds only bars not yet enriched
+            [f"CREATE INDEX IF NOT EXISTS idx_{table}_pending ON {table}(time) WHERE adx IS NULL"],
+            [f"DROP INDEX IF EXISTS idx_{table}_pending"],
+        ),
+    ]
+
+
+class HistoryStore:
+    """
+    Protocol 7.2: Indexed Bar Archive (data/trading_history.db).
+    One row per bar, keyed by a UNIQUE index on `time`, so appends are upserts
+    and ordered reads walk the index instead of sorting the whole table.
+    """
+
+    def __init__(self, db_path="data/trading_history.db", symbol="XAUUSD"):
+        self.db_path = db_path
+        self.symbol = symbol
+        self.table = f"{symbol}_history"
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._init_schema()
+
+    def _get_conn(self):
+        return apply_pragmas(sqlite3.connect(self.db_path))
+
+    def _init_schema(self):
+        """Creates the table, migrates legacy (pandas `to_sql`) tables, then runs migrations."""
+        conn = self._get_conn()
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                time TEXT NOT NULL,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                tick_volume INTEGER,
+                spread INTEGER,
+                real_volume INTEGER,
+                adx REAL,
+                sentiment REAL
+            )
+        """)
+
+        # Legacy tables were written by `to_sql` and may lack the enrichment columns
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")}
+        for col in BAR_COLUMNS + ENRICHED_COLUMNS:
+            if col not in existing:
+                col_type = "TEXT" if col == "time" else "REAL"
+                conn.execute(f"ALTER TABLE {self.table} ADD COLUMN {col} {col_type}")
+
+        conn.commit()
+        migrate(conn, f"history:{self.table}", history_migrations(self.table))
+        conn.close()
+
+    def hot_queries(self):
+        """The archive's frequent reads, with representative parameters."""
+        sql, params = self._range_query("2026-01-05", "2026-01-06", None)
+        return {
+            "range_read": (sql, params),
+            "first_pending": (f"SELECT MIN(time) FROM {self.table} WHERE adx IS NULL", ()),
+            "last_time": (f"SELECT MAX(time) FROM {self.table}", ()),
+        }
+
+    def query_plans(self):
+        """EXPLAIN QUERY PLAN of every hot query against this file."""
+        conn = self._get_conn()
+        plans = query_plans(conn, self.hot_queries())
+        conn.close()
+        return plans
+
+    @staticmethod
+    def _normalize_time(series):
+        """Stores timestamps as fixed-width text so lexical order == time order."""
+        return pd.to_datetime(series).dt.strftime(TIME_FORMAT)
+
+    # --- WRITES ---
+
+    def upsert_bars(self, df):
+        """
+        Inserts new bars and refreshes re-fetched ones in a single transaction.
+        Cost is proportional to len(df), not to the archive size.
+        A re-fetched bar has its enrichment cleared so `enrich_new_rows` recomputes it.
+        """
+        if df is None or df.empty:
+            return 0
+
+        frame = df[[c for c in BAR_COLUMNS if c in df.columns]].copy()
+        frame["time"] = self._normalize_time(frame["time"])
+        cols = list(frame.columns)
+        updates = ", ".join(f"{c}=excluded.{c}" for c in cols if c != "time")
+
+        sql = f"""
+            INSERT INTO {self.table} ({", ".join(cols)})
+            VALUES ({", ".join("?" for _ in cols)})
+            ON CONFLICT(time) DO UPDATE SET {updates}, adx=NULL, sentiment=NULL
+        """
+        rows = [
+            tuple(None if pd.isna(v) else v for v in rec)
+            for rec in frame.astype(object).itertuples(index=False, name=None)
+        ]
+
+        conn = self._get_conn()
+        with conn:
+            conn.executemany(sql, rows)
+        conn.close()
+        return len(rows)
+
+    def enrich_new_rows(self, window=14, warmup_bars=None):
+        """
+        Computes ADX and sentiment only for rows where `adx IS NULL`.
+        ADX is recursive (Wilder smoothing), so a warm-up of earlier bars is
+        re-read to seed the indicator; 10x the window is enough to converge.
+        """
+        from ta.trend import ADXIndicator
+
+        warmup_bars = warmup_bars if warmup_bars is not None else window * 10
+
+        conn = self._get_conn()
+        row = conn.execute(f"SELECT MIN(time) FROM {self.table} WHERE adx IS NULL").fetchone()
+        first_pending = row[0] if row else None
+        if first_pending is None:
+            conn.close()
+            return 0
+
+        warmup = pd.read_sql(
+            f"""
+            SELECT time, high, low, close, adx FROM {self.table}
+            WHERE time < ? ORDER BY time DESC LIMIT ?
+            """,
+            conn,
+            params=(first_pending, warmup_bars),
+        ).iloc[::-1]
+        pending = pd.read_sql(
+            f"SELECT time, high, low, close, adx FROM {self.table} WHERE time >= ? ORDER BY time",
+            conn,
+            params=(first_pending,),
+        )
+        df = pd.concat([warmup, pending], ignore_index=True)
+        df[["high", "low", "close"]] = df[["high", "low", "close"]].astype(float)
+
+        if len(df) > window:
+            adx = ADXIndicator(high=df["high"], low=df["low"], close=df["close"], window=window)
+            df["adx_new"] = adx.adx().fillna(0)
+        else:
+            df["adx_new"] = 0.0
+
+        todo = df[df["time"] >= first_pending]
+        todo = todo[todo["adx"].isna()]
+        sentiment = np.random.uniform(-0.5, 0.8, size=len(todo))
+        updates = list(
+            zip(todo["adx_new"].astype(float), sentiment.astype(float), todo["time"], strict=True)
+        )
+
+        with conn:
+            conn.executemany(
+                f"UPDATE {self.table} SET adx=?, sentiment=? WHERE time=?",
+                updates,
+            )
+        conn.close()
+        return len(updates)
+
+    # --- READS ---
+
+    def count(self):
+        conn = self._get_conn()
+        n = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        conn.close()
+        return n
+
+    def last_time(self):
+        """Latest bar time (index seek); useful to fetch only the missing tail."""
+        conn = self._get_conn()
+        row = conn.execute(f"SELECT MAX(time) FROM {self.table}").fetchone()
+        conn.close()
+        return pd.to_datetime(row[0]) if row and row[0] else None
+
+    def _range_query(self, start, end, columns):
+        cols = ", ".join(columns) if columns else "*"
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("time >= ?")
+            params.append(pd.Timestamp(start).strftime(TIME_FORMAT))
+        if end is not None:
+            clauses.append("time <= ?")
+            params.append(pd.Timestamp(end).strftime(TIME_FORMAT))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return f"SELECT {cols} FROM {self.table} {where} ORDER BY time ASC", params
+
+    def read_range(self, start=None, end=None, columns=None):
+        """Returns bars in [start, end] ordered by time, served by the time index."""
+        sql, params = self._range_query(start, end, columns)
+        conn = self._get_conn()
+        df = pd.read_sql(sql, conn, params=params)
+        conn.close()
+        return df
+
+    def iter_chunks(self, chunksize=50_000, start=None, end=None, columns=None):
+        """Yields the range as DataFrames of at most `chunksize` rows (bounded memory)."""
+        sql, params = self._range_query(start, end, columns)
+        conn = self._get_conn()
+        try:
+            yield from pd.read_sql(sql, conn, params=params, chunksize=chunksize)
+        finally:
+            conn.close()
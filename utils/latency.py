@@ -0,0 +1,266 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config.settings import LATENCY_CONFIG
+
+# Pipeline stages, in the order a bar travels them ("end_to_end" = bar landed -> fill)
+STAGES = (
+    "ingest",
+    "indicators",
+    "sentiment",
+    "risk",
+    "submit",
+    "ack",
+    "fill",
+    "journal",
+    "end_to_end",
+)
+
+# Log-linear buckets: 8 per power of two (<= 6.25% error), 8 ns to ~18 min
+SUB_BITS = 3
+SUB = 1 << SUB_BITS
+MAX_EXP = 40
+N_BUCKETS = (MAX_EXP + 1) * SUB
+
+
+def bucket_of(ns):
+    """Bucket index of a duration in nanoseconds (integer ops only)."""
+    ns = max(int(ns), SUB)
+    exp = ns.bit_length() - 1
+    if exp > MAX_EXP:
+        return N_BUCKETS - 1
+    return exp * SUB + ((ns >> (exp - SUB_BITS)) & (SUB - 1))
+
+
+def bucket_value(index):
+    """Midpoint (ns) of a bucket."""
+    exp, sub = divmod(index, SUB)
+    low = (SUB + sub) << (exp - SUB_BITS)
+    return low + (1 << (exp - SUB_BITS)) / 2
+
+
+def wall_to_monotonic_ns(wall_ts):
+    """perf_counter_ns() reading for a past time.time() value (e.g. a file's mtime)."""
+    return time.perf_counter_ns() - int((time.time() - wall_ts) * 1e9)
+
+
+class _Shard:
+    """One thread's counters: only that thread writes them, so no lock is needed."""
+
+    __slots__ = ("counts", "total", "peak")
+
+    def __init__(self):
+        self.counts = {stage: [0] * N_BUCKETS for stage in STAGES}
+        self.total = dict.fromkeys(STAGES, 0)
+        self.peak = dict.fromkeys(STAGES, 0)
+
+
+class LatencyRecorder:
+    """
+    Protocol 9.6: Latency Instrumentation.
+    Per-stage histograms of monotonic (perf_counter_ns) durations in fixed
+    log-linear buckets. Every thread records into its own shard, so the hot
+    path is an index computation and an increment with no lock or
+    allocation; readers merge the shards. `summary()` gives count / mean /
+    p50 / p95 / p99 / max per stage in milliseconds, and a daemon thread can
+    export it to a JSON file every few seconds.
+    """
+
+    def __init__(self, enabled=None):
+        self.enabled = LATENCY_CONFIG["enabled"] if enabled is None else enabled
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()  # taken once per thread, on its first record
+        self._exporter = None
+        self._stop_export = threading.Event()
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    # --- RECORDING ---
+
+    def record(self, stage, ns):
+        if not self.enabled:
+            return
+        shard = self._shard()
+        shard.counts[stage][bucket_of(ns)] += 1
+        shard.total[stage] += ns
+        if ns > shard.peak[stage]:
+            shard.peak[stage] = ns
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter_ns() - start)
+
+    # --- QUERIES ---
+
+    def _merged(self, stage):
+        with self._shards_lock:
+            shards = list(self._shards)
+        counts = [0] * N_BUCKETS
+        total = peak = 0
+        for shard in shards:
+            for i, n in enumerate(shard.counts[stage]):
+                if n:
+                    counts[i] += n
+            total += shard.total[stage]
+            peak = max(peak, shard.peak[stage])
+        return counts, total, peak
+
+    @staticmethod
+    def _quantiles(counts, peak, qs):
+        """Bucket midpoints at each quantile, capped at the largest sample seen."""
+        n = sum(counts)
+        out, seen, i = [], 0, 0
+        for q in qs:
+            rank = max(1, round(q * n))
+            while seen < rank:
+                seen += counts[i]
+                i += 1
+            out.append(min(bucket_value(i - 1), peak))
+        return out
+
+    def percentile(self, stage, q):
+        """q-quantile (0..1) of `stage` in milliseconds, or None before any sample."""
+        counts, _, peak = self._merged(stage)
+        if not any(counts):
+            return None
+        return self._quantiles(counts, peak, [q])[0] / 1e6
+
+    def summary(self, stages=None):
+        """{stage: {"count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"}} for recorded stages."""
+        result = {}
+        for stage in stages or STAGES:
+            counts, total, peak = self._merged(stage)
+            n = sum(counts)
+            if not n:
+                continue
+            p50, p95, p99 = self._quantiles(counts, peak, (0.50, 0.95, 0.99))
+            result[stage] = {
+                "count": n,
+                "mean_ms": round(total / n / 1e6, 3),
+                "p50_ms": round(p50 / 1e6, 3),
+                "p95_ms": round(p95 / 1e6, 3),
+                "p99_ms": round(p99 / 1e6, 3),
+                "max_ms": round(peak / 1e6, 3),
+            }
+        return result
+
+    def reset(self):
+        with self._shards_lock:
+            self._shards = []
+        self._local = threading.local()
+
+    # --- EXPORT ---
+
+    def export(self, path=None):
+        """Writes the summary to `path` as JSON (atomically replaced); returns the summary."""
+        path = path or LATENCY_CONFIG["export_path"]
+        summary = self.summary()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"exported_at": time.time(), "stages": summary}, f, indent=2)
+        os.replace(tmp, path)
+        return summary
+
+    def start_export(self, path=None, interval=None):
+        """Exports every `interval` seconds from a daemon thread until `stop_export()`."""
+        interval = interval or LATENCY_CONFIG["export_interval_s"]
+        if self._exporter is not None and self._exporter.is_alive():
+            return
+        self._stop_export.clear()
+
+        def loop():
+            while not self._stop_export.wait(interval):
+                self.export(path)
+
+        self._exporter = threading.Thread(target=loop, name="latency-export", daemon=True)
+        self._exporter.start()
+
+    def stop_export(self, path=None):
+        self._stop_export.set()
+        if self._exporter is not None:
+            self._exporter.join()
+            self._exporter = None
+        self.export(path)
+
+
+class Trace:
+    """One bar's trip through the pipeline: each `mark()` records the time since the last."""
+
+    __slots__ = ("recorder", "origin", "last")
+
+    def __init__(self, recorder, origin_ns=None):
+        self.recorder = recorder
+        self.last = time.perf_counter_ns()
+        self.origin = self.last if origin_ns is None else origin_ns
+
+    def mark(self, stage):
+        now = time.perf_counter_ns()
+        self.recorder.record(stage, now - self.last)
+        self.last = now
+
+    def finish(self):
+        self.recorder.record("end_to_end", time.perf_counter_ns() - self.origin)
+
+
+_RECORDER = LatencyRecorder()
+_TRACE = contextvars.ContextVar("latency_trace", default=None)
+
+
+def get_recorder():
+    return _RECORDER
+
+
+def current():
+    """The trace active in this task / thread, or None."""
+    return _TRACE.get()
+
+
+@contextmanager
+def trace(origin_ns=None):
+    """Starts a trace (from `origin_ns`, e.g. when the bar landed) for the enclosed code."""
+    with activate(Trace(_RECORDER, origin_ns)) as active:
+        yield active
+
+
+@contextmanager
+def activate(active):
+    """Re-enters a trace captured earlier (e.g. when a scheduled fill executes)."""
+    token = _TRACE.set(active)
+    try:
+        yield active
+    finally:
+        _TRACE.reset(token)
+
+
+def mark(stage):
+    """Records `stage` on the active trace; a no-op outside one."""
+    active = _TRACE.get()
+    if active is not None:
+        active.mark(stage)
+
+
+def finish():
+    active = _TRACE.get()
+    if active is not None:
+        active.finish()
+
+
+def timer(stage):
+    return _RECORDER.timer(stage)
@@ -0,0 +1,209 @@
+import csv
+import io
+import math
+import os
+import threading
+from datetime import date, datetime
+
+import numpy as np
+
+# One fixed-width entry per CSV record: byte span in the log, timestamp (epoch s), PnL.
+# ts/pnl are NaN where the record has none (header, kill-switch banner, audit rows).
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("end", "<u8"), ("ts", "<f8"), ("pnl", "<f8")])
+TAIL_BLOCK = 8192
+READ_CHUNK = 1 << 20
+
+
+def parse_timestamp(value):
+    """Epoch seconds for a logged timestamp ('2026-01-02 00:53:53.050', ISO, tz-aware), or None."""
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value).strip())
+        except ValueError:
+            return None
+    return value.timestamp()
+
+
+def parse_money(value):
+    """'$-12.50' / '1,234.5' / 7 -> float, or NaN."""
+    try:
+        return float(str(value).replace("$", "").replace(",", ""))
+    except ValueError:
+        return math.nan
+
+
+def _split_records(data, base):
+    """
+    Complete CSV records in `data` (bytes starting at file offset `base`) as
+    (offset, end, raw) tuples. A newline inside a quoted field does not end a
+    record; a trailing partial record is left for the next call.
+    """
+    records, start, quotes = [], 0, 0
+    pos = 0
+    while True:
+        nl = data.find(b"\n", pos)
+        if nl < 0:
+            break
+        quotes += data.count(b'"', pos, nl)
+        pos = nl + 1
+        if quotes % 2 == 0:
+            records.append((base + start, base + pos, data[start:pos]))
+            start, quotes = pos, 0
+    return records, start
+
+
+def _parse_row(raw):
+    rows = list(csv.reader(io.StringIO(raw.decode("utf-8"), newline="")))
+    return rows[0] if rows else []
+
+
+def tail_rows(path, n=10, block_size=TAIL_BLOCK):
+    """
+    Last `n` CSV rows of `path` (oldest first), read backwards from the end in
+    blocks; cost depends on `n`, not on the file size. The header is skipped.
+    Rows with embedded newlines are returned whole only if the block reaching
+    them also reaches their start; use LogIndex for exact record boundaries.
+    """
+    if n <= 0 or not os.path.exists(path):
+        return []
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        # n + 1 line starts are needed: the first chunk line may be partial
+        while pos > 0 and data.count(b"\n") <= n + 1:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    if pos > 0:
+        data = data[data.find(b"\n") + 1 :]
+    records, _ = _split_records(data if data.endswith(b"\n") else data + b"\n", 0)
+    rows = [_parse_row(raw) for _, _, raw in records]
+    if pos == 0 and rows:
+        rows = rows[1:]  # header
+    return [row for row in rows if row][-n:]
+
+
+class LogIndex:
+    """
+    Protocol 5.2.2: Sidecar Log Index.
+    `<path>.idx` holds one fixed-width entry per CSV record (byte offsets,
+    timestamp and PnL as floats), appended by `refresh()` as the log grows.
+    Recent or date-ranged queries read the index and then seek straight to
+    the matching records, so reports never re-parse the whole file.
+    `key(row)` returns (timestamp, pnl) for a data row, or None for the
+    header and anything else that should not be queryable.
+    """
+
+    def __init__(self, path, key):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.key = key
+        self._lock = threading.Lock()
+
+    # --- MAINTENANCE ---
+
+    def _indexed_to(self, f):
+        """Byte offset covered by the index; drops a torn trailing entry."""
+        size = f.seek(0, os.SEEK_END)
+        whole = size - size % INDEX_DTYPE.itemsize
+        if whole != size:
+            f.truncate(whole)
+        if whole == 0:
+            return 0
+        f.seek(whole - INDEX_DTYPE.itemsize)
+        return int(np.frombuffer(f.read(INDEX_DTYPE.itemsize), INDEX_DTYPE)["end"][0])
+
+    def refresh(self):
+        """Indexes records appended since the last call; returns how many."""
+        if not os.path.exists(self.path):
+            return 0
+        with self._lock, open(self.index_path, "a+b") as idx:
+            done = self._indexed_to(idx)
+            if done > os.path.getsize(self.path):
+                # Log was truncated or replaced: rebuild from scratch
+                idx.truncate(0)
+                done = 0
+            added = 0
+            with open(self.path, "rb") as log:
+                log.seek(done)
+                carry = b""
+                while True:
+                    chunk = log.read(READ_CHUNK)
+                    if not chunk:
+                        break
+                    records, used = _split_records(carry + chunk, done)
+                    carry = (carry + chunk)[used:]
+                    done += used
+                    if records:
+                        idx.write(self._entries(records).tobytes())
+                        added += len(records)
+            return added
+
+    def _entries(self, records):
+        entries = np.zeros(len(records), INDEX_DTYPE)
+        for i, (offset, end, raw) in enumerate(records):
+            try:
+                values = self.key(_parse_row(raw))
+            except (IndexError, ValueError, TypeError):
+                values = None
+            ts, pnl = values or (None, None)
+            entries[i] = (
+                offset,
+                end,
+                math.nan if ts is None else ts,
+                math.nan if pnl is None else pnl,
+            )
+        return entries
+
+    # --- QUERIES ---
+
+    def entries(self):
+        """All data entries (header and unkeyed records filtered out)."""
+        if not os.path.exists(self.index_path):
+            return np.zeros(0, INDEX_DTYPE)
+        with open(self.index_path, "rb") as f:
+            data = f.read()
+        entries = np.frombuffer(data[: len(data) - len(data) % INDEX_DTYPE.itemsize], INDEX_DTYPE)
+        return entries[~np.isnan(entries["ts"])]
+
+    def between(self, start=None, end=None):
+        """Entries with start <= timestamp < end (datetimes, dates or ISO strings)."""
+        entries = self.entries()
+        mask = np.ones(len(entries), dtype=bool)
+        if start is not None:
+            mask &= entries["ts"] >= parse_timestamp(start)
+        if end is not None:
+            mask &= entries["ts"] < parse_timestamp(end)
+        return entries[mask]
+
+    def tail(self, n=10):
+        """Last `n` data entries, reading the index backwards."""
+        if n <= 0 or not os.path.exists(self.index_path):
+            return np.zeros(0, INDEX_DTYPE)
+        size = INDEX_DTYPE.itemsize
+        with open(self.index_path, "rb") as f:
+            total = f.seek(0, os.SEEK_END) // size
+            found, count = [], 0
+            stop = total
+            while stop > 0 and count < n:
+                start = max(0, stop - max(n, 64))
+                f.seek(start * size)
+                block = np.frombuffer(f.read((stop - start) * size), INDEX_DTYPE)
+                block = block[~np.isnan(block["ts"])]
+                found.insert(0, block)
+                count += len(block)
+                stop = start
+        return np.concatenate(found)[-n:] if found else np.zeros(0, INDEX_DTYPE)
+
+    def read_rows(self, entries):
+        """CSV rows for the given entries, read by seeking to their offsets."""
+        rows = []
+        with open(self.path, "rb") as f:
+            for offset, end in zip(entries["offset"], entries["end"], strict=True):
+                f.seek(int(offset))
+                rows.append(_parse_row(f.read(int(end - offset))))
+        return rows
@@ -0,0 +1,281 @@
+import logging
+import os
+import pickle
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class YFinanceProvider:
+    """Live provider: one `yf.download` call for any number of tickers."""
+
+    def download(self, tickers, **params):
+        import yfinance as yf
+
+        data = yf.download(
+            tickers=list(tickers),
+            group_by="ticker",
+            progress=False,
+            threads=True,
+            **params,
+        )
+        frames = {}
+        if data is None or data.empty:
+            return frames
+        if isinstance(data.columns, pd.MultiIndex):
+            level0 = set(data.columns.get_level_values(0))
+            for ticker in tickers:
+                if ticker in level0:
+                    frames[ticker] = data[ticker].dropna(how="all")
+        elif len(tickers) == 1:
+            frames[tickers[0]] = data.dropna(how="all")
+        return frames
+
+
+class OfflineProvider:
+    """
+    Test/offline provider. Serves canned frames (or frames built by a callable)
+    and counts requests so tests can assert on batching and single-flight.
+    """
+
+    def __init__(self, frames=None, delay=0.0):
+        self.frames = frames or {}
+        self.delay = delay
+        self.calls = []
+
+    def download(self, tickers, **params):
+        self.calls.append((tuple(tickers), params))
+        if self.delay:
+            time.sleep(self.delay)
+        out = {}
+        for ticker in tickers:
+            source = self.frames.get(ticker)
+            frame = source(ticker, **params) if callable(source) else source
+            if frame is not None:
+                out[ticker] = frame
+        return out
+
+
+class _Entry:
+    __slots__ = ("fetched_at", "frame")
+
+    def __init__(self, fetched_at, frame):
+        self.fetched_at = fetched_at
+        self.frame = frame
+
+
+class MarketDataCache:
+    """
+    Protocol 4.3: Shared Market Data Access.
+    In-memory + on-disk TTL cache in front of a provider (yfinance by default).
+    - fresh (age < ttl): served from cache,
+    - stale (ttl <= age < stale_ttl): served immediately, refreshed in the background,
+    - expired/missing: fetched now, all missing tickers in ONE provider call.
+    Concurrent callers asking for the same key share a single in-flight request.
+    """
+
+    def __init__(self, provider=None, ttl=60, stale_ttl=900, cache_dir="data/cache/market"):
+        self.provider = provider or YFinanceProvider()
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.cache_dir = cache_dir
+        self._memory = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "requests": 0, "errors": 0}
+
+    # --- KEYS & DISK ---
+
+    @staticmethod
+    def _key(ticker, params):
+        return (ticker, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+    def _disk_path(self, key):
+        ticker, params = key
+        slug = re.sub(
+            r"[^A-Za-z0-9_.-]", "_", ticker + "_" + "_".join(f"{k}-{v}" for k, v in params)
+        )
+        return os.path.join(self.cache_dir, f"{slug}.pkl")
+
+    def _load_disk(self, key):
+        """Reads a cached entry from disk (call without holding the lock)."""
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                return _Entry(*pickle.load(f))
+        except (OSError, EOFError, pickle.UnpicklingError, TypeError):
+            return None
+
+    def _warm(self, keys):
+        """Loads `keys` missing from memory off disk, outside the lock, then publishes them."""
+        with self._lock:
+            missing = [key for key in keys if key not in self._memory]
+        loaded = {key: entry for key in missing if (entry := self._load_disk(key)) is not None}
+        if loaded:
+            with self._lock:
+                for key, entry in loaded.items():
+                    current = self._memory.get(key)
+                    if current is None or current.fetched_at < entry.fetched_at:
+                        self._memory[key] = entry
+
+    def _write_disk(self, key, entry):
+        """Persists an entry (call without holding the lock)."""
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{self._disk_path(key)}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump((entry.fetched_at, entry.frame), f)
+            os.replace(tmp, self._disk_path(key))
+        except OSError as e:
+            logger.warning(f"Market data cache write failed: {e}")
+
+    # --- FETCHING ---
+
+    def _fetch(self, tickers, params, futures, background=False):
+        """One provider round trip for `tickers`; resolves their single-flight futures."""
+        self.stats["requests"] += 1
+        try:
+            frames = self.provider.download(list(tickers), **params)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Market data download failed for {list(tickers)}: {e}")
+            frames = None
+            error = e
+        stored = {}
+        with self._lock:
+            for ticker in tickers:
+                key = self._key(ticker, params)
+                future = futures[ticker]
+                if frames is not None and ticker in frames:
+                    stored[key] = self._memory[key] = _Entry(time.time(), frames[ticker])
+                    future.set_result(frames[ticker])
+                elif key in self._memory:
+                    # Provider failed or omitted the ticker: keep serving the last copy
+                    future.set_result(self._memory[key].frame)
+                elif frames is None and not background:
+                    future.set_exception(error)
+                else:
+                    future.set_result(pd.DataFrame())
+                self._inflight.pop(key, None)
+        # Disk writes after the lock is released: readers never wait on pickle I/O
+        for key, entry in stored.items():
+            self._write_disk(key, entry)
+
+    def _background(self, tickers, params, futures):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="mdcache")
+        self._executor.submit(self._fetch, tickers, params, futures, True)
+
+    def get_many(self, tickers, ttl=None, **params):
+        """
+        Returns {ticker: DataFrame} for `tickers` with the given yfinance
+        parameters (period/interval/start/end). Missing tickers are downloaded
+        together; the returned frames are copies and safe to mutate.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        result, waits = {}, {}
+        fetch_now, refresh = {}, {}
+        self._warm([self._key(ticker, params) for ticker in dict.fromkeys(tickers)])
+
+        with self._lock:
+            for ticker in dict.fromkeys(tickers):
+                key = self._key(ticker, params)
+                entry = self._memory.get(key)
+                age = now - entry.fetched_at if entry else None
+
+                if entry is not None and age < ttl:
+                    self.stats["hits"] += 1
+                    result[ticker] = entry.frame
+                    continue
+                if key in self._inflight:
+                    if entry is not None and age < self.stale_ttl:
+                        self.stats["stale_hits"] += 1
+                        result[ticker] = entry.frame
+                    else:
+                        waits[ticker] = self._inflight[key]
+                    continue
+
+                future = Future()
+                self._inflight[key] = future
+                if entry is not None and age < self.stale_ttl:
+                    self.stats["stale_hits"] += 1
+                    result[ticker] = entry.frame
+                    refresh[ticker] = future
+                else:
+                    self.stats["misses"] += 1
+                    fetch_now[ticker] = future
+                    waits[ticker] = future
+
+        if refresh:
+            self._background(list(refresh), params, refresh)
+        if fetch_now:
+            self._fetch(list(fetch_now), params, fetch_now)
+
+        for ticker, future in waits.items():
+            try:
+                result[ticker] = future.result()
+            except Exception:
+                result[ticker] = pd.DataFrame()
+
+        return {t: result[t].copy() for t in dict.fromkeys(tickers) if t in result}
+
+    def get_history(self, ticker, ttl=None, **params):
+        return self.get_many([ticker], ttl=ttl, **params).get(ticker, pd.DataFrame())
+
+    # --- DERIVED QUOTES ---
+
+    @staticmethod
+    def _close(frame):
+        if frame is None or frame.empty or "Close" not in frame.columns:
+            return pd.Series(dtype=float)
+        return frame["Close"].dropna()
+
+    def last_close(self, ticker, **params):
+        params = params or {"period": "1d", "interval": "1m"}
+        close = self._close(self.get_history(ticker, **params))
+        return float(close.iloc[-1]) if len(close) else None
+
+    def change_pct(self, tickers, **params):
+        """{ticker: (last_close, % change vs previous close)} from one combined download."""
+        params = params or {"period": "2d"}
+        frames = self.get_many(tickers, **params)
+        out = {}
+        for ticker in tickers:
+            close = self._close(frames.get(ticker))
+            if len(close) >= 2:
+                last, prev = float(close.iloc[-1]), float(close.iloc[-2])
+                out[ticker] = (last, (last - prev) / prev * 100)
+            else:
+                out[ticker] = (None, None)
+        return out
+
+
+_DEFAULT = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_market_data():
+    """Process-wide shared cache, so every monitor/bot hits the same entries."""
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = MarketDataCache()
+        return _DEFAULT
+
+
+def set_market_data(cache):
+    """Swaps the shared cache (e.g. MarketDataCache(provider=OfflineProvider(...)) in tests)."""
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        _DEFAULT = cache
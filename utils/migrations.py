@@ -0,0 +1,131 @@
+import logging
+import time
+from collections import namedtuple
+
+from config.settings import SQLITE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# `up`/`down` are lists of SQL statements or a callable taking the connection.
+Migration = namedtuple("Migration", ["version", "name", "up", "down"])
+
+SQL_CREATE_MIGRATIONS = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        store TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        name TEXT,
+        applied_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (store, version)
+    )
+"""
+
+
+def apply_pragmas(conn, **overrides):
+    """
+    Protocol 7.5: Connection Tuning.
+    Applies SQLITE_CONFIG (WAL, page cache, mmap, ...) to a new connection.
+    Only journal_mode persists in the file; the rest are per connection.
+    """
+    for name, value in {**SQLITE_CONFIG, **overrides}.items():
+        if value is not None:
+            conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+
+def current_version(conn, store):
+    conn.execute(SQL_CREATE_MIGRATIONS)
+    row = conn.execute(
+        "SELECT MAX(version) FROM schema_migrations WHERE store = ?", (store,)
+    ).fetchone()
+    return row[0] or 0
+
+
+def _run(conn, steps):
+    if callable(steps):
+        steps(conn)
+    else:
+        for sql in steps:
+            conn.execute(sql)
+
+
+def migrate(conn, store, migrations, target=None):
+    """
+    Protocol 7.4: Versioned Schema Migrations.
+    Brings `store` (one logical schema; a file can hold several) to `target`
+    (default: latest), upgrading or rolling back one version per transaction.
+    Applied versions live in `schema_migrations`. Returns the steps taken as
+    (version, "up"|"down") tuples.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    by_version = {m.version: m for m in migrations}
+    target = max(by_version, default=0) if target is None else target
+    steps = []
+
+    while True:
+        # Write lock first, then the version: a process that started alongside
+        # this one may have applied the step while we waited for the lock
+        conn.execute("BEGIN IMMEDIATE")
+        migration = None
+        try:
+            version = current_version(conn, store)
+            if version == target:
+                conn.execute("COMMIT")
+                return steps
+            upgrade = version < target
+            migration = by_version[version + 1] if upgrade else by_version[version]
+            if upgrade:
+                _run(conn, migration.up)
+                conn.execute(
+                    "INSERT INTO schema_migrations (store, version, name) VALUES (?, ?, ?)",
+                    (store, migration.version, migration.name),
+                )
+            else:
+                _run(conn, migration.down)
+                conn.execute(
+                    "DELETE FROM schema_migrations WHERE store = ? AND version = ?",
+                    (store, migration.version),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            if migration is not None:
+                logger.exception(
+                    f"Migration {store} v{migration.version} ({migration.name}) failed"
+                )
+            raise
+        steps.append((migration.version, "up" if upgrade else "down"))
+        logger.info(
+            f"Migrated {store} {'to' if upgrade else 'back from'} v{migration.version}: "
+            f"{migration.name}"
+        )
+
+
+def explain(conn, sql, params=()):
+    """EXPLAIN QUERY PLAN details, e.g. ['SEARCH trades USING INDEX idx_... (symbol=?)']."""
+    return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def query_plans(conn, queries):
+    """{name: plan} for a store's HOT_QUERIES ({name: (sql, sample params)})."""
+    return {name: explain(conn, sql, params) for name, (sql, params) in queries.items()}
+
+
+def full_scans(plans):
+    """Names of queries whose plan walks a whole table instead of an index."""
+    return [
+        name
+        for name, plan in plans.items()
+        if any(step.startswith("SCAN") and "INDEX" not in step for step in plan)
+    ]
+
+
+def time_query(conn, sql, params=(), repeat=50):
+    """Median wall time of one execution (fully fetched), in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
@@ -1,56 +1,266 @@
-from telegram import Bot
+import atexit
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+import requests
 
 from config.settings import TELEGRAM_CONFIG
 
+logger = logging.getLogger(__name__)
 
-class TelegramNotifier:
+MAX_MESSAGE_LEN = 4096  # Telegram's limit per message
+DIGEST_SEP = "\n\n"
+
+
+class MarkdownError(ValueError):
+    """Telegram answered 400 to a Markdown message (usually an entity cut or unbalanced)."""
+
+
+class NotificationDispatcher:
+    """
+    Protocol 5.3.1: Batched Alert Dispatcher.
+    `post()` appends to a bounded in-memory queue and returns at once;
+    one daemon thread delivers. Messages posted within `window` seconds of
+    each other (or while the rate limiter holds the next send back) go out
+    as one digest, so a burst of fills costs one API call. Sends are spaced
+    at least `min_interval` apart (Telegram allows about one message per
+    second per chat) and a 429 is honoured via its retry_after. Digests are
+    sized to the limit header included, never cut, and a message whose
+    Markdown Telegram rejects is resent as plain text. Urgent
+    messages (kill switch) skip the coalescing window and jump the queue.
+    When the queue is full the oldest routine message is dropped.
+    """
+
+    def __init__(
+        self,
+        send=None,
+        max_queue=None,
+        window=None,
+        min_interval=None,
+        api_url=None,
+        token=None,
+        chat_id=None,
+    ):
+        self.api_url = api_url or TELEGRAM_CONFIG["api_url"]
+        self.token = token or TELEGRAM_CONFIG["bot_token"]
+        self.chat_id = chat_id or TELEGRAM_CONFIG["chat_id"]
+        self.max_queue = max_queue or TELEGRAM_CONFIG["max_queue"]
+        self.window = TELEGRAM_CONFIG["coalesce_window_s"] if window is None else window
+        self.min_interval = (
+            TELEGRAM_CONFIG["min_interval_s"] if min_interval is None else min_interval
+        )
+        self._send = send or self._post
+        self._routine = deque()
+        self._urgent = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._busy = False
+        self._last_send = 0.0
+        self.stats = {"posted": 0, "sent": 0, "digests": 0, "dropped": 0, "failed": 0}
+
+    # --- PRODUCER SIDE (never blocks) ---
+
+    def post(self, text, urgent=False):
+        with self._cond:
+            if urgent:
+                self._urgent.append(text)
+            else:
+                if len(self._routine) >= self.max_queue:
+                    self._routine.popleft()
+                    self.stats["dropped"] += 1
+                self._routine.append(text)
+            self.stats["posted"] += 1
+            self._cond.notify()
+        self.start()
+
+    # --- LIFECYCLE ---
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._cond:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stopping = False
+                    self._thread = threading.Thread(
+                        target=self._run, name="telegram-dispatcher", daemon=True
+                    )
+                    self._thread.start()
+        return self
+
+    def flush(self, timeout=10.0):
+        """Waits until everything posted so far has been handed to the API."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify()
+            while self._routine or self._urgent or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, timeout=10.0):
+        """Delivers what is queued (no coalescing wait), then ends the thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # --- DELIVERY THREAD ---
+
+    def _next_batch(self):
+        """Blocks until there is something to send; returns (messages, urgent) or None to exit."""
+        with self._cond:
+            while not (self._routine or self._urgent or self._stopping):
+                self._cond.wait()
+            if not (self._routine or self._urgent):
+                return None
+            if not self._urgent and not self._stopping:
+                # Let the burst build up: the window, or the rate limit if that is longer
+                ready_at = max(time.monotonic() + self.window, self._last_send + self.min_interval)
+                while not (self._urgent or self._stopping):
+                    remaining = ready_at - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            urgent = bool(self._urgent)
+            source = self._urgent if urgent else self._routine
+            # Room for the widest header this batch could get ("🧾 *N updates*")
+            size = len(self._header(len(source), urgent))
+            batch = []
+            while source and (
+                not batch or size + len(DIGEST_SEP) + len(source[0]) <= MAX_MESSAGE_LEN
+            ):
+                text = source.popleft()
+                batch.append(text)
+                size += len(DIGEST_SEP) + len(text)
+            self._busy = True
+            return batch, urgent
+
+    def _run(self):
+        while True:
+            item = self._next_batch()
+            if item is None:
+                return
+            batch, urgent = item
+            try:
+                wait = self._last_send + self.min_interval - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                self._deliver(self._digest(batch, urgent))
+                self.stats["sent"] += len(batch)
+                self.stats["digests"] += len(batch) > 1
+            except Exception as e:
+                self.stats["failed"] += len(batch)
+                logger.warning(f"TELEGRAM ERROR: {e}")
+            finally:
+                self._last_send = time.monotonic()
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    @staticmethod
+    def _header(count, urgent):
+        return "🚨 *URGENT*" if urgent else f"🧾 *{count} updates*"
+
+    @classmethod
+    def _digest(cls, batch, urgent):
+        if len(batch) == 1:
+            return batch[0]
+        return DIGEST_SEP.join([cls._header(len(batch), urgent), *batch])
 
-        @staticmethod
-        def send_message_sync(text):
-            import asyncio
+    def _deliver(self, text, attempts=3):
+        markdown = True
+        for _ in range(attempts):
             try:
-                asyncio.run(TelegramNotifier.send_message(text))
-            except RuntimeError:
-                # If already in an event loop, schedule as a task
-                loop = asyncio.get_event_loop()
-                loop.create_task(TelegramNotifier.send_message(text))
-
-        @staticmethod
-        def notify_trade_sync(trade_type, price, size, sl, tp, sentiment):
-            import asyncio
+                retry_after = self._send(text) if markdown else self._send(text, markdown=False)
+            except MarkdownError as e:
+                logger.warning(f"TELEGRAM: Markdown rejected ({e}); resending as plain text")
+                markdown = False
+                retry_after = self._send(text, markdown=False)
+            if not retry_after:
+                return
+            time.sleep(retry_after)  # 429: Telegram says when to come back
+        raise RuntimeError(f"rate limited {attempts} times")
+
+    def _post(self, text, markdown=True):
+        """Bot API sendMessage; returns retry_after seconds on a 429, else None."""
+        if not self.token or not self.chat_id:
+            return None  # Telegram not configured: nothing to do
+        payload = {"chat_id": self.chat_id, "text": text}
+        if markdown:
+            payload["parse_mode"] = "Markdown"
+        response = requests.post(
+            f"{self.api_url}/bot{self.token}/sendMessage", json=payload, timeout=5
+        )
+        if response.status_code == 429:
             try:
-                asyncio.run(TelegramNotifier.notify_trade(trade_type, price, size, sl, tp, sentiment))
-            except RuntimeError:
-                loop = asyncio.get_event_loop()
-                loop.create_task(TelegramNotifier.notify_trade(trade_type, price, size, sl, tp, sentiment))
-    """Protocol 5.3: Real-time trade and system alerts."""
+                return float(response.json()["parameters"]["retry_after"])
+            except (ValueError, KeyError, TypeError, json.JSONDecodeError):
+                return self.min_interval
+        if response.status_code == 400 and markdown:
+            raise MarkdownError(response.text[:200])
+        response.raise_for_status()
+        return None
 
-    _bot = None
 
-    @staticmethod
-    def get_bot():
-        if TelegramNotifier._bot is None and TELEGRAM_CONFIG["enabled"]:
-            # Using the token from your .env via settings
-            TelegramNotifier._bot = Bot(token=TELEGRAM_CONFIG["bot_token"])
-        return TelegramNotifier._bot
+_DISPATCHER = None
+_DISPATCHER_LOCK = threading.Lock()
+
+
+def get_dispatcher():
+    """The process-wide dispatcher (started on first post, drained at exit)."""
+    global _DISPATCHER
+    if _DISPATCHER is None:
+        with _DISPATCHER_LOCK:
+            if _DISPATCHER is None:
+                _DISPATCHER = NotificationDispatcher()
+                atexit.register(_DISPATCHER.stop, 5.0)
+    return _DISPATCHER
+
+
+class TelegramNotifier:
+    """
+    Protocol 5.3: Real-time trade and system alerts.
+    Every method only queues on the shared NotificationDispatcher, so
+    trading code never waits on the network. The async variants are kept
+    for existing `await` callers.
+    """
 
     @staticmethod
-    async def send_message(text):
-        bot = TelegramNotifier.get_bot()
-        if bot:
-            try:
-                await bot.send_message(
-                    chat_id=TELEGRAM_CONFIG["chat_id"], text=text, parse_mode="Markdown"
-                )
-            except Exception as e:
-                print(f"   ⚠️ TELEGRAM ERROR: {e}")
+    def notify(text, urgent=False):
+        if TELEGRAM_CONFIG["enabled"]:
+            get_dispatcher().post(text, urgent=urgent)
 
     @staticmethod
-    async def notify_trade(trade_type, price, size, sl, tp, sentiment):
-        msg = (
+    def format_trade(trade_type, price, size, sl, tp, sentiment):
+        return (
             f"🔔 *TRADE EXECUTED: {trade_type}*\n"
             f"💰 *Price:* ${price:,.2f} | *Size:* {size}\n"
             f"🧠 *Sentiment:* {sentiment}\n"
             f"🛡️ *SL:* ${sl:,.2f} | 🎯 *TP:* ${tp:,.2f}"
         )
-        await TelegramNotifier.send_message(msg)
+
+    @staticmethod
+    async def send_message(text, urgent=False):
+        TelegramNotifier.notify(text, urgent=urgent)
+
+    @staticmethod
+    def send_message_sync(text, urgent=False):
+        TelegramNotifier.notify(text, urgent=urgent)
+
+    @staticmethod
+    async def notify_trade(trade_type, price, size, sl, tp, sentiment):
+        TelegramNotifier.notify(
+            TelegramNotifier.format_trade(trade_type, price, size, sl, tp, sentiment)
+        )
+
+    @staticmethod
+    def notify_trade_sync(trade_type, price, size, sl, tp, sentiment):
+        TelegramNotifier.notify(
+            TelegramNotifier.format_trade(trade_type, price, size, sl, tp, sentiment)
+        )
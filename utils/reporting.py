@@ -1,8 +1,9 @@
 import os
 from datetime import datetime
 
-import pandas as pd
+import numpy as np
 
+from execution.journal_manager import JournalManager
 from utils.notifier import TelegramNotifier
 
 
@@ -10,21 +11,19 @@ class PerformanceReporter:
     """Protocol 6.1: Daily Performance Auditing."""
 
     @staticmethod
-    def calculate_stats():
-        file_path = "data/trade_journal.csv"
-        if not os.path.exists(file_path):
+    def calculate_stats(start=None, end=None):
+        """Stats from the journal's sidecar index (PnL floats; no CSV re-parse)."""
+        if not os.path.exists(JournalManager.FILE_PATH):
             return "⚠️ No trades recorded yet for today."
 
-        df = pd.read_csv(file_path)
-        if df.empty:
+        pnl = JournalManager.get_index().between(start, end)["pnl"]
+        pnl = pnl[~np.isnan(pnl)]
+        if pnl.size == 0:
             return "⚠️ Trade journal is empty."
 
-        # Clean PnL column (Remove $ and convert to float)
-        df["PnL_val"] = df["PnL"].replace(r"[\$,]", "", regex=True).astype(float)
-
-        total_pnl = df["PnL_val"].sum()
-        win_rate = (len(df[df["PnL_val"] > 0]) / len(df)) * 100
-        total_trades = len(df)
+        total_pnl = float(pnl.sum())
+        win_rate = (np.count_nonzero(pnl > 0) / pnl.size) * 100
+        total_trades = int(pnl.size)
         avg_trade = total_pnl / total_trades if total_trades > 0 else 0
 
         report = (
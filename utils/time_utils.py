@@ -1,13 +1,157 @@
-from datetime import UTC, datetime
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import UTC, datetime, timedelta
 
 import pytz
 
 from config.settings import ASSET_CONFIG
 
+# Loop turns with nothing holding a SimulatedClock before it jumps to the next sleeper
+IDLE_ROUNDS = 10
+
+
+class RealClock:
+    """Wall-clock UTC time; `sleep` blocks."""
+
+    def now(self):
+        return datetime.now(UTC)
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    async def sleep_async(self, seconds):
+        await asyncio.sleep(max(seconds, 0))
+
+    def hold(self):
+        return nullcontext()
+
+
+class SimulatedClock:
+    """
+    Protocol 9.5: Virtual Clock.
+    UTC time that only moves when told to, so a backtest can replay days of
+    orders in milliseconds. `sleep` advances the clock instead of blocking.
+    `sleep_async` is a discrete-event scheduler: sleepers wait in a heap, and
+    once the loop has gone IDLE_ROUNDS turns with no blocking call holding
+    the clock (see `run_in_thread`), time jumps to the earliest due sleeper
+    and every sleeper due then wakes, in due order. Concurrent tasks thus
+    see one shared timeline instead of each pushing the clock on its own.
+    """
+
+    def __init__(self, start=None):
+        start = start or datetime(2026, 1, 1, tzinfo=UTC)
+        self._now = start if start.tzinfo else start.replace(tzinfo=UTC)
+        self._sleepers = []  # heap of (due, seq, future)
+        self._seq = itertools.count()
+        self._holds = 0
+        self._idle = 0
+        self._ticking = False
+
+    def now(self):
+        return self._now
+
+    def advance(self, seconds):
+        self._now += timedelta(seconds=seconds)
+        return self._now
+
+    def advance_to(self, when):
+        when = when if when.tzinfo else when.replace(tzinfo=UTC)
+        if when < self._now:
+            raise ValueError(f"Clock cannot run backwards ({when} < {self._now})")
+        self._now = when
+        return self._now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.advance(seconds)
+
+    async def sleep_async(self, seconds):
+        """Waits `seconds` of virtual time, woken in due order with the other sleepers."""
+        if seconds <= 0:
+            await asyncio.sleep(0)
+            return
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        due = self._now + timedelta(seconds=seconds)
+        heapq.heappush(self._sleepers, (due, next(self._seq), future))
+        self._kick(loop)
+        await future
+
+    @contextmanager
+    def hold(self):
+        """Keeps time still while blocking work (a broker call in a thread) is in flight."""
+        self._holds += 1
+        try:
+            yield
+        finally:
+            self._holds -= 1
+            if self._sleepers:
+                self._kick(asyncio.get_running_loop())
+
+    def _kick(self, loop):
+        self._idle = 0
+        if not self._ticking:
+            self._ticking = True
+            loop.call_soon(self._tick, loop)
+
+    def _tick(self, loop):
+        while self._sleepers and self._sleepers[0][2].done():  # cancelled sleepers
+            heapq.heappop(self._sleepers)
+        if not self._sleepers or self._holds:
+            self._ticking = False  # the last sleeper or hold to go re-kicks
+            return
+        self._idle += 1
+        if self._idle < IDLE_ROUNDS:
+            loop.call_soon(self._tick, loop)
+            return
+        self._ticking = False
+        self._now = max(self._now, self._sleepers[0][0])
+        while self._sleepers and self._sleepers[0][0] <= self._now:
+            _, _, future = heapq.heappop(self._sleepers)
+            if not future.done():
+                future.set_result(None)
+        if self._sleepers:
+            self._kick(loop)
+
+
+_CLOCK = RealClock()
+
+
+def get_clock():
+    """The process-wide clock behind get_utc_now()."""
+    return _CLOCK
+
+
+def set_clock(clock):
+    """Installs `clock` (RealClock / SimulatedClock) process-wide; returns the previous one."""
+    global _CLOCK
+    previous, _CLOCK = _CLOCK, clock
+    return previous
+
 
 def get_utc_now():
-    """Returns current time in UTC."""
-    return datetime.now(UTC)
+    """Returns current time in UTC, as told by the installed clock."""
+    return _CLOCK.now()
+
+
+async def sleep_until(when):
+    """Awaits `when` (UTC) on the installed clock without blocking the event loop."""
+    await _CLOCK.sleep_async((when - _CLOCK.now()).total_seconds())
+
+
+async def run_in_thread(func, /, *args, **kwargs):
+    """`asyncio.to_thread`, with a SimulatedClock held still until the call returns."""
+    with _CLOCK.hold():
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+
+def get_local_now():
+    """Naive local time on the installed clock (the format the SQLite stores keep)."""
+    return _CLOCK.now().astimezone().replace(tzinfo=None)
 
 
 def to_display_time(dt_obj):
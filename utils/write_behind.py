@@ -0,0 +1,258 @@
+import atexit
+import csv
+import io
+import logging
+import os
+import queue
+import threading
+
+from utils.log_index import LogIndex
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("block", "drop", "spill")
+SPILL_POLL_S = 0.05  # writer wake-up while records are going to the spill file
+
+
+class _Flush:
+    """Marker queued behind pending records; set once they are on disk."""
+
+    __slots__ = ("durable", "done", "ok")
+
+    def __init__(self, durable):
+        self.durable = durable
+        self.done = threading.Event()
+        self.ok = True
+
+
+_STOP = object()
+
+
+class WriteBehindLog:
+    """
+    Protocol 5.2.1: Write-Behind Logging.
+    Callers enqueue records and return immediately; one writer thread per
+    file keeps it open and appends in batches. When the bounded queue is
+    full the `policy` decides: "block" the caller, "drop" the record (counted),
+    or "spill" it to `<path>.spill`. Once spilling starts every record goes
+    to the spill file until the writer, having drained the older queued
+    records, merges it back, so the file keeps enqueue order.
+    `flush(durable=True)` returns only after everything queued before it is fsynced.
+    With `index` (a LogIndex key function) the writer keeps `<path>.idx` in
+    step with every batch it appends. An I/O error fails that batch (counted
+    in `stats["errors"]`, and the flushes waiting on it return False) but
+    never the writer thread.
+    """
+
+    def __init__(
+        self, path, header=None, policy="block", maxsize=10_000, batch_size=256, index=None
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown backpressure policy '{policy}', expected one of {POLICIES}")
+        self.path = path
+        self.header = header
+        self.policy = policy
+        self.batch_size = batch_size
+        self.spill_path = f"{path}.spill"
+        self.index = LogIndex(path, index) if index else None
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._spill_lock = threading.Lock()
+        self._spilling = False  # set by the first spill, cleared when the writer merges it
+        self.last_error = None
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "dropped": 0,
+            "spilled": 0,
+            "max_depth": 0,
+            "errors": 0,
+        }
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "a", newline="", encoding="utf-8")  # noqa: SIM115 (held open)
+        self._csv = csv.writer(self._file)
+        if header and self._file.tell() == 0:
+            self._csv.writerow(header)
+            self._file.flush()
+
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name=f"write-behind:{os.path.basename(path)}", daemon=True
+        )
+        self._thread.start()
+
+    # --- PRODUCER SIDE ---
+
+    def write_row(self, row):
+        """Queues one CSV row (list of values)."""
+        self._enqueue(("row", row))
+
+    def write_text(self, text):
+        """Queues raw text, written verbatim (e.g. the kill-switch banner line)."""
+        self._enqueue(("text", text))
+
+    def _enqueue(self, record):
+        if self._closed:
+            raise RuntimeError(f"Write-behind log {self.path} is closed")
+        self.stats["enqueued"] += 1
+        if self.policy == "block":
+            self._queue.put(record)
+        elif (
+            self.policy == "spill" and self._spilling and self._spill(record, only_if_spilling=True)
+        ):
+            return
+        else:
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                if self.policy == "drop":
+                    self.stats["dropped"] += 1
+                    return
+                self._spill(record)
+                return
+        depth = self._queue.qsize()
+        if depth > self.stats["max_depth"]:
+            self.stats["max_depth"] = depth
+
+    def _spill(self, record, only_if_spilling=False):
+        with self._spill_lock:
+            if only_if_spilling and not self._spilling:
+                return False  # merged meanwhile: back to the queue
+            with open(self.spill_path, "a", newline="", encoding="utf-8") as f:
+                f.write(self._format([record]))
+            self._spilling = True
+        self.stats["spilled"] += 1
+        return True
+
+    @staticmethod
+    def _format(records):
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for kind, payload in records:
+            if kind == "row":
+                writer.writerow(payload)
+            else:
+                buf.write(payload)
+        return buf.getvalue()
+
+    # --- WRITER THREAD ---
+
+    def _run(self):
+        if self.index:
+            self.index.refresh()  # catch up on rows written before indexing existed
+        while True:
+            try:
+                batch = [self._queue.get(timeout=SPILL_POLL_S if self._spilling else None)]
+            except queue.Empty:
+                batch = []  # nothing queued, but a spill file is waiting
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records, flushes, stop = [], [], False
+            for item in batch:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, _Flush):
+                    flushes.append(item)
+                else:
+                    records.append(item)
+
+            try:
+                self._write_batch(records, force_merge=bool(flushes) or stop)
+                if any(f.durable for f in flushes) or stop:
+                    os.fsync(self._file.fileno())
+            except Exception as e:
+                self.stats["errors"] += 1
+                self.last_error = e
+                logger.error(f"Write-behind {self.path}: batch of {len(records)} failed: {e!r}")
+                for f in flushes:
+                    f.ok = False
+            for f in flushes:
+                f.done.set()
+            if stop:
+                return
+
+    def _write_batch(self, records, force_merge):
+        if records:
+            self._file.write(self._format(records))
+            self.stats["written"] += len(records)
+            self.stats["batches"] += 1
+        # Queued records are older than anything spilled, so the spill goes after them
+        # (checked after the write: producers may have queued more while it ran)
+        if force_merge or self._queue.empty():
+            self._merge_spill()
+        self._file.flush()
+        if self.index:
+            self.index.refresh()
+
+    def _merge_spill(self):
+        with self._spill_lock:
+            if os.path.exists(self.spill_path):
+                with open(self.spill_path, encoding="utf-8", newline="") as f:
+                    self._file.write(f.read())
+                os.remove(self.spill_path)
+            self._spilling = False
+
+    # --- CONTROL ---
+
+    def flush(self, durable=False, timeout=10.0):
+        """Blocks until everything queued so far is written (and fsynced if durable)."""
+        if self._closed:
+            return True
+        marker = _Flush(durable)
+        self._queue.put(marker)
+        return marker.done.wait(timeout) and marker.ok
+
+    def close(self, timeout=10.0):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._file.close()
+
+    def get_stats(self):
+        return {**self.stats, "depth": self._queue.qsize(), "policy": self.policy}
+
+
+_LOGS = {}
+_LOGS_LOCK = threading.Lock()
+
+
+def get_log(path, header=None, policy="block", maxsize=10_000, batch_size=256, index=None):
+    """
+    Shared writer for `path`. Every caller appending to the same file gets the
+    same queue, so records keep their order (AuditLogger and the kill switch
+    both write audit_log.csv). Options apply when the writer is first created.
+    """
+    key = os.path.abspath(path)
+    with _LOGS_LOCK:
+        log = _LOGS.get(key)
+        if log is None or log._closed:
+            log = WriteBehindLog(path, header, policy, maxsize, batch_size, index)
+            _LOGS[key] = log
+        return log
+
+
+def flush_all(durable=True):
+    """Durable flush of every open log (kill switch, pre-shutdown)."""
+    with _LOGS_LOCK:
+        logs = list(_LOGS.values())
+    for log in logs:
+        log.flush(durable=durable)
+
+
+def shutdown_all():
+    with _LOGS_LOCK:
+        logs = list(_LOGS.values())
+        _LOGS.clear()
+    for log in logs:
+        log.close()
+
+
+atexit.register(shutdown_all)